@@ -1,642 +1,72 @@
 #StockMate by Juan
 
 # ========== Imports ==========
-import os, json, sqlite3, requests, pytz, fitz, re, atexit, qrcode
-from apscheduler.schedulers.background import BackgroundScheduler
-from bs4 import BeautifulSoup
-from fpdf import FPDF
-from datetime import datetime
-from PIL import Image
-from flask import Flask, request, jsonify, render_template_string, redirect, url_for, session, send_file
+# Only what every process needs is imported here. PDF rendering (fpdf, qrcode, Pillow), PDF extraction
+# (PyMuPDF), scraping (requests, lxml) and APScheduler load on first use, inside the code that needs them.
+import json, time, atexit, click
+import instrumentation, scheduling, retention
+from flask import Flask
+from flask.cli import with_appcontext
+# init_db, the ingest functions and the response cache are re-exported for scripts and the benchmarks
+from migrations import init_db
+from ingest import scrape_mse, save_data, quote_dicts
+from response_cache import cache
+from routes import quotes, fundamentals, reports, extraction, admin
 
 # ========== FLASK APP ==========
-app = Flask(__name__)
-app.secret_key = "your-super-secret-key"
+def create_app():
+    """The Flask app with every blueprint registered. Cheap: no database access and no heavy imports."""
+    app = Flask(__name__)
+    app.secret_key = "your-super-secret-key"
+    instrumentation.init_app(app)
+    for module in (quotes, fundamentals, reports, extraction, admin):
+        app.register_blueprint(module.bp)
+    app.cli.add_command(schedule_command)
+    return app
 
-# ========== TIMEZONE CONVERTER ==========
-def convert_to_local_time(utc_time_str):
-    try:
-        utc = pytz.utc
-        local = pytz.timezone('Africa/Blantyre')  # GMT+2
-        utc_dt = datetime.strptime(utc_time_str, '%Y-%m-%d %H:%M:%S')
-        local_dt = utc.localize(utc_dt).astimezone(local)
-        return local_dt.strftime('%Y-%m-%d %H:%M:%S')
-    except:
-        return utc_time_str 
-        
-# ========== DATABASE INIT ==========
-def init_db():
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS stocks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            counter TEXT,
-            last_price TEXT,
-            change TEXT,
-            volume TEXT,
-            turnover TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-# ========== SCRAPE ==========
-def scrape_mse():
-    url = 'https://www.mse.co.mw/'
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    try:
-        response = requests.get(url, headers=headers)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        table = soup.find('table')
-        data = []
-        if not table:
-            return []
-        rows = table.find_all('tr')
-        for row in rows[1:]:
-            cols = row.find_all('td')
-            if len(cols) >= 5:
-                data.append({
-                    'Counter': cols[0].text.strip(),
-                    'Last Price (MK)': cols[1].text.strip(),
-                    '% Change': cols[2].text.strip(),
-                    'Volume': cols[3].text.strip(),
-                    'Turnover (MK)': cols[4].text.strip()
-                })
-        return data
-    except Exception as e:
-        print("Scraping Error:", e)
-        return []
-
-# ========== SAVE ==========
-def save_data(stock_data):
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-    for item in stock_data:
-        c.execute('''
-            SELECT 1 FROM stocks
-            WHERE counter = ? AND last_price = ? AND change = ? AND volume = ? AND turnover = ?
-            AND timestamp >= datetime('now', '-1 hour')
-        ''', (item['Counter'], item['Last Price (MK)'], item['% Change'], item['Volume'], item['Turnover (MK)']))
-        if not c.fetchone():
-            c.execute('''
-                INSERT INTO stocks (counter, last_price, change, volume, turnover)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (item['Counter'], item['Last Price (MK)'], item['% Change'], item['Volume'], item['Turnover (MK)']))
-    conn.commit()
-    conn.close()
-
-# ========== API ROUTES ==========
-@app.route('/')
-def home():
-    return "Hello There! StockMate API is Running!"
-
-@app.route('/scrape', methods=['GET'])
-def scrape_and_save():
+# ========== SCHEDULER ==========
+def scheduled_scrape():
+    """One scrape for the scheduler; True when it stored new ticks, which keeps the interval short."""
+    print("Scheduled scrape running...")
+    started = time.perf_counter()
     data = scrape_mse()
-    if data:
-        save_data(data)
-        return jsonify({"message": "Success!! Data Scraped and Saved", "count": len(data)})
-    else:
-        return jsonify({"error": "Failed to scrape data"}), 500
-
-@app.route('/stocks', methods=['GET'])
-def get_stocks():
-    conn = sqlite3.connect('database.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT counter, last_price, change, volume, turnover, timestamp FROM stocks ORDER BY timestamp DESC LIMIT 20')
-    rows = cursor.fetchall()
-    conn.close()
-    return jsonify([{"counter": r[0], "last_price": r[1], "change": r[2], "volume": r[3], "turnover": r[4], "timestamp": convert_to_local_time(r[5])} for r in rows])
-
-@app.route('/latest_prices', methods=['GET'])
-def latest_prices():
-    conn = sqlite3.connect('database.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT counter, last_price, change, volume, turnover, MAX(timestamp)
-        FROM stocks
-        GROUP BY counter
-    ''')
-    rows = cursor.fetchall()
-    conn.close()
-    
-    return jsonify([{"counter": r[0], "last_price": r[1], "change": r[2], "volume": r[3], "turnover": r[4], "timestamp": convert_to_local_time(r[5])} for r in rows])
-
-@app.route('/price_history/<counter>', methods=['GET'])
-def price_history(counter):
-    conn = sqlite3.connect('database.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT timestamp, last_price
-        FROM stocks
-        WHERE counter = ?
-        ORDER BY timestamp DESC
-        LIMIT 10
-    ''', (counter,))
-    rows = cursor.fetchall()
-    conn.close()
-    
-    return jsonify([
-        {"timestamp": convert_to_local_time(row[0]), "price": row[1]} for row in reversed(rows)
-    ])
-
-@app.route('/history/<counter>', methods=['GET'])
-def get_price_history(counter):
-    try:
-        conn = sqlite3.connect('database.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT DATE(timestamp), last_price
-            FROM stocks
-            WHERE counter = ?
-            ORDER BY timestamp ASC
-        ''', (counter,))
-        rows = cursor.fetchall()
-        conn.close()
-
-        # Clean and format results
-        history = []
-        for row in rows:
-            date_str = row[0]
-            try:
-                price = float(str(row[1]).replace(',', ''))
-                history.append({"date": date_str, "price": price})
-            except:
-                continue
-
-        return jsonify(history)
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-@app.route('/fundamentals/<counter>', methods=['GET'])
-def get_fundamentals(counter):
-    try:
-        with open('fundamentals.json') as f:
-            data = json.load(f)
-
-        company = data.get(counter.upper())
-        if not company:
-            return jsonify({"error": "Data not available for this company"}), 404
-
-        # Parse and clean numerical values
-        try:
-            net_profit = float(str(company['net_profit']).replace(',', ''))
-            shares = float(str(company['number_of_shares_in_issue']).replace(',', ''))
-            dividend = float(str(company['dividend_paid']).replace(',', ''))
-            book_value = float(str(company['book_value']).replace(',', ''))
-        except Exception as e:
-            return jsonify({"error": f"Parsing error: {str(e)}"}), 500
-
-        eps = net_profit / shares if shares and net_profit else 0
-        bvps = book_value / shares if shares and book_value else 0
-        dvps = dividend / shares if shares and dividend else 0
-
-        # Fetch latest price
-        conn = sqlite3.connect('database.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT last_price FROM stocks
-            WHERE counter = ?
-            ORDER BY timestamp DESC
-            LIMIT 1
-        ''', (counter,))
-        result = cursor.fetchone()
-        conn.close()
-
-        if result:
-            price = float(str(result[0]).replace(',', ''))
-        else:
-            return jsonify({"error": "Price data not available"}), 404
-
-        pe_ratio = price / eps if eps else None
-        pb_ratio = price / bvps if bvps else None
-        div_yield = (dvps / price) * 100 if price else None
-        
-        return jsonify({
-            "eps": f"{eps:.2f}",
-            "pe_ratio": f"{pe_ratio:.2f}" if pe_ratio else "N/A",
-            "pb_ratio": f"{pb_ratio:.2f}" if pb_ratio else "N/A",
-            "div_yield": f"{div_yield:.2f}%" if div_yield else "N/A"
-        })
-
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-@app.route('/metrics/<counter>', methods=['GET'])
-def stock_metrics(counter):
-    try:
-        with open('fundamentals.json') as f:
-            data = json.load(f)
-
-        company = data.get(counter.upper())
-        if not company:
-            return jsonify({"error": "Fundamentals not found"}), 404
-
-        # Parse and clean numbers
-        try:
-            net_profit = float(str(company['net_profit']).replace(',', ''))
-            shares = float(str(company['number_of_shares_in_issue']).replace(',', ''))
-            dividend = float(str(company['dividend_paid']).replace(',', ''))
-            book_value = float(str(company['book_value']).replace(',', ''))
-        except Exception as e:
-            return jsonify({"error": f"Parsing error: {str(e)}"}), 500
-
-        eps = net_profit / shares if shares and net_profit else 0
-        bvps = book_value / shares if shares and book_value else 0
-        dvps = dividend / shares if shares and dividend else 0
-        
-        # Fetch latest stock data
-        conn = sqlite3.connect('database.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT last_price, change, volume, turnover, timestamp
-            FROM stocks
-            WHERE counter = ?
-            ORDER BY timestamp DESC
-            LIMIT 1
-        ''', (counter,))
-        result = cursor.fetchone()
-        conn.close()
-
-        if not result:
-            return jsonify({"error": "Latest Price data not found"}), 404
-
-        price_str = str(result[0]).replace(',', '')
-        price = float(price_str) if price_str else 0
-
-        
-        pe_ratio = price / eps if eps else None
-        pb_ratio = price / bvps if bvps else None
-        div_yield = (dvps / price) * 100 if price else None
-
-        return jsonify({
-            "counter": counter.upper(),
-            "last_price": f"{price:.2f}",
-            "change": result[1],
-            "volume": result[2],
-            "turnover": result[3],
-            "timestamp": convert_to_local_time(result[4]),
-            "eps": f"{eps:.2f}",
-            "pe_ratio": f"{pe_ratio:.2f}" if pe_ratio else "N/A",
-            "pb_ratio": f"{pb_ratio:.2f}" if pb_ratio else "N/A",
-            "div_yield": f"{div_yield:.2f}%" if div_yield else "N/A"
-        })
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-# 📄 PDF class: Header and Footer using DejaVu font
-class PDF(FPDF):
-    def header(self):
-        self.image("StockMate-logo.png", 10, 8, 30)  # (x, y, width)
-        self.set_xy(50, 10)
-        self.set_fill_color(0, 102, 204)  # Blue
-        self.set_text_color(255, 255, 255)
-        self.set_font("DejaVu", "B", 20)
-        self.cell(140, 10, "StockMate Fundamentals Report", ln=True, align='C', fill=True)
-        self.ln(15)
-        # Motto
-        self.set_text_color(75, 0, 130)
-        self.set_font("DejaVu", "I", 10)
-        self.set_xy(50, 20)
-        self.cell(140, 8, "Smart Insights. Wise Investments.", ln=True, align='C')
-        self.ln(10)
-    
-    def footer(self):
-        self.set_y(-15)
-        self.set_font("DejaVu", "", 10)
-        self.set_text_color(0, 0, 238)
-        self.cell(0, 6, "Call/WhatsApp: +265888695513", ln=True, align='C', link='https://wa.me/265888695513')
-        self.cell(0, 6, "Email: juanphiri7@gmail.com", ln=True, align='C', link='mailto:juanphiri7@gmail.com')
-
-@app.route('/fundamentals_report/<counter>', methods=['GET'])
-def fundamentals_report(counter):
-    try:
-        with open('fundamentals.json') as f:
-            data = json.load(f)
-
-        company = data.get(counter.upper())
-        if not company:
-            return jsonify({"error": "Data not available for this company"}), 404
-
-        # Parse numeric data
-        net_profit = float(str(company['net_profit']).replace(',', ''))
-        shares = float(str(company['number_of_shares_in_issue']).replace(',', ''))
-        dividend = float(str(company['dividend_paid']).replace(',', ''))
-        book_value = float(str(company.get('book_value', 0)).replace(',', ''))
-
-        eps = net_profit / shares if shares and net_profit else 0
-        bvps = book_value / shares if shares and book_value else 0
-        dvps = dividend / shares if shares and dividend else 0
-
-        # Get latest stock price
-        conn = sqlite3.connect('database.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT last_price FROM stocks
-            WHERE counter = ?
-            ORDER BY timestamp DESC LIMIT 1
-        ''', (counter,))
-        result = cursor.fetchone()
-        conn.close()
-
-        if result:
-            price = float(str(result[0]).replace(',', ''))
-        else:
-            return jsonify({"error": "Price data not available"}), 404
-
-        pe_ratio = price / eps if eps else None
-        pb_ratio = price / bvps if bvps else None
-        div_yield = (dvps / price) * 100 if price else None
+    inserted = save_data(data) if data else 0
+    if inserted:
+        reports.regenerate_reports()
+    status = "unchanged" if data is None else f"{len(data)} rows, {inserted} new" if data else "failed"
+    print(f"Scheduled scrape {status} in {time.perf_counter() - started:.2f}s")
+    return inserted > 0
 
-        # === Create PDF ===
-        pdf = PDF()
-        
-        pdf.add_font("DejaVu", "", "fonts/DejaVuSans.ttf", uni=True)
-        pdf.add_font("DejaVu", "B", "fonts/DejaVuSans-Bold.ttf", uni=True)
-        pdf.add_font("DejaVu", "I", "fonts/DejaVuSans-Oblique.ttf", uni=True)
-        pdf.add_font("DejaVu", "BI", "fonts/DejaVuSans-BoldOblique.ttf", uni=True)
-        
-        pdf.add_page()
-        pdf.ln(10)
-        # ========== Company Logo + Name ==========
-        logo_path = f"company_logos/{counter.upper()}.png"
-        logo_width = 25
-        
-        if os.path.exists(logo_path):
-            y_start = pdf.get_y()
-            pdf.image(logo_path, x=10, y=y_start, w=logo_width)
-            pdf.set_xy(10 + logo_width + 10, y_start + 5) 
-            pdf.set_font("DejaVu", "B", 16)
-            pdf.cell(0, 10, f"{counter} Snapshot", ln=True)
-            # Push cursor down so logo and text above don't overlap with content
-            pdf.set_y(y_start + logo_width + 5)
-        else:
-            pdf.set_font("DejaVu", "B", 16)
-            pdf.set_text_color(0)
-            pdf.cell(0, 10, f"{counter.upper()} Snapshot", ln=True)
-            pdf.ln(10)
+def scheduled_retention():
+    print(f"Retention: {json.dumps(retention.run())}")
 
-        # ==== Financial Info ====
-        pdf.set_text_color(0)
-        pdf.set_font("DejaVu", "", 12)
-        pdf.cell(0, 10, f"Latest Price: MK {price:,.2f}" if price else "N/A", ln=True)
-        pdf.cell(0, 10, f"Net Profit: MK {net_profit:,.2f}" if net_profit else "N/A", ln=True)
-        pdf.cell(0, 10, f"Dividend Paid: MK {dividend:,.2f}" if dividend else "N/A", ln=True)
-        pdf.cell(0, 10, f"Number of Shares in Issue: {shares:,.0f}" if shares else "N/A", ln=True)
-        pdf.cell(0, 10, f"Book Value: MK {book_value:,.2f}" if book_value else "N/A", ln=True)
-        # Metrics 
-        pdf.ln(5)
-        pdf.set_font("DejaVu", "B", 16)
-        pdf.cell(0, 10, "Key Financial Metrics", ln=True)
-        pdf.set_font("DejaVu", "", 12)
-        pdf.cell(0, 10, f"Earnings Per Share (EPS): {eps:.2f}" if eps else "N/A", ln=True)
-        pdf.cell(0, 10, f"P/E Ratio: {pe_ratio:.2f}" if pe_ratio else "N/A", ln=True)
-        pdf.cell(0, 10, f"Dividend Yield: {div_yield:.2f}%" if div_yield else "N/A", ln=True)
-        pdf.cell(0, 10, f"P/B Ratio: {pb_ratio:.2f}" if pb_ratio else "N/A", ln=True)
-        pdf.cell(0, 10, f"Book Value Per Share (BVPS): {bvps:.2f}" if bvps else "N/A", ln=True)
-        #Disclaimer
-        pdf.ln(12)
-        pdf.set_font("DejaVu", "I", 10)
-        pdf.set_text_color(90)
-        pdf.multi_cell(0, 10, f"Disclaimer: This report is auto-generated based on public financial data from the Malawi Stock Exchange.\nAccuracy is NOT guaranteed. Scan the QR Code to verify {counter.upper()} official data. Invest wisely.")
-        pdf.ln(7)
-        pdf.set_font("DejaVu", "B", 10)
-        pdf.set_text_color(0)
-        pdf.cell(0, 10, f"For more information about {counter.upper()}, Scan the QR Code.")
-        
-        filename = f"{counter.upper()}-Fundamentals-Report.pdf"
-       
-        # === Generate QR Code for MSE companies ===
-        company_urls = {
-            "AIRTEL": "https://mse.co.mw/company/MWAIRT001156",
-            "BHL": "https://mse.co.mw/company/MWBHL001164",
-            "FDH": "https://mse.co.mw/company/MWFDHB001178",
-            "FMBCH": "https://mse.co.mw/company/MWFMBCH00009",
-            "ICON": "https://mse.co.mw/company/MWICON001188",
-            "ILLOVO": "https://mse.co.mw/company/MWILLV001116",
-            "MPICO": "https://mse.co.mw/company/MWMPICO010010",
-            "NBS": "https://mse.co.mw/company/MWNBS001174",
-            "NBM": "https://mse.co.mw/company/MWNBM001113",
-            "NICO": "https://mse.co.mw/company/MWNICO010014",
-            "NITL": "https://mse.co.mw/company/MWNITL001117",
-            "OMU": "https://mse.co.mw/company/MWOMU001121",
-            "PCL": "https://mse.co.mw/company/MWPCL001111",
-            "STANDARD": "https://mse.co.mw/company/MWSB0001112",
-            "SUNBIRD": "https://mse.co.mw/company/MWSUN001119",
-            "TNM": "https://mse.co.mw/company/MWTNM001151"
-        }
-            
-        qr_url = company_urls.get(counter.upper(), f"https://mse.co.mw")
-        qr_img = qrcode.make(qr_url)
-        qr_path = f"{counter}_qr.png"
-        qr_img.save(qr_path)
+# Every process may start it (see gunicorn.conf.py); the SQLite lease lets one of them scrape,
+# and that one runs retention once the market closes
+scheduler = scheduling.ScrapeScheduler(scheduled_scrape, after_close=scheduled_retention)
 
-        # Insert QR into PDF
-        pdf.image(qr_path, x=160, y=240, w=40, h=40)
-
-        os.remove(qr_path)
-        pdf.output(filename)
-
-        return send_file(filename, as_attachment=True)
-
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-# ========== FINANCIAL REPORTS PDF DOWNLOAD ==========
-@app.route('/download_sample_reports/<company>', methods=['GET'])
-def download_sample_reports(company):
-    company = company.upper()
-    pdf_links = {
-        "AIRTEL": "https://mse.co.mw/company/MWAIRT001156",
-        "BHL": "https://mse.co.mw/company/MWBHL001164",
-        "FDH": "https://mse.co.mw/company/MWFDHB001178",
-        "FMBCH": "https://mse.co.mw/company/MWFMBCH00009",
-        "ICON": "https://mse.co.mw/company/MWICON001188",            "ILLOVO": "https://mse.co.mw/company/MWILLV001116",
-        "MPICO": "https://mse.co.mw/company/MWMPICO010010",
-        "NBS": "https://mse.co.mw/company/MWNBS001174",
-        "NBM": "https://mse.co.mw/company/MWNBM001113",
-        "NICO": "https://mse.co.mw/company/MWNICO010014",
-        "NITL": "https://mse.co.mw/company/MWNITL001117",
-        "OMU": "https://mse.co.mw/company/MWOMU001121",            "PCL": "https://mse.co.mw/company/MWPCL001111",
-        "STANDARD": "https://mse.co.mw/company/MWSB0001112",
-        "SUNBIRD": "https://mse.co.mw/company/MWSUN001119",
-        "TNM": "https://mse.co.mw/company/MWTNM001151"
-    }
-
-    if company not in pdf_links:
-        return jsonify({"error": f"No sample report found for {company}"}), 404
-
-    url = pdf_links[company]
-    folder = f'reports/{company}'
-    os.makedirs(folder, exist_ok=True)
-
-    try:
-        filename = url.split('/')[-1]
-        path = os.path.join(folder, filename)
-        response = requests.get(url)
-        response.raise_for_status()
-        with open(path, 'wb') as f:
-            f.write(response.content)
-
-        if os.path.getsize(path) < 1000:
-            os.remove(path)
-            return jsonify({"error": "Downloaded file is too small or corrupt."}), 500
-
-        return jsonify({"message": "Downloaded", "company": company, "file": filename})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-# ========== FUNDAMENTAL EXTRACT ==========
-@app.route('/extract_fundamentals/<company>', methods=['GET'])
-def extract_fundamentals(company):
-    company = company.upper()
-    folder = f'reports/{company}'
-    if not os.path.exists(folder):
-        return jsonify({"error": "No reports found for this company"}), 404
-
-    files = [f for f in os.listdir(folder) if f.endswith('.pdf')]
-    if not files:
-        return jsonify({"error": "No PDF files found"}), 404
-
-    pdf_path = os.path.join(folder, sorted(files)[-1])
-    try:
-        doc = fitz.open(pdf_path)
-    except Exception as e:
-        return jsonify({"error": f"Failed to open PDF: {str(e)}"}), 500
-
-    full_text = ""
-    for page in doc:
-        full_text += page.get_text()
-
-    profit = re.search(r'Net\s+Profit\s*[:\-]?\s*[MK]*\s?([\d,]+\.\d+)', full_text, re.IGNORECASE)
-    shares = re.search(r'Number\s+of\s+Shares\s+in\s+Issue\s*[:\-]?\s*([\d,]+)', full_text, re.IGNORECASE)
-    dividend = re.search(r'Dividend\s+(?:Paid|Declared)?\s*[:\-]?\s*[MK]*\s?([\d,]+\.\d+)', full_text, re.IGNORECASE)
-    book_value = re.search(r'Book\s+Value\s*[:\-]?\s*[MK]*\s?([\d,]+\.\d+)', full_text, re.IGNORECASE)
-
-    data = {
-        "company": company,
-        "net_profit": profit.group(1) if profit else "Not found",
-        "number_of_shares_in_issue": shares.group(1) if shares else "Not found",
-        "dividend_paid": dividend.group(1) if dividend else "Not found",
-        "book_value": book_value.group(1) if book_value else "Not found"
-    }
-
-    os.makedirs("data", exist_ok=True)
-    with open("data/fundamentals.json", "w") as f:
-        json.dump({company: data}, f, indent=2)
-
-    return jsonify(data)
-
-# ========== DEBUG TEXT ROUTE ==========
-@app.route('/debug_pdf_text/<company>', methods=['GET'])
-def debug_pdf_text(company):
-    company = company.upper()
-    folder = f'reports/{company}'
-
-    files = [f for f in os.listdir(folder) if f.endswith('.pdf')]
-    if not files:
-        return jsonify({"error": "No PDF found"}), 404
-
-    path = os.path.join(folder, files[0])
-    try:
-        doc = fitz.open(path)
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        return text[:10000]
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-
-
-# =============== ❌ ADMIN PANEL ❌ ===============
-
-
-@app.route('/admin', methods=['GET', 'POST'])
-def admin_login():
-    if request.method == 'POST':
-        if request.form['password'] == "StockMateAdmin@47":
-            session['logged_in'] = True
-            return redirect(url_for('admin_dashboard'))
-        return r"Oops!! That Key Doesn't Fit the Lock!", 403
-
-    return render_template_string("""
-        <h2>StockMate Admin Login</h2>
-        <form method="POST">
-            <input type="password" name="password" placeholder="Insert Your Key Here"/>
-            <button type="submit">Unlock the Vault</button>
-        </form>
-    """)
-
-@app.route('/admin/dashboard')
-def admin_dashboard():
-    if not session.get('logged_in'):
-        return redirect(url_for('admin_login'))
-
-    try:
-        with open('fundamentals.json') as f:
-            data = json.load(f)
-    except:
-        data = {}
-
-    html = "<h2>Company Fundamentals</h2><ul>"
-    for k in sorted(data.keys()):
-        html += f"<li><strong>{k}</strong> — <a href='/admin/edit/{k}'>Edit</a></li>"
-    html += "</ul>"
-    return html
-
-@app.route('/admin/edit/<company>', methods=['GET', 'POST'])
-def edit_company(company):
-    if not session.get('logged_in'):
-        return redirect(url_for('admin_login'))
+def start_scheduler():
+    scheduler.start()
+    atexit.register(scheduler.shutdown)
 
-    company = company.upper()
+@click.command('schedule')
+@with_appcontext
+def schedule_command():
+    """Run the scrape scheduler in the foreground, e.g. as its own process beside STOCKMATE_SCHEDULER=0 web workers."""
+    init_db()
+    start_scheduler()
+    moment = scheduling.local_now()
+    print(f"Market {'open' if scheduling.is_open(moment) else f'closed until {scheduling.next_open(moment):%Y-%m-%d %H:%M}'}")
     try:
-        with open('fundamentals.json') as f:
-            data = json.load(f)
-    except:
-        data = {}
-
-    if request.method == 'POST':
-        data[company] = {
-            "net_profit": request.form['net_profit'],
-            "number_of_shares_in_issue": request.form['number_of_shares_in_issue'],
-            "dividend_paid": request.form['dividend_paid'],
-            "book_value": request.form['book_value']
-        }
-        with open('fundamentals.json', 'w') as f:
-            json.dump(data, f, indent=2)
-        return redirect(url_for('admin_dashboard'))
-
-    values = data.get(company, {"net_profit":"", "number_of_shares_in_issue":"", "dividend_paid":"", "book_value":""})
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
 
-    return render_template_string(f"""
-        <h2>Edit Fundamentals for {company}</h2>
-        <form method="POST">
-            Net Profit: <input name="net_profit" value="{values['net_profit']}"/><br>            
-            Number of Shares Issued: <input name="number_of_shares_in_issue" value="{values['number_of_shares_in_issue']}"/><br>
-            Dividend Paid: <input name="dividend_paid" value="{values['dividend_paid']}"/><br>
-            Book Value: <input name="book_value" value="{values['book_value']}"/><br>
-            <button type="submit">Save</button>
-        </form>
-        <a href="/admin/dashboard">← Back to dashboard</a>
-    """)
-    
-# ========== SCHEDULER ==========
-def scheduled_scrape():
-    print("Scheduled scrape running...")
-    data = scrape_mse()
-    if data:
-        save_data(data)
+# gunicorn app:app, flask --app app and the benchmarks all use this one
+app = create_app()
 
 # ========== INIT ==========
 if __name__ == '__main__':
     init_db()
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(scheduled_scrape, trigger='interval', minutes=5)
-    scheduler.start()
-    atexit.register(lambda: scheduler.shutdown(wait=False))
+    start_scheduler()
     app.run(host='0.0.0.0', port=5000, debug=True)
-  
@@ -0,0 +1,248 @@
+# StockMate archive: closed days of ticks compacted out of SQLite into per-counter, per-month Parquet files
+
+import glob, itertools, os, re, time
+from datetime import datetime, timezone
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import db, localtime
+
+ARCHIVE_DIR = os.environ.get('STOCKMATE_ARCHIVE', 'archive')
+KEEP_DAYS = 30             # days of ticks that stay in the hot stocks table
+DELETE_BATCH = 5000        # rows deleted from stocks per transaction once archived
+COMPRESSION = 'zstd'
+
+# Layout: archive/counter=<COUNTER>/month=<YYYY-MM>/ticks.parquet, rows sorted by (timestamp, id).
+# The counter lives in the directory name (hive style), so pyarrow.dataset can read the tree as is.
+FILE_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('timestamp', pa.timestamp('s', tz='UTC')),
+    ('last_price', pa.float64()),
+    ('change', pa.float64()),
+    ('volume', pa.int64()),
+    ('turnover', pa.float64()),
+])
+EXPORT_SCHEMA = pa.schema([('counter', pa.string())] + list(FILE_SCHEMA))
+TICK_COLUMNS = 'id, timestamp, last_price, change, volume, turnover'
+
+# ========== FLOOR ==========
+# meta.archived_before: every tick older than this epoch is in the archive. Hot-table readers
+# add "timestamp >= archived_before" so rows still waiting to be deleted are never read twice.
+def archived_before(conn=None):
+    sql = "SELECT value FROM meta WHERE key = 'archived_before'"
+    row = conn.execute(sql).fetchone() if conn is not None else db.query_one(sql)
+    return row[0] if row else 0
+
+def _month_bounds(epoch):
+    moment = datetime.fromtimestamp(epoch, timezone.utc)
+    start = datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+    end = datetime(moment.year + moment.month // 12, moment.month % 12 + 1, 1, tzinfo=timezone.utc)
+    return int(start.timestamp()), int(end.timestamp()), f"{moment.year:04d}-{moment.month:02d}"
+
+def _partition_path(counter, month):
+    return os.path.join(ARCHIVE_DIR, f'counter={counter}', f'month={month}', 'ticks.parquet')
+
+def _batch(rows, schema=FILE_SCHEMA):
+    # rows are (id, timestamp, last_price, change, volume, turnover) tuples straight from SQLite
+    columns = list(zip(*rows)) if rows else [[] for _ in schema]
+    return pa.RecordBatch.from_arrays([pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                                      schema=schema)
+
+# ========== COMPACT ==========
+def _write_partition(counter, month, rows):
+    """Merge rows into one month's file (temp file + rename). Ids already archived are skipped."""
+    path = _partition_path(counter, month)
+    table = pa.Table.from_batches([_batch(rows)])
+    if os.path.exists(path):
+        existing = pq.read_table(path, memory_map=True).cast(FILE_SCHEMA)
+        table = table.filter(pc.invert(pc.is_in(table['id'], value_set=existing['id'])))
+        table = pa.concat_tables([existing, table])
+    table = table.sort_by([('timestamp', 'ascending'), ('id', 'ascending')])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    pq.write_table(table, tmp_path, compression=COMPRESSION)
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+def compact(keep_days=KEEP_DAYS, now=None):
+    """Move ticks from days that closed more than keep_days ago into the archive.
+
+    Partitions are written first, then archived_before is advanced, then the
+    rows are deleted from stocks in small transactions so scrapes never wait
+    long for the write lock. A crash at any point leaves every tick readable
+    exactly once, and the next run finishes the job.
+    """
+    started = time.perf_counter()
+    now = now or localtime.now()
+    # Local midnight, so a trading day is never split between the archive and the hot table
+    today = (now + localtime.UTC_OFFSET) // 86400 * 86400 - localtime.UTC_OFFSET
+    cutoff = today - keep_days * 86400
+
+    with db.connection() as conn:
+        floor = archived_before(conn)
+        spans = conn.execute('''
+            SELECT counter, MIN(timestamp), MAX(timestamp) FROM stocks
+            WHERE timestamp < ? GROUP BY counter
+        ''', (cutoff,)).fetchall()
+        rows_archived, written, size = 0, 0, 0
+        for counter, low, high in spans:
+            month_start = low
+            while month_start <= high:
+                first, last, month = _month_bounds(month_start)
+                rows = conn.execute(f'''
+                    SELECT {TICK_COLUMNS} FROM stocks
+                    WHERE counter = ? AND timestamp >= ? AND timestamp < ?
+                    ORDER BY timestamp, id
+                ''', (counter, first, min(last, cutoff))).fetchall()
+                if rows:
+                    size += _write_partition(counter, month, rows)
+                    rows_archived += len(rows)
+                    written += 1
+                month_start = last
+
+    if cutoff > floor:
+        with db.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('archived_before', ?)", (cutoff,))
+
+    deleted = 0
+    while True:
+        with db.transaction() as conn:
+            count = conn.execute('''
+                DELETE FROM stocks WHERE id IN (SELECT id FROM stocks WHERE timestamp < ? LIMIT ?)
+            ''', (cutoff, DELETE_BATCH)).rowcount
+        deleted += count
+        if count < DELETE_BATCH:
+            break
+
+    return {"archived_before": localtime.format_local(cutoff), "rows": rows_archived, "deleted": deleted,
+            "partitions": written, "archive_bytes": size, "seconds": round(time.perf_counter() - started, 3)}
+
+# ========== READ ==========
+def counters():
+    return sorted(path.split('counter=', 1)[1] for path in glob.glob(os.path.join(ARCHIVE_DIR, 'counter=*')))
+
+def partitions(counter, start=None, end=None):
+    """This counter's month files that can hold ticks in [start, end), oldest first."""
+    paths = sorted(glob.glob(os.path.join(ARCHIVE_DIR, f'counter={counter}', 'month=*', 'ticks.parquet')))
+    selected = []
+    for path in paths:
+        month = re.search(r'month=(\d{4})-(\d{2})', path)
+        first = int(datetime(int(month.group(1)), int(month.group(2)), 1, tzinfo=timezone.utc).timestamp())
+        _, last, _ = _month_bounds(first)
+        if (start is None or last > start) and (end is None or first < end):
+            selected.append(path)
+    return selected
+
+def read_batches(counter, start=None, end=None, after=None):
+    """Archived ticks for one counter as record batches in (timestamp, id) order, memory-mapped from disk.
+
+    start/end are epoch seconds (end exclusive); after is a (timestamp, id) keyset position.
+    """
+    for path in partitions(counter, start, end):
+        for batch in pq.ParquetFile(path, memory_map=True).iter_batches():
+            # Parquet has no seconds unit, so timestamps come back as milliseconds
+            batch = batch.cast(FILE_SCHEMA)
+            ts = pc.cast(batch['timestamp'], pa.int64())
+            mask = None
+            for condition in (
+                pc.greater_equal(ts, start) if start is not None else None,
+                pc.less(ts, end) if end is not None else None,
+                pc.or_(pc.greater(ts, after[0]),
+                       pc.and_(pc.equal(ts, after[0]), pc.greater(batch['id'], after[1]))) if after else None,
+            ):
+                if condition is not None:
+                    mask = condition if mask is None else pc.and_(mask, condition)
+            if mask is not None:
+                batch = batch.filter(mask)
+            if batch.num_rows:
+                yield batch
+
+def tick_rows(batch):
+    """A record batch as (id, timestamp, last_price, change, volume, turnover) tuples with epoch timestamps."""
+    columns = [batch['id'].to_pylist(), pc.cast(batch['timestamp'], pa.int64()).to_pylist()]
+    columns += [batch[name].to_pylist() for name in ('last_price', 'change', 'volume', 'turnover')]
+    return list(zip(*columns))
+
+def history_batches(counter, start=None, end=None, after=None):
+    """Archived ticks in /history raw's row shape, (UTC date, last_price, timestamp, id), one list per batch."""
+    floor = archived_before()
+    if not floor or (start is not None and start >= floor):
+        return
+    for batch in read_batches(counter, start, min(end, floor) if end is not None else floor, after):
+        batch = batch.filter(pc.is_valid(batch['last_price']))
+        if batch.num_rows:
+            yield list(zip(pc.strftime(batch['timestamp'], format='%Y-%m-%d').to_pylist(),
+                           batch['last_price'].to_pylist(),
+                           pc.cast(batch['timestamp'], pa.int64()).to_pylist(),
+                           batch['id'].to_pylist()))
+
+# ========== EXPORT ==========
+def _hot_batches(counter, start, end, floor, size=50000):
+    sql = f'SELECT {TICK_COLUMNS} FROM stocks WHERE counter = ? AND timestamp >= ?'
+    params = [counter, max(floor, start or 0)]
+    if end is not None:
+        sql += ' AND timestamp < ?'
+        params.append(end)
+    with db.connection() as conn:
+        cursor = conn.execute(sql + ' ORDER BY timestamp, id', params)
+        while True:
+            rows = cursor.fetchmany(size)
+            if not rows:
+                break
+            yield _batch(rows)
+
+def export_batches(counter=None, start=None, end=None):
+    """Every tick (archive then hot table) as EXPORT_SCHEMA batches, ordered by counter, timestamp, id."""
+    floor = archived_before()
+    if counter:
+        names = [counter.upper()]
+    else:
+        names = sorted(set(counters()) | {r[0] for r in db.query('SELECT DISTINCT counter FROM latest_quotes')})
+    for name in names:
+        archived = read_batches(name, start, min(end, floor) if end is not None else floor)
+        for batch in itertools.chain(archived, _hot_batches(name, start, end, floor)):
+            label = pa.array([name] * batch.num_rows, type=pa.string())
+            yield pa.RecordBatch.from_arrays([label] + batch.columns, schema=EXPORT_SCHEMA)
+
+class _ChunkSink:
+    # Write-only file object for pyarrow writers; export_stream drains it after every batch
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def export_stream(fmt, counter=None, start=None, end=None):
+    """Yield an Arrow IPC stream ('arrow') or a Parquet file ('parquet') chunk by chunk."""
+    sink = _ChunkSink()
+    if fmt == 'arrow':
+        writer = pa.ipc.new_stream(sink, EXPORT_SCHEMA)
+    else:
+        writer = pq.ParquetWriter(sink, EXPORT_SCHEMA, compression=COMPRESSION)
+    for batch in export_batches(counter, start, end):
+        if fmt == 'arrow':
+            writer.write_batch(batch)
+        else:
+            writer.write_table(pa.Table.from_batches([batch]))
+        yield sink.take()
+    writer.close()
+    yield sink.take()
@@ -0,0 +1,50 @@
+# Archive compaction: SQLite size and full-history load time before compaction versus the Parquet archive after it.
+# Run from the repo root:  python -m benchmarks.bench_archive --months 12
+import argparse, json, os, sqlite3, tempfile, time
+
+import pyarrow.dataset as ds
+import app, archive, db
+from benchmarks.synthetic import load_history, make_rng, stage_workdir
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return round(time.perf_counter() - started, 3), result
+
+def main():
+    parser = argparse.ArgumentParser(description="Tick history in SQLite versus the Parquet archive")
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--keep-days', type=int, default=archive.KEEP_DAYS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stage_workdir(tmp)
+        app.init_db()
+        conn = sqlite3.connect('database.db')
+        rows = load_history(conn, args.months, make_rng())
+        conn.execute('VACUUM')
+        conn.close()
+        results = {"benchmark": "archive", "months": args.months, "rows": rows,
+                   "sqlite_bytes_before": os.path.getsize('database.db')}
+
+        # What an analyst did before: every tick out of SQLite into Python rows
+        results["sqlite_load_s"], loaded = timed(lambda: len(db.query('SELECT * FROM stocks ORDER BY counter, timestamp')))
+
+        results["compact_s"], summary = timed(lambda: archive.compact(args.keep_days))
+        results["archived_rows"] = summary["rows"]
+        results["archive_bytes"] = sum(os.path.getsize(p) for c in archive.counters() for p in archive.partitions(c))
+        with db.connection() as conn:
+            conn.execute('VACUUM')
+        results["sqlite_bytes_after"] = os.path.getsize('database.db')
+
+        # After: the archive tree read as one Arrow table, columns typed, no per-row Python objects
+        dataset = ds.dataset(archive.ARCHIVE_DIR, format='parquet', partitioning='hive')
+        results["arrow_load_s"], table = timed(lambda: dataset.to_table())
+        results["arrow_rows"] = table.num_rows
+        # The full export path (archive + hot rows) streamed as Arrow IPC
+        results["export_arrow_s"], size = timed(lambda: sum(len(c) for c in archive.export_stream('arrow')))
+        results["export_arrow_bytes"] = size
+        print(json.dumps(results))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# Concurrent reads during ingest: reader threads hit the API while a writer keeps calling save_data.
+# Run from the repo root:  python -m benchmarks.bench_concurrency --readers 8 --seconds 10
+import argparse, json, sqlite3, tempfile, threading, time
+
+import app
+from benchmarks.synthetic import COUNTERS, load_history, synthetic_scrape, starting_prices, make_rng, stage_workdir
+
+def main():
+    parser = argparse.ArgumentParser(description="Read throughput and lock errors while save_data runs")
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--months', type=int, default=1, help="history preloaded before the run")
+    parser.add_argument('--write-every', type=float, default=0.05, help="seconds between save_data calls")
+    args = parser.parse_args()
+
+    rng = make_rng()
+    with tempfile.TemporaryDirectory() as tmp:
+        stage_workdir(tmp)
+        app.init_db()
+        conn = sqlite3.connect('database.db')
+        load_history(conn, args.months, rng)
+        conn.close()
+        app.save_data(synthetic_scrape(rng, starting_prices(rng)))
+
+        stop = time.perf_counter() + args.seconds
+        counts = {"requests": 0, "errors": 0, "writes": 0, "write_errors": 0}
+        lock = threading.Lock()
+
+        def writer():
+            prices = starting_prices(rng)
+            while time.perf_counter() < stop:
+                try:
+                    app.save_data(synthetic_scrape(rng, prices))
+                    key = "writes"
+                except sqlite3.OperationalError as e:
+                    print("writer:", e)
+                    key = "write_errors"
+                with lock:
+                    counts[key] += 1
+                time.sleep(args.write_every)
+
+        def reader(n):
+            client = app.app.test_client()
+            urls = ['/latest_prices', f'/metrics/{COUNTERS[n % len(COUNTERS)]}',
+                    f'/price_history/{COUNTERS[n % len(COUNTERS)]}', '/stocks']
+            i = 0
+            while time.perf_counter() < stop:
+                status = client.get(urls[i % len(urls)]).status_code
+                i += 1
+                with lock:
+                    counts["requests"] += 1
+                    counts["errors"] += status != 200
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        print(json.dumps(dict(counts, benchmark="concurrent_reads_during_ingest", readers=args.readers,
+                              requests_per_second=round(counts["requests"] / args.seconds, 1))))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# Report downloads against a local stub: cold fetch, 304 revalidation, hash dedup without validators,
+# and resume after dropped connections.
+# Run from the repo root:  python -m benchmarks.bench_downloads --companies 16 --size-kb 2048
+import argparse, json, os, tempfile, time
+
+import downloader
+from benchmarks import report_stub
+
+def run(label, fetch, server, results):
+    hits, sent = server.hits, server.bytes_sent
+    started = time.perf_counter()
+    outcome = fetch.download_all()
+    elapsed = time.perf_counter() - started
+    statuses = {}
+    for result in outcome.values():
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    results[label] = {"s": round(elapsed, 3), "requests": server.hits - hits,
+                      "bytes_sent": server.bytes_sent - sent, "statuses": statuses,
+                      "resumed": sum(1 for r in outcome.values() if r.get("resumed"))}
+    return outcome
+
+def main():
+    parser = argparse.ArgumentParser(description="Report downloader against a local HTTP stub")
+    parser.add_argument('--companies', type=int, default=16)
+    parser.add_argument('--size-kb', type=int, default=2048)
+    parser.add_argument('--workers', type=int, default=downloader.WORKERS)
+    parser.add_argument('--delay', type=float, default=0.05, help="stub latency per response, seconds")
+    args = parser.parse_args()
+    downloader.BACKOFF = 0.01
+
+    with tempfile.TemporaryDirectory() as tmp:
+        served = os.path.join(tmp, 'served')
+        os.makedirs(served)
+        names = [f"CO{i:02d}" for i in range(args.companies)]
+        for name in names:
+            with open(os.path.join(served, f"{name}.pdf"), 'wb') as f:
+                f.write(b"%PDF-1.4\n" + os.urandom(args.size_kb * 1024))
+
+        results = {"benchmark": "downloads", "companies": args.companies, "size_kb": args.size_kb,
+                   "workers": args.workers}
+        server, base = report_stub.start(served, delay=args.delay)
+        urls = {name: base + f"{name}.pdf" for name in names}
+
+        fetch = downloader.Downloader(urls, os.path.join(tmp, 'reports'), args.workers)
+        run("cold", fetch, server, results)
+        run("revalidate_304", fetch, server, results)
+
+        # One company publishes a new version; only that one is downloaded and both versions are kept
+        with open(os.path.join(served, f"{names[0]}.pdf"), 'ab') as f:
+            f.write(b"\n% revised")
+        run("one_changed", fetch, server, results)
+        results["versions_kept"] = len([f for f in os.listdir(os.path.join(tmp, 'reports', names[0])) if f.endswith('.pdf')])
+
+        # Without validators every body is sent again, but the SHA-256 manifest keeps them from being stored twice
+        server.etags = False
+        run("no_validators", fetch, server, results)
+        server.etags = True
+
+        # Fresh folder, every first response cut halfway: each company resumes with a Range request
+        fetch = downloader.Downloader(urls, os.path.join(tmp, 'resumed'), args.workers)
+        server.cut_next = args.companies
+        run("cut_and_resume", fetch, server, results)
+        results["cut_and_resume"]["full_bytes"] = args.companies * (args.size_kb * 1024 + 9)
+
+        # The serial baseline the route used to be: one company after another
+        fetch = downloader.Downloader(urls, os.path.join(tmp, 'serial'), 1)
+        run("cold_serial", fetch, server, results)
+        server.shutdown()
+        print(json.dumps(results))
+
+if __name__ == '__main__':
+    main()
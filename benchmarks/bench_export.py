@@ -0,0 +1,45 @@
+# Full-table export: one jsonify of every tick (what an unpaged /history did) versus ?stream=ndjson,
+# comparing wall time and peak Python heap.
+# Run from the repo root:  python -m benchmarks.bench_export --months 6
+import argparse, json, sqlite3, tempfile, time, tracemalloc
+
+import app, db
+from flask import jsonify
+from benchmarks.synthetic import load_history, make_rng, stage_workdir
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"s": round(elapsed, 2), "peak_mb": round(peak / 2**20, 1), "bytes": size}
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of a buffered versus streamed full export")
+    parser.add_argument('--months', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stage_workdir(tmp)
+        app.init_db()
+        conn = sqlite3.connect('database.db')
+        rows = load_history(conn, args.months, make_rng())
+        conn.close()
+        client = app.app.test_client()
+
+        def buffered():
+            with app.app.test_request_context():
+                ticks = db.query('SELECT counter, last_price, change, volume, turnover, timestamp FROM stocks ORDER BY timestamp')
+                return len(jsonify(app.quote_dicts(ticks)).get_data())
+
+        def streamed():
+            response = client.get('/stocks?stream=ndjson')
+            return sum(len(chunk) for chunk in response.response)
+
+        print(json.dumps({"benchmark": "full_export", "rows": rows,
+                          "buffered": measure(buffered), "streamed": measure(streamed)}))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# Indicator engine: parity of the incremental and NumPy paths against a textbook reference, and what each costs.
+# Run from the repo root:  python -m benchmarks.bench_indicators --months 3
+import argparse, json, sqlite3, statistics, tempfile, time
+
+import app, archive, db, indicators
+from benchmarks.synthetic import load_history, make_rng, stage_workdir, iter_scrapes
+from tests.test_indicators import TOLERANCE, reference, worst_error
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return round(time.perf_counter() - started, 4), result
+
+def stored(conn, counter):
+    rows = conn.execute(f"SELECT {', '.join(indicators.INDICATORS)} FROM indicators WHERE counter = ? ORDER BY timestamp, id",
+                        (counter,)).fetchall()
+    return {name: list(column) for name, column in zip(indicators.INDICATORS, zip(*rows))}
+
+def main():
+    parser = argparse.ArgumentParser(description="Indicator parity and cost: reference vs incremental vs NumPy backfill")
+    parser.add_argument('--months', type=int, default=3)
+    parser.add_argument('--scrapes', type=int, default=50, help="live scrapes stepped through save_data afterwards")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stage_workdir(tmp)
+        app.init_db()
+        conn = sqlite3.connect('database.db')
+        rows = load_history(conn, args.months, make_rng())
+        conn.close()
+        results = {"benchmark": "indicators", "months": args.months, "rows": rows}
+
+        # One counter's series through all three implementations
+        with db.connection() as conn:
+            ids, timestamps, prices, volumes = indicators._history(conn, 'TNM')
+        series = (prices.tolist(), volumes.tolist(), timestamps.tolist())
+        results["ticks_per_counter"] = len(prices)
+        results["reference_s"], expected = timed(lambda: reference(*series))
+
+        def incremental():
+            state, out = indicators.new_state(), {name: [] for name in indicators.INDICATORS}
+            for price, volume, ts in zip(*series):
+                for name, value in indicators.step(state, price, volume, ts).items():
+                    out[name].append(value)
+            return out
+        results["incremental_s"], stepped = timed(incremental)
+        results["incremental_us_per_tick"] = round(results["incremental_s"] / len(prices) * 1e6, 2)
+        results["numpy_s"], (vectorized, _) = timed(lambda: indicators.compute(prices, volumes, timestamps))
+        results["incremental_vs_reference"] = worst_error(expected, stepped)
+        results["numpy_vs_reference"] = worst_error(expected, vectorized)
+
+        # Whole-database backfill (what `flask indicators` runs), then live scrapes through save_data
+        def backfill_all():
+            with db.connection() as conn:
+                names = indicators.counters(conn)
+            for counter in names:
+                with db.transaction() as conn:
+                    indicators.backfill(conn, counter)
+        results["backfill_all_s"], _ = timed(backfill_all)
+
+        rng, scrape_s = make_rng(7), []
+        for _, scrape in iter_scrapes(args.scrapes / (30 * 24 * 12), rng):
+            seconds, _ = timed(lambda: app.save_data(scrape))
+            scrape_s.append(seconds)
+        results["save_data_ms_p50"] = round(statistics.median(scrape_s) * 1000, 2)
+
+        # Stored values (backfill + incremental steps) against a fresh computation of the same history
+        with db.connection() as conn:
+            ids, timestamps, prices, volumes = indicators._history(conn, 'TNM')
+            results["stored_vs_numpy"] = worst_error(indicators.compute(prices, volumes, timestamps)[0], stored(conn, 'TNM'))
+            # ...and again once most of it has moved into the Parquet archive
+            archive.compact(keep_days=7)
+            with db.transaction() as tx:
+                indicators.backfill(tx, 'TNM')
+            results["archived_vs_numpy"] = worst_error(indicators.compute(prices, volumes, timestamps)[0], stored(conn, 'TNM'))
+
+        checks = [k for k in results if k.endswith(('_vs_reference', '_vs_numpy'))]
+        results["parity"] = all(results[k] <= TOLERANCE for k in checks)
+        print(json.dumps(results))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+# Ingest benchmark: save_data latency as the stocks table grows.
+# Run from the repo root:  python -m benchmarks.bench_ingest --months 1 3 6 12
+import argparse, json, sqlite3, statistics, tempfile, time
+from datetime import datetime, timedelta
+
+import app
+from benchmarks.synthetic import load_history, synthetic_scrape, starting_prices, make_rng, stage_workdir
+
+def main():
+    parser = argparse.ArgumentParser(description="Time save_data as the stocks table grows")
+    parser.add_argument('--months', type=int, nargs='+', default=[0, 1, 3, 6, 12],
+                        help="history sizes (in months of 5-minute scrapes) to measure at")
+    parser.add_argument('--scrapes', type=int, default=20, help="save_data calls timed at each size")
+    args = parser.parse_args()
+
+    rng = make_rng()
+    with tempfile.TemporaryDirectory() as tmp:
+        stage_workdir(tmp)
+        app.init_db()
+        conn = sqlite3.connect('database.db')
+        loaded = 0
+        # Each step loads only the extra months, ending before the previous chunk so rows stay ordered
+        end = datetime.utcnow() - timedelta(hours=2)
+        for months in sorted(args.months):
+            extra = months - loaded
+            if extra > 0:
+                load_history(conn, extra, rng, end=end - timedelta(days=30 * loaded))
+                loaded = months
+            rows = conn.execute('SELECT COUNT(*) FROM stocks').fetchone()[0]
+
+            prices = starting_prices(rng)
+            timings = []
+            for _ in range(args.scrapes):
+                scrape = synthetic_scrape(rng, prices)
+                started = time.perf_counter()
+                app.save_data(scrape)
+                timings.append((time.perf_counter() - started) * 1000)
+            print(json.dumps({
+                "benchmark": "save_data",
+                "history_months": months,
+                "table_rows": rows,
+                "scrapes": args.scrapes,
+                "p50_ms": round(statistics.median(timings), 3),
+                "max_ms": round(max(timings), 3)
+            }))
+        conn.close()
+
+if __name__ == '__main__':
+    main()
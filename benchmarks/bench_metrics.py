@@ -0,0 +1,50 @@
+# Bulk /metrics versus one /metrics/<counter> call per counter.
+# Run from the repo root:  python -m benchmarks.bench_metrics --rounds 200
+import argparse, json, sqlite3, statistics, tempfile, time
+
+import app
+from benchmarks.synthetic import COUNTERS, load_history, synthetic_scrape, starting_prices, make_rng, stage_workdir
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk /metrics versus sequential /metrics/<counter>")
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--months', type=int, default=1, help="history preloaded before the run")
+    args = parser.parse_args()
+
+    rng = make_rng()
+    with tempfile.TemporaryDirectory() as tmp:
+        stage_workdir(tmp)
+        app.init_db()
+        conn = sqlite3.connect('database.db')
+        load_history(conn, args.months, rng)
+        conn.close()
+        app.save_data(synthetic_scrape(rng, starting_prices(rng)))
+        client = app.app.test_client()
+
+        # Both paths must agree before their timings mean anything
+        bulk = {row["counter"]: row for row in client.get('/metrics').get_json()}
+        for counter in COUNTERS:
+            assert client.get(f'/metrics/{counter}').get_json() == bulk[counter], counter
+
+        sequential, batched = [], []
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            for counter in COUNTERS:
+                client.get(f'/metrics/{counter}')
+            sequential.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            client.get('/metrics')
+            batched.append((time.perf_counter() - started) * 1000)
+
+        p50_seq, p50_bulk = statistics.median(sequential), statistics.median(batched)
+        print(json.dumps({
+            "benchmark": "metrics_all_counters",
+            "counters": len(COUNTERS),
+            "rounds": args.rounds,
+            "sequential_p50_ms": round(p50_seq, 3),
+            "bulk_p50_ms": round(p50_bulk, 3),
+            "speedup": round(p50_seq / p50_bulk, 1)
+        }))
+
+if __name__ == '__main__':
+    main()
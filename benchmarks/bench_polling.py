@@ -0,0 +1,75 @@
+# Polling clients between scrapes: every client re-requests the read endpoints with the ETag it was last given,
+# with the response cache on and off (max_entries=0 recomputes every body but still answers 304s).
+# Run from the repo root:  python -m benchmarks.bench_polling --clients 8 --seconds 5
+import argparse, json, sqlite3, tempfile, threading, time
+
+import app
+from benchmarks.synthetic import COUNTERS, load_history, synthetic_scrape, starting_prices, make_rng, stage_workdir
+
+def poll(args, rng, prices):
+    stop = time.perf_counter() + args.seconds
+    counts = {"requests": 0, "not_modified": 0, "errors": 0, "scrapes": 0}
+    lock = threading.Lock()
+
+    def scraper():
+        while True:
+            time.sleep(args.scrape_every)
+            if time.perf_counter() >= stop:
+                return
+            app.save_data(synthetic_scrape(rng, prices))
+            with lock:
+                counts["scrapes"] += 1
+
+    def client(n):
+        http = app.app.test_client()
+        counter = COUNTERS[n % len(COUNTERS)]
+        urls = ['/latest_prices', '/stocks', f'/price_history/{counter}', f'/history/{counter}?interval=1d']
+        etags = {}
+        i = 0
+        while time.perf_counter() < stop:
+            url = urls[i % len(urls)]
+            i += 1
+            headers = {'If-None-Match': etags[url]} if url in etags else {}
+            response = http.get(url, headers=headers)
+            etags[url] = response.headers.get('ETag', etags.get(url))
+            with lock:
+                counts["requests"] += 1
+                counts["not_modified"] += response.status_code == 304
+                counts["errors"] += response.status_code not in (200, 304)
+
+    threads = [threading.Thread(target=scraper)] + [threading.Thread(target=client, args=(n,)) for n in range(args.clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return dict(counts, requests_per_second=round(counts["requests"] / args.seconds, 1))
+
+def main():
+    parser = argparse.ArgumentParser(description="Conditional polling throughput with and without the response cache")
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--months', type=int, default=1, help="history preloaded before the run")
+    parser.add_argument('--scrape-every', type=float, default=1.0, help="seconds between save_data calls")
+    args = parser.parse_args()
+
+    rng = make_rng()
+    with tempfile.TemporaryDirectory() as tmp:
+        stage_workdir(tmp)
+        app.init_db()
+        conn = sqlite3.connect('database.db')
+        load_history(conn, args.months, rng)
+        conn.close()
+        prices = starting_prices(rng)
+        app.save_data(synthetic_scrape(rng, prices))
+
+        results = {"benchmark": "conditional_polling", "clients": args.clients, "scrape_every_s": args.scrape_every}
+        max_entries = app.cache.max_entries
+        app.cache.max_entries = 0
+        app.cache.clear()
+        results["uncached"] = poll(args, rng, prices)
+        app.cache.max_entries = max_entries
+        results["cached"] = poll(args, rng, prices)
+        print(json.dumps(results))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# Batch report rendering: serial in-process renders versus reports.render_many across a process pool.
+# Run from the repo root:  python -m benchmarks.bench_reports --workers 1 2 4
+import argparse, json, os, tempfile, time, warnings
+
+import app, reports
+from routes.reports import _reportable
+from benchmarks.synthetic import synthetic_scrape, starting_prices, make_rng, stage_workdir
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial versus process-pool fundamentals report rendering")
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, 2, os.cpu_count() or 1}))
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', DeprecationWarning)
+
+    rng = make_rng()
+    with tempfile.TemporaryDirectory() as tmp:
+        stage_workdir(tmp)
+        app.init_db()
+        app.save_data(synthetic_scrape(rng, starting_prices(rng)))
+        jobs = [(counter, company, quote[0]) for counter, company, quote in _reportable()]
+
+        # Serial baseline with assets already warm, i.e. the best a single process can do
+        reports.assets._load()
+        started = time.perf_counter()
+        for counter, company, price in jobs:
+            reports.render_report(counter, company, price)
+        serial = time.perf_counter() - started
+        results = {"benchmark": "batch_reports", "reports": len(jobs), "cpus": os.cpu_count(),
+                   "serial_s": round(serial, 3)}
+
+        # Pool timings include worker start-up and asset warm-up, as a real batch request would
+        for workers in args.workers:
+            started = time.perf_counter()
+            size = sum(len(chunk) for chunk in reports.zip_stream(reports.render_many(jobs, workers)))
+            elapsed = time.perf_counter() - started
+            results[f"pool_{workers}_s"] = round(elapsed, 3)
+            results[f"pool_{workers}_speedup"] = round(serial / elapsed, 2)
+        results["zip_bytes"] = size
+        print(json.dumps(results))
+
+if __name__ == '__main__':
+    main()
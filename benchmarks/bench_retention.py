@@ -0,0 +1,67 @@
+# Retention tiers: database.db size, bytes reclaimed and /history latency before and after a retention run,
+# checking that /history and /price_history keep their row shape across the tiers.
+# Run from the repo root:  python -m benchmarks.bench_retention --months 18 --raw-days 30 --hourly-days 180
+import argparse, json, sqlite3, statistics, tempfile, time
+
+import app, candles, db, retention
+from benchmarks.synthetic import COUNTERS, load_history, make_rng, stage_workdir
+
+def p50(client, url, rounds):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        client.get(url).get_data()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 3)
+
+def main():
+    parser = argparse.ArgumentParser(description="Retention run over synthetic history")
+    parser.add_argument('--months', type=int, default=18)
+    parser.add_argument('--raw-days', type=int, default=30)
+    parser.add_argument('--hourly-days', type=int, default=180)
+    parser.add_argument('--archive', action='store_true', help="compact raw ticks into Parquet instead of deleting them")
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stage_workdir(tmp)
+        app.init_db()
+        conn = sqlite3.connect('database.db')
+        rows = load_history(conn, args.months, make_rng())
+        with conn:
+            # Bulk-loaded rows bypass save_data, so roll them up the way the candles migration does
+            candles.roll_up(conn, 0)
+        conn.close()
+        app.cache.max_entries = 0
+        client = app.app.test_client()
+        counter = COUNTERS[0]
+        urls = {"raw": f"/history/{counter}?stream=json", "1h": f'/history/{counter}?interval=1h&limit=50000',
+                "1d": f'/history/{counter}?interval=1d&limit=50000', "price_history": f'/price_history/{counter}?limit=1000'}
+        before = {name: client.get(url).get_json() for name, url in urls.items()}
+        results = {"benchmark": "retention", "months": args.months, "rows": rows, "archive": args.archive,
+                   "history_p50_ms_before": p50(client, f'/history/{counter}', args.rounds)}
+
+        report = retention.run(args.raw_days, args.hourly_days, args.archive)
+        after = {name: client.get(url).get_json() for name, url in urls.items()}
+
+        # Same keys on every row whichever tier served it; daily candles untouched;
+        # the raw tail (inside raw_days) identical, ticks before it replaced by hourly/daily closes
+        for name in urls:
+            assert after[name] and {tuple(sorted(row)) for row in after[name]} == {tuple(sorted(before[name][0]))}, name
+        assert after["1d"] == before["1d"]
+        with db.connection() as conn:
+            results["stocks_rows_after"] = conn.execute('SELECT COUNT(*) FROM stocks').fetchone()[0]
+            kept = conn.execute('SELECT COUNT(*) FROM stocks WHERE counter = ?', (counter,)).fetchone()[0]
+        assert after["raw"][-kept:] == before["raw"][-kept:]
+        assert after["price_history"] == before["price_history"]
+        dates = [row["date"] for row in after["raw"]]
+        assert dates == sorted(dates)
+        results.update({key: report[key] for key in ("ticks_archived", "ticks_deleted", "indicators_deleted",
+                                                     "hourly_candles_deleted", "candles_filled", "pages_freed",
+                                                     "bytes_before", "bytes_after", "bytes_reclaimed", "seconds")})
+        results["history_raw_points"] = [len(before["raw"]), len(after["raw"])]
+        results["history_p50_ms_after"] = p50(client, f'/history/{counter}', args.rounds)
+        print(json.dumps(results))
+
+if __name__ == '__main__':
+    main()
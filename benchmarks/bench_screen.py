@@ -0,0 +1,74 @@
+# One /screen request versus calling /metrics/<counter> for every counter and filtering client-side.
+# Run from the repo root:  python -m benchmarks.bench_screen --rounds 200
+import argparse, json, sqlite3, statistics, tempfile, time
+
+import app
+from fundamentals_store import store as fundamentals
+from benchmarks.synthetic import COUNTERS, load_history, synthetic_scrape, starting_prices, make_rng, stage_workdir
+
+def client_side(client, pe_below, yield_above):
+    # What callers did before: every counter's /metrics, then "P/E below X and yield above Y by P/B" by hand
+    picked = []
+    for counter in COUNTERS:
+        row = client.get(f'/metrics/{counter}').get_json()
+        if "error" in row or "N/A" in (row["pe_ratio"], row["pb_ratio"], row["div_yield"]):
+            continue
+        if float(row["pe_ratio"]) < pe_below and float(row["div_yield"].rstrip('%')) > yield_above:
+            picked.append((float(row["pb_ratio"]), row["counter"]))
+    return [counter for _, counter in sorted(picked)]
+
+def main():
+    parser = argparse.ArgumentParser(description="/screen versus per-counter /metrics filtering")
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--months', type=int, default=1, help="history preloaded before the run")
+    # Synthetic prices sit far above the real ones, so the defaults are set to match a handful of counters
+    parser.add_argument('--pe-below', type=float, default=150)
+    parser.add_argument('--yield-above', type=float, default=0.1)
+    args = parser.parse_args()
+
+    rng = make_rng()
+    with tempfile.TemporaryDirectory() as tmp:
+        stage_workdir(tmp)
+        app.init_db()
+        conn = sqlite3.connect('database.db')
+        load_history(conn, args.months, rng)
+        conn.close()
+        app.save_data(synthetic_scrape(rng, starting_prices(rng)))
+        client = app.app.test_client()
+        url = f'/screen?filter=pe<{args.pe_below},dy>{args.yield_above}&sort=pb'
+        by_hand = lambda: client_side(client, args.pe_below, args.yield_above)
+
+        # Both paths must pick the same counters in the same order (ratios compared at /metrics' 2 dp)
+        screened = [row["counter"] for row in client.get(url).get_json()]
+        assert screened == by_hand(), (screened, by_hand())
+
+        # A fundamentals edit must show up on the next screen without waiting for a scrape
+        counter = screened[0] if screened else COUNTERS[0]
+        before = fundamentals.raw().get(counter)
+        fundamentals.update({counter: {"dividend_paid": "0"}}, merge_fields=True)
+        fresh = client.get(url).get_json()
+        assert counter not in [row["counter"] for row in fresh] and by_hand() == [r["counter"] for r in fresh]
+        if before:
+            fundamentals.update({counter: before})
+
+        sequential, screen = [], []
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            by_hand()
+            sequential.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            client.get(url)
+            screen.append((time.perf_counter() - started) * 1000)
+
+        print(json.dumps({
+            "benchmark": "screen",
+            "counters": len(COUNTERS),
+            "matches": len(screened),
+            "rounds": args.rounds,
+            "client_side_p50_ms": round(statistics.median(sequential), 3),
+            "screen_p50_ms": round(statistics.median(screen), 3),
+            "screen_p99_ms": round(statistics.quantiles(screen, n=100)[98], 3),
+        }))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# Startup cost: seconds to import app, resident memory after the import and after the first request,
+# and which heavy modules came in with it. Each figure is taken in a fresh interpreter.
+# Run from the repo root:  python -m benchmarks.bench_startup
+# Against another commit:  git worktree add /tmp/before HEAD~1
+#                          python -m benchmarks.bench_startup --tree /tmp/before
+# With --gunicorn, also boots gunicorn (preloaded) and reports each worker's shared and private memory.
+import argparse, json, os, statistics, subprocess, sys, tempfile, time, urllib.request
+
+from benchmarks.synthetic import stage_workdir
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('fpdf', 'qrcode', 'PIL', 'fontTools', 'fitz', 'requests', 'lxml', 'apscheduler', 'pyarrow')
+
+# Runs in the child: the tree under test is first on sys.path, the working directory is a staged scratch dir
+PROBE = '''
+import json, sys, time
+def rss_mb():
+    with open('/proc/self/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('VmRSS')) / 1024
+started = time.perf_counter()
+import app
+imported = time.perf_counter() - started
+after_import = rss_mb()
+loaded = [name for name in %r if name in sys.modules]
+app.app.test_client().get('/latest_prices')
+print(json.dumps({"import_s": imported, "rss_import_mb": after_import, "rss_first_request_mb": rss_mb(), "loaded": loaded}))
+'''
+
+def probe(tree, workdir):
+    env = dict(os.environ, PYTHONPATH=tree, STOCKMATE_SCHEDULER='0')
+    out = subprocess.run([sys.executable, '-c', PROBE % (HEAVY,)], cwd=workdir, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def smaps_mb(pid):
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {"rss_mb": round(fields['Rss'] / 1024, 1),
+            "shared_mb": round((fields['Shared_Clean'] + fields['Shared_Dirty']) / 1024, 1),
+            "private_mb": round((fields['Private_Clean'] + fields['Private_Dirty']) / 1024, 1)}
+
+def gunicorn_workers(tree, workdir, workers, preload, port=5099):
+    env = dict(os.environ, PYTHONPATH=tree, STOCKMATE_SCHEDULER='0', STOCKMATE_PRELOAD='1' if preload else '0',
+               PORT=str(port), WEB_CONCURRENCY=str(workers))
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', os.path.join(tree, 'gunicorn.conf.py'), 'app:app'],
+                              cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        started = time.perf_counter()
+        while True:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/latest_prices', timeout=1).read()
+                break
+            except OSError:
+                if time.perf_counter() - started > 30:
+                    raise RuntimeError("gunicorn did not come up")
+                time.sleep(0.1)
+        ready = time.perf_counter() - started
+        # One request per worker, so each has served something before it is measured
+        for _ in range(workers * 4):
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/latest_prices', timeout=5).read()
+        with open(f'/proc/{server.pid}/task/{server.pid}/children') as f:
+            pids = [int(pid) for pid in f.read().split()]
+        stats = [smaps_mb(pid) for pid in pids]
+        return {"preload": preload, "ready_s": round(ready, 2), "workers": len(stats), "master": smaps_mb(server.pid),
+                **{key: round(statistics.fmean(s[key] for s in stats), 1) for key in ("rss_mb", "shared_mb", "private_mb")}}
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and memory of a fresh StockMate process")
+    parser.add_argument('--tree', default=ROOT, help="checkout to measure (default: this one)")
+    parser.add_argument('--repeats', type=int, default=7)
+    parser.add_argument('--gunicorn', type=int, default=0, metavar='WORKERS',
+                        help="also boot gunicorn with this many workers, preloaded and not")
+    args = parser.parse_args()
+    tree = os.path.abspath(args.tree)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stage_workdir(tmp)
+        subprocess.run([sys.executable, '-c', 'import app; app.init_db()'], cwd=tmp, check=True, capture_output=True,
+                       env=dict(os.environ, PYTHONPATH=tree))
+        runs = [probe(tree, tmp) for _ in range(args.repeats)]
+        results = {"benchmark": "startup", "tree": tree, "repeats": args.repeats,
+                   **{key: round(statistics.median(r[key] for r in runs), 3 if key == 'import_s' else 1)
+                      for key in ("import_s", "rss_import_mb", "rss_first_request_mb")},
+                   "heavy_loaded_at_import": runs[0]["loaded"]}
+        if args.gunicorn:
+            results["gunicorn"] = [gunicorn_workers(tree, tmp, args.gunicorn, preload) for preload in (False, True)]
+        print(json.dumps(results))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# /stream/prices fan-out: N idle SSE subscribers on a gevent gunicorn worker, then time how long a scrape takes
+# to reach all of them, and check that a reconnect with Last-Event-ID gets only what it missed.
+# Run from the repo root:  python -m benchmarks.bench_stream --subscribers 2000
+from gevent import monkey
+monkey.patch_all()
+
+import argparse, json, os, socket, subprocess, sys, tempfile, time
+import gevent
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def subscribe(port, last_event_id=None):
+    sock = socket.create_connection(('127.0.0.1', port))
+    headers = f"Last-Event-ID: {last_event_id}\r\n" if last_event_id is not None else ""
+    sock.sendall(f"GET /stream/prices HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n{headers}\r\n".encode())
+    return sock
+
+def read_events(sock, wanted, timeout):
+    """Read until `wanted` named events arrive; returns [(event, id, received_at)]."""
+    events, buffer = [], b''
+    deadline = time.perf_counter() + timeout
+    sock.settimeout(timeout)
+    while len(events) < wanted and time.perf_counter() < deadline:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        buffer += chunk
+        while b'\n\n' in buffer:
+            block, buffer = buffer.split(b'\n\n', 1)
+            fields = dict(line.split(': ', 1) for line in block.decode(errors='replace').splitlines() if ': ' in line)
+            if 'event' in fields:
+                events.append((fields['event'], fields.get('id'), time.perf_counter()))
+    return events
+
+def rss_kb(pid):
+    total = 0
+    for child in [pid] + [int(p) for p in subprocess.run(['pgrep', '-P', str(pid)], capture_output=True, text=True).stdout.split()]:
+        try:
+            with open(f'/proc/{child}/status') as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith('VmRSS'))
+        except (FileNotFoundError, StopIteration):
+            pass
+    return total
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else None
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE fan-out latency and memory on gevent workers")
+    parser.add_argument('--subscribers', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    import app
+    from benchmarks.synthetic import synthetic_scrape, starting_prices, make_rng, stage_workdir
+    rng = make_rng()
+    with tempfile.TemporaryDirectory() as tmp:
+        stage_workdir(tmp)
+        app.init_db()
+        prices = starting_prices(rng)
+        app.save_data(synthetic_scrape(rng, prices))
+
+        port = free_port()
+        env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(args.workers),
+                   STOCKMATE_DB=os.path.abspath('database.db'), PYTHONPATH=REPO)
+        server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', os.path.join(REPO, 'gunicorn.conf.py'),
+                                   'app:app'], env=env, cwd=tmp, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            for _ in range(100):
+                try:
+                    socket.create_connection(('127.0.0.1', port)).close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            idle_rss = rss_kb(server.pid)
+
+            started = time.perf_counter()
+            sockets = gevent.pool.Pool(200).map(lambda _: subscribe(port), range(args.subscribers))
+            snapshots = gevent.pool.Pool(500).map(lambda s: read_events(s, 1, 30), sockets)
+            connect_s = time.perf_counter() - started
+            first_id = snapshots[0][0][1]
+            loaded_rss = rss_kb(server.pid)
+
+            readers = [gevent.spawn(read_events, s, 1, 30) for s in sockets]
+            gevent.sleep(0.5)
+            published = time.perf_counter()
+            app.save_data(synthetic_scrape(rng, prices))
+            gevent.joinall(readers)
+            latencies = [(r.value[0][2] - published) * 1000 for r in readers if r.value]
+            diff_id = readers[0].value[0][1] if readers[0].value else None
+            for s in sockets:
+                s.close()
+
+            # Miss one scrape, then reconnect with the id we last saw
+            app.save_data(synthetic_scrape(rng, prices))
+            resume = read_events(subscribe(port, diff_id), 1, 10)
+
+            print(json.dumps({
+                "benchmark": "sse_fanout", "subscribers": args.subscribers, "workers": args.workers,
+                "connect_and_snapshot_s": round(connect_s, 3),
+                "received": len(latencies),
+                "fanout_p50_ms": round(percentile(latencies, 0.5), 1),
+                "fanout_p99_ms": round(percentile(latencies, 0.99), 1),
+                "rss_idle_mb": round(idle_rss / 1024, 1),
+                "rss_with_subscribers_mb": round(loaded_rss / 1024, 1),
+                "ids": [first_id, diff_id],
+                "resume_first_event": resume[0][:2] if resume else None,
+            }))
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == '__main__':
+    main()
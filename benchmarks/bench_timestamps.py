@@ -0,0 +1,55 @@
+# Timestamp localization: the old per-row strptime + pytz conversion versus localtime's epoch paths.
+# Run from the repo root:  python -m benchmarks.bench_timestamps --rows 20000
+import argparse, json, time
+from datetime import datetime
+
+import pytz
+import app, localtime
+
+def legacy_convert(utc_time_str):
+    # convert_to_local_time as it was before timestamps became epoch integers
+    try:
+        utc = pytz.utc
+        local = pytz.timezone('Africa/Blantyre')
+        utc_dt = datetime.strptime(utc_time_str, '%Y-%m-%d %H:%M:%S')
+        return utc.localize(utc_dt).astimezone(local).strftime('%Y-%m-%d %H:%M:%S')
+    except:
+        return utc_time_str
+
+def best_of(repeats, fn):
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-row versus bulk timestamp formatting")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    start = localtime.now() - args.rows * 300
+    epochs = [start + i * 300 for i in range(args.rows)]
+    texts = [time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(e)) for e in epochs]
+    rows = [("TNM", 20.5, 0.1, 1000, 20500.0, e) for e in epochs]
+
+    legacy_s, legacy = best_of(args.repeats, lambda: [legacy_convert(t) for t in texts])
+    scalar_s, scalar = best_of(args.repeats, lambda: [localtime.format_local(e) for e in epochs])
+    bulk_s, bulk = best_of(args.repeats, lambda: localtime.format_many(epochs))
+    assert legacy == scalar == bulk, "formatting paths disagree"
+    rows_s, _ = best_of(args.repeats, lambda: app.quote_dicts(rows))
+
+    print(json.dumps({
+        "benchmark": "timestamp_localization", "rows": args.rows,
+        "legacy_ms": round(legacy_s * 1000, 2),
+        "format_local_ms": round(scalar_s * 1000, 2),
+        "format_many_ms": round(bulk_s * 1000, 2),
+        "speedup_bulk": round(legacy_s / bulk_s, 1),
+        "quote_dicts_ms": round(rows_s * 1000, 2),
+    }))
+
+if __name__ == '__main__':
+    main()
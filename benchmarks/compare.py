@@ -0,0 +1,59 @@
+# Compare two benchmarks.run results: per-scenario change in p50/p99 latency and throughput.
+# Run from the repo root:  python -m benchmarks.compare before.json after.json --threshold 0.20
+# p99 is judged against its own, looser threshold: a few hundred operations only give it a handful of samples.
+# Two runs of the same commit on a shared machine differ by 10-15%, hence the 20% default; tighten it on a quiet box.
+# Exits 1 when any scenario got slower than the threshold allows, so it can gate a CI job.
+import argparse, json, sys
+
+def change(before, after):
+    return round((after - before) / before, 4) if before else None
+
+def compare(before, after, threshold, p99_threshold):
+    rows, regressions = {}, []
+    for name in before["scenarios"]:
+        if name not in after["scenarios"]:
+            continue
+        a, b = before["scenarios"][name], after["scenarios"][name]
+        row = {
+            "p50_change": change(a["p50_ms"], b["p50_ms"]),
+            "p99_change": change(a["p99_ms"], b["p99_ms"]),
+            "throughput_change": change(a["throughput_ops_s"], b["throughput_ops_s"]),
+            "errors": [a["errors"], b["errors"]],
+        }
+        slower = [key for key, limit in (("p50_change", threshold), ("p99_change", p99_threshold))
+                  if row[key] is not None and row[key] > limit]
+        if row["throughput_change"] is not None and row["throughput_change"] < -threshold:
+            slower.append("throughput_change")
+        if b["errors"] > a["errors"]:
+            slower.append("errors")
+        if slower:
+            regressions.append({"scenario": name, "metrics": slower})
+        rows[name] = row
+    return {"before": before.get("commit"), "after": after.get("commit"), "threshold": threshold, "p99_threshold": p99_threshold,
+            "scenarios": rows, "regressions": regressions}
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff two benchmark suite results")
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.20, help="relative p50/throughput slowdown tolerated (0.20 = 20%%)")
+    parser.add_argument('--p99-threshold', type=float, default=0.50, help="relative p99 slowdown tolerated")
+    args = parser.parse_args()
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    if before.get("params") != after.get("params"):
+        print(f"warning: runs used different parameters: {before.get('params')} vs {after.get('params')}", file=sys.stderr)
+
+    report = compare(before, after, args.threshold, args.p99_threshold)
+    shown = lambda value: 'n/a' if value is None else f'{value:+.1%}'
+    for name, row in report["scenarios"].items():
+        flag = ' REGRESSION' if any(r["scenario"] == name for r in report["regressions"]) else ''
+        print(f"{name:<20} p50 {shown(row['p50_change'])}  p99 {shown(row['p99_change'])}  "
+              f"throughput {shown(row['throughput_change'])}{flag}", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report["regressions"] else 0)
+
+if __name__ == '__main__':
+    main()
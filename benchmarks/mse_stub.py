@@ -0,0 +1,87 @@
+# Local stand-in for mse.co.mw: serves a saved copy of the home page with ETag/Last-Modified support,
+# or replays a folder of recorded pages in order (see synthetic.record_pages).
+# Run from the repo root:  python -m benchmarks.mse_stub --port 8765 [--html folder/ --advance 60]
+# then point the app at it:  MSE_URL=http://127.0.0.1:8765/ python app.py
+import argparse, glob, hashlib, os, threading, time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'mse_home.html')
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Set on the server: pages (list of bytes), advance (float), last_modified (str), fail_next (int), delay (float)
+    def do_GET(self):
+        server = self.server
+        server.hits += 1
+        if server.fail_next > 0:
+            server.fail_next -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        if server.delay:
+            threading.Event().wait(server.delay)
+        page = server.current_page()
+        etag = '"' + hashlib.sha256(page).hexdigest()[:16] + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(page)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', server.last_modified)
+        self.end_headers()
+        self.wfile.write(page)
+
+    def log_message(self, format, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    def current_page(self):
+        """The page to serve now. With several pages: the next one on every request when advance
+        is 0, otherwise the next one every advance seconds; wraps around after the last."""
+        with self.lock:
+            if self.advance:
+                index = int((time.monotonic() - self.started) / self.advance)
+            else:
+                index, self.served = self.served, self.served + 1
+            return self.pages[index % len(self.pages)]
+
+def start(html_path=FIXTURE, port=0, fail_next=0, delay=0, advance=0):
+    """Serve html_path (a page, or a folder of *.html replayed in name order) on 127.0.0.1 from a
+    background thread. Returns (server, url); call server.shutdown() when done."""
+    server = StubServer(('127.0.0.1', port), StubHandler)
+    server.lock = threading.Lock()
+    paths = sorted(glob.glob(os.path.join(html_path, '*.html'))) if os.path.isdir(html_path) else [html_path]
+    pages = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+    server.pages, server.served, server.advance, server.started = pages, 0, advance, time.monotonic()
+    server.last_modified = formatdate(max(os.path.getmtime(path) for path in paths), usegmt=True)
+    server.fail_next = fail_next
+    server.delay = delay
+    server.hits = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a saved mse.co.mw page locally")
+    parser.add_argument('--html', default=FIXTURE, help="a saved page, or a folder of pages to replay in order")
+    parser.add_argument('--advance', type=float, default=0,
+                        help="with a folder: seconds each page is served for (0 = next page on every request)")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fail', type=int, default=0, help="answer the first N requests with 503")
+    parser.add_argument('--delay', type=float, default=0, help="seconds to stall before each response")
+    args = parser.parse_args()
+    server, url = start(args.html, args.port, args.fail, args.delay, args.advance)
+    print(f"MSE stub serving {len(server.pages)} page(s) from {args.html} at {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# Local stand-in for the MSE company pages: serves files from a folder with ETag, Last-Modified and Range support.
+# Run from the repo root:  python -m benchmarks.report_stub --folder some/dir --port 8766
+import argparse, hashlib, os, re, threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class ReportHandler(BaseHTTPRequestHandler):
+    # Set on the server: folder (str), etags (bool), cut_next (int), delay (float)
+    def do_GET(self):
+        server = self.server
+        server.hits += 1
+        path = os.path.join(server.folder, os.path.basename(self.path.rstrip('/')))
+        if not os.path.isfile(path):
+            self.send_response(404)
+            self.end_headers()
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        if server.delay:
+            threading.Event().wait(server.delay)
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"' if server.etags else None
+        last_modified = formatdate(os.path.getmtime(path), usegmt=True) if server.etags else None
+
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        start, status = 0, 200
+        match = re.fullmatch(r'bytes=(\d+)-', self.headers.get('Range', ''))
+        if match and etag and self.headers.get('If-Range') in (etag, last_modified):
+            start, status = int(match.group(1)), 206
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(body)}')
+                self.end_headers()
+                return
+        server.bytes_sent += len(body) - start
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(len(body) - start))
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{len(body) - 1}/{len(body)}')
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        if server.cut_next > 0:
+            # Drop the connection halfway through to exercise resume
+            server.cut_next -= 1
+            self.wfile.write(body[start:start + (len(body) - start) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body[start:])
+
+    def log_message(self, format, *args):
+        pass
+
+def start(folder, port=0, etags=True, cut_next=0, delay=0):
+    """Serve every file in folder at /<name> from a background thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), ReportHandler)
+    server.folder = folder
+    server.etags = etags
+    server.cut_next = cut_next
+    server.delay = delay
+    server.hits = 0
+    server.bytes_sent = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve report files locally")
+    parser.add_argument('--folder', required=True)
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--no-etags', action='store_true', help="send no validators, so only the hash check can dedupe")
+    parser.add_argument('--cut', type=int, default=0, help="drop the first N responses halfway through")
+    args = parser.parse_args()
+    server, url = start(args.folder, args.port, not args.no_etags, args.cut)
+    print(f"Report stub serving {args.folder} at {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
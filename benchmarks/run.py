@@ -0,0 +1,188 @@
+# Benchmark suite: load scenarios over app.py's hot paths on synthetic data, written out as one JSON document
+# so two commits can be compared with benchmarks.compare.
+# Run from the repo root:  python -m benchmarks.run --out before.json
+#                          (change something)  python -m benchmarks.run --out after.json
+#                          python -m benchmarks.compare before.json after.json
+import argparse, json, os, platform, sqlite3, statistics, subprocess, sys, tempfile, threading, time, warnings
+
+import app, reports, scraper
+from fundamentals_store import store as fundamentals
+from benchmarks import mse_stub
+from benchmarks.synthetic import (derive_history, load_history, make_counters, make_rng, record_pages, stage_workdir,
+                                  starting_prices, synthetic_scrape)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ========== SCENARIOS ==========
+# Each scenario is (setup, op, concurrency): setup(ctx) runs once untimed, op(ctx, client, i) is one
+# timed operation returning an HTTP status (or None for direct calls). Writers run one at a time,
+# as the scheduler does; concurrency None means the suite's --concurrency.
+def _get(client, url):
+    # The body is read in full, so a streamed response is timed to its last byte
+    response = client.get(url)
+    response.get_data()
+    return response.status_code
+
+def _priced(ctx):
+    # Counters that have both ticks and usable fundamentals, so /metrics and reports answer 200
+    companies = fundamentals.companies()
+    ctx["priced"] = [c for c in ctx["counters"] if c in companies and not companies[c].error]
+
+def _report_setup(ctx):
+    _priced(ctx)
+    reports.assets._load()
+
+def _report(ctx, client, i):
+    if not ctx["cached"]:
+        reports.cache._reports.clear()
+    return _get(client, f'/fundamentals_report/{ctx["priced"][i % len(ctx["priced"])]}')
+
+def _save_data_setup(ctx):
+    ctx["prices"] = starting_prices(make_rng(11), ctx["counters"])
+    ctx["rng"] = make_rng(12)
+
+def _scrape_setup(ctx):
+    # The stub replays one recorded page per request, enough for every repeat, so every scrape finds new figures
+    count = (ctx["ops"] + ctx["warmup"]) * ctx["repeats"]
+    folder = record_pages(os.path.join(ctx["workdir"], 'pages'), count, make_rng(13), ctx["counters"])
+    server, url = mse_stub.start(folder)
+    ctx["stub"] = server
+    scraper.mse.url = url
+    scraper.mse.etag = scraper.mse.last_modified = scraper.mse.content_hash = None
+
+def _scrape(ctx, client, i):
+    data = app.scrape_mse()
+    if not data:
+        return 500
+    app.save_data(data)
+
+SCENARIOS = {
+    'latest_prices': (None, lambda ctx, client, i: _get(client, '/latest_prices'), None),
+    'history': (None, lambda ctx, client, i: _get(client, f'/history/{ctx["counters"][i % len(ctx["counters"])]}'), None),
+    'history_1d': (None, lambda ctx, client, i: _get(client, f'/history/{ctx["counters"][i % len(ctx["counters"])]}?interval=1d'), None),
+    'metrics': (_priced, lambda ctx, client, i: _get(client, f'/metrics/{ctx["priced"][i % len(ctx["priced"])]}'), None),
+    'fundamentals_report': (_report_setup, _report, None),
+    'save_data': (_save_data_setup, lambda ctx, client, i: app.save_data(synthetic_scrape(ctx["rng"], ctx["prices"])), 1),
+    'scrape': (_scrape_setup, _scrape, 1),
+}
+# Operations per scenario relative to --requests; PDF renders are slow enough that fewer tell the same story
+WEIGHTS = {'fundamentals_report': 0.1}
+
+def summarize(latencies, errors, wall):
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        "ops": len(latencies),
+        "errors": errors,
+        "p50_ms": round(quantiles[49] * 1000, 3),
+        "p90_ms": round(quantiles[89] * 1000, 3),
+        "p99_ms": round(quantiles[98] * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        "throughput_ops_s": round(len(latencies) / wall, 1),
+    }
+
+def run_scenario(name, ctx, concurrency):
+    setup, op, fixed = SCENARIOS[name]
+    if setup:
+        setup(ctx)
+    # Every figure is the median over --repeats runs, which keeps one noisy run from reading as a regression
+    runs = [_run_once(name, ctx, op, fixed or concurrency) for _ in range(ctx["repeats"])]
+    if "stub" in ctx:
+        ctx.pop("stub").shutdown()
+    result = {key: statistics.median(r[key] for r in runs) for key in runs[0]}
+    return dict(result, errors=sum(r["errors"] for r in runs), repeats=len(runs), concurrency=fixed or concurrency)
+
+def _run_once(name, ctx, op, threads):
+    ops = max(threads, int(ctx["ops"] * WEIGHTS.get(name, 1)))
+    warmup = ctx["warmup"]
+    latencies, errors, lock = [], 0, threading.Lock()
+    counter = iter(range(warmup + ops))
+
+    def worker():
+        nonlocal errors
+        client = app.app.test_client()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            started = time.perf_counter()
+            status = op(ctx, client, i)
+            elapsed = time.perf_counter() - started
+            if i >= warmup:
+                with lock:
+                    latencies.append(elapsed)
+                    errors += status is not None and status >= 400
+
+    # Warm-up runs on one thread, so caches and prepared statements are in place before the clock starts
+    for _ in range(warmup):
+        with lock:
+            i = next(counter)
+        op(ctx, app.app.test_client(), i)
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+# ========== ENVIRONMENT ==========
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment():
+    status = _git('status', '--porcelain', '--untracked-files=no')
+    return {"commit": _git('rev-parse', '--short', 'HEAD'), "dirty": bool(status) if status is not None else None,
+            "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(), "cpus": os.cpu_count()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Load scenarios over the StockMate hot paths, as JSON")
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--counters', type=int, default=16, help="counters on the synthetic exchange")
+    parser.add_argument('--months', type=float, default=1, help="months of 5-minute ticks preloaded per counter")
+    parser.add_argument('--requests', type=int, default=200, help="timed operations per scenario")
+    parser.add_argument('--warmup', type=int, default=5, help="untimed operations first")
+    parser.add_argument('--repeats', type=int, default=3, help="runs per scenario; figures are their medians")
+    parser.add_argument('--concurrency', type=int, default=4, help="client threads for read scenarios")
+    parser.add_argument('--cached', action='store_true',
+                        help="keep the response and report caches on, as in production (default: measure the work)")
+    parser.add_argument('--out', default=None, help="also write the JSON here")
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', DeprecationWarning)
+
+    results = {"suite": "stockmate", **environment(), "started_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+               "params": {k: getattr(args, k) for k in ('counters', 'months', 'requests', 'warmup', 'repeats', 'concurrency', 'cached')},
+               "scenarios": {}}
+    out = os.path.abspath(args.out) if args.out else None
+    counters = make_counters(args.counters)
+    with tempfile.TemporaryDirectory() as tmp:
+        stage_workdir(tmp)
+        app.init_db()
+        conn = sqlite3.connect('database.db')
+        results["rows"] = load_history(conn, args.months, make_rng(), counters=counters)
+        # The preload bypasses save_data, so derive candles, indicators and valuations from it as save_data would have
+        derive_history(conn)
+        conn.close()
+        app.save_data(synthetic_scrape(make_rng(10), starting_prices(make_rng(10), counters)))
+        if not args.cached:
+            app.cache.max_entries = 0
+        ctx = {"counters": counters, "ops": args.requests, "warmup": args.warmup, "repeats": args.repeats,
+               "cached": args.cached, "workdir": tmp}
+        for name in args.scenarios:
+            results["scenarios"][name] = run_scenario(name, ctx, args.concurrency)
+            print(f"{name:<20} {json.dumps(results['scenarios'][name])}", file=sys.stderr)
+
+    text = json.dumps(results, indent=2)
+    if out:
+        with open(out, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+
+if __name__ == '__main__':
+    main()
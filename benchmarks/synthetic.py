@@ -0,0 +1,106 @@
+# Synthetic MSE data for the benchmarks
+import html, os, random, shutil
+from datetime import datetime, timedelta
+
+import candles, indicators, screener
+from ingest import parse_number, parse_int
+from localtime import to_epoch
+
+COUNTERS = [
+    "AIRTEL", "BHL", "FDHB", "FMBCH", "ICON", "ILLOVO", "MPICO", "NBM",
+    "NBS", "NICO", "NITL", "OMU", "PCL", "STANDARD", "SUNBIRD", "TNM"
+]
+TICK_MINUTES = 5
+
+def make_counters(n):
+    """n counter names: the real MSE ones first, then SYN017, SYN018, ... for bigger exchanges."""
+    return COUNTERS[:n] + [f"SYN{i + 1:03d}" for i in range(len(COUNTERS), n)]
+
+def starting_prices(rng, counters=COUNTERS):
+    return {counter: round(rng.uniform(5, 3000), 2) for counter in counters}
+
+def synthetic_scrape(rng, prices):
+    """One scrape in the shape scrape_mse() returns: comma-formatted strings, random-walk prices."""
+    rows = []
+    for counter in prices:
+        old = prices[counter]
+        new = max(0.01, round(old * (1 + rng.gauss(0, 0.004)), 2))
+        prices[counter] = new
+        volume = rng.randint(0, 50000)
+        rows.append({
+            'Counter': counter,
+            'Last Price (MK)': f"{new:,.2f}",
+            '% Change': f"{(new - old) / old * 100:+.2f}%",
+            'Volume': f"{volume:,}",
+            'Turnover (MK)': f"{new * volume:,.2f}"
+        })
+    return rows
+
+def iter_scrapes(months, rng, end=None, counters=COUNTERS):
+    """Yield (timestamp, scrape) pairs for `months` of 5-minute scrapes ending at `end` (UTC)."""
+    end = end or datetime.utcnow() - timedelta(hours=2)
+    ticks = int(months * 30 * 24 * 60 / TICK_MINUTES)
+    start = end - timedelta(minutes=TICK_MINUTES * ticks)
+    prices = starting_prices(rng, counters)
+    for i in range(ticks):
+        yield start + timedelta(minutes=TICK_MINUTES * i), synthetic_scrape(rng, prices)
+
+def load_history(conn, months, rng, end=None, counters=COUNTERS):
+    """Bulk-load typed history straight into stocks, bypassing save_data. Returns rows written."""
+    def rows():
+        for ts, scrape in iter_scrapes(months, rng, end, counters):
+            stamp = to_epoch(ts)
+            for item in scrape:
+                yield (item['Counter'], parse_number(item['Last Price (MK)']), parse_number(item['% Change']),
+                       parse_int(item['Volume']), parse_number(item['Turnover (MK)']), stamp)
+    with conn:
+        cur = conn.executemany('''
+            INSERT INTO stocks (counter, last_price, change, volume, turnover, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows())
+    return cur.rowcount
+
+def derive_history(conn):
+    """Build what save_data derives from ticks for bulk-loaded history: latest_quotes, candles, indicators, valuations."""
+    with conn:
+        # Bare columns next to MAX() come from the row holding the maximum
+        conn.execute('''
+            INSERT OR REPLACE INTO latest_quotes (counter, last_price, change, volume, turnover, timestamp)
+            SELECT counter, last_price, change, volume, turnover, MAX(timestamp) FROM stocks GROUP BY counter
+        ''')
+        candles.roll_up(conn, 0)
+        for counter in indicators.counters(conn):
+            indicators.backfill(conn, counter)
+        screener.rebuild(conn)
+
+def render_page(scrape):
+    """A scrape as an mse.co.mw-shaped page (market summary as the first <table>), for the MSE stub to replay."""
+    cells = ''.join(
+        '<tr>' + ''.join(f'<td>{html.escape(row[column])}</td>' for column in
+                         ('Counter', 'Last Price (MK)', '% Change', 'Volume', 'Turnover (MK)')) + '</tr>\n'
+        for row in scrape)
+    return ('<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Malawi Stock Exchange</title></head><body>\n'
+            '<table class="table"><thead><tr><th>Counter</th><th>Last Price (MK)</th><th>% Change</th>'
+            f'<th>Volume</th><th>Turnover (MK)</th></tr></thead><tbody>\n{cells}</tbody></table>\n'
+            '<table><tr><td>Indices</td></tr></table></body></html>\n')
+
+def record_pages(folder, count, rng, counters=COUNTERS):
+    """Write count consecutive scrapes as page-0000.html, page-0001.html, ... for mse_stub to replay in order."""
+    os.makedirs(folder, exist_ok=True)
+    prices = starting_prices(rng, counters)
+    for i in range(count):
+        with open(os.path.join(folder, f'page-{i:04d}.html'), 'w') as f:
+            f.write(render_page(synthetic_scrape(rng, prices)))
+    return folder
+
+def make_rng(seed=47):
+    return random.Random(seed)
+
+def stage_workdir(path):
+    """Copy the files app.py opens by relative path into `path` so benchmarks can run in a scratch dir."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for name in ('fundamentals.json', 'StockMate-logo.png'):
+        shutil.copy(os.path.join(root, name), path)
+    for name in ('fonts', 'company_logos'):
+        shutil.copytree(os.path.join(root, name), os.path.join(path, name))
+    os.chdir(path)
@@ -0,0 +1,78 @@
+# StockMate candles: hourly/daily/weekly OHLC rollups of the stocks ticks, kept current by save_data
+
+# Bucket start (UTC text) for an epoch-seconds value; {ts} is a column or a ? placeholder.
+# Weeks start on Monday.
+INTERVALS = {
+    '1h': "strftime('%Y-%m-%d %H:00:00', {ts}, 'unixepoch')",
+    '1d': "date({ts}, 'unixepoch')",
+    '1w': "date({ts}, 'unixepoch', '-6 days', 'weekday 1')",
+}
+
+def create_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS candles (
+            counter TEXT NOT NULL,
+            interval TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume INTEGER,
+            turnover REAL,
+            ticks INTEGER,
+            PRIMARY KEY (counter, interval, bucket)
+        ) WITHOUT ROWID
+    ''')
+
+def roll_up(conn, after_id):
+    """Fold every stocks row with id > after_id into its candles, in time order.
+
+    Called by save_data inside the ingest transaction, so a bucket only ever
+    grows by the handful of rows that scrape inserted.
+    """
+    for interval, bucket in INTERVALS.items():
+        conn.execute(f'''
+            INSERT INTO candles (counter, interval, bucket, open, high, low, close, volume, turnover, ticks)
+            SELECT counter, ?, {bucket.format(ts='timestamp')}, last_price, last_price, last_price, last_price,
+                   COALESCE(volume, 0), COALESCE(turnover, 0), 1
+            FROM stocks
+            WHERE id > ? AND last_price IS NOT NULL
+            ORDER BY +timestamp, id  -- '+' keeps the planner on the rowid range instead of the timestamp index
+            ON CONFLICT (counter, interval, bucket) DO UPDATE SET
+                high = MAX(high, excluded.high),
+                low = MIN(low, excluded.low),
+                close = excluded.close,
+                volume = volume + excluded.volume,
+                turnover = turnover + excluded.turnover,
+                ticks = ticks + 1
+        ''', (interval, after_id))
+
+def query_sql(counter, interval, start=None, end=None, after=None):
+    """(sql, params) for one counter's candles, oldest first. start/end are epoch seconds; end is exclusive.
+
+    after is a bucket from a previous page: only later buckets are returned.
+    """
+    bucket = INTERVALS[interval]
+    sql = '''
+        SELECT bucket, open, high, low, close, volume, turnover
+        FROM candles
+        WHERE counter = ? AND interval = ?
+    '''
+    params = [counter, interval]
+    if start:
+        # Include the bucket that start falls inside
+        sql += f' AND bucket >= {bucket.format(ts="?")}'
+        params.append(start)
+    if end:
+        sql += " AND datetime(bucket) < datetime(?, 'unixepoch')"
+        params.append(end)
+    if after:
+        sql += ' AND bucket > ?'
+        params.append(after)
+    return sql + ' ORDER BY bucket', params
+
+def query(conn, counter, interval, start=None, end=None):
+    """Candles for one counter, oldest first. start/end are epoch seconds; end is exclusive."""
+    sql, params = query_sql(counter, interval, start, end)
+    return conn.execute(sql, params).fetchall()
@@ -0,0 +1,20 @@
+# StockMate listed companies: each counter's MSE company page, shared by the report QR codes and the downloader
+
+COMPANY_URLS = {
+    "AIRTEL": "https://mse.co.mw/company/MWAIRT001156",
+    "BHL": "https://mse.co.mw/company/MWBHL001164",
+    "FDH": "https://mse.co.mw/company/MWFDHB001178",
+    "FMBCH": "https://mse.co.mw/company/MWFMBCH00009",
+    "ICON": "https://mse.co.mw/company/MWICON001188",
+    "ILLOVO": "https://mse.co.mw/company/MWILLV001116",
+    "MPICO": "https://mse.co.mw/company/MWMPICO010010",
+    "NBS": "https://mse.co.mw/company/MWNBS001174",
+    "NBM": "https://mse.co.mw/company/MWNBM001113",
+    "NICO": "https://mse.co.mw/company/MWNICO010014",
+    "NITL": "https://mse.co.mw/company/MWNITL001117",
+    "OMU": "https://mse.co.mw/company/MWOMU001121",
+    "PCL": "https://mse.co.mw/company/MWPCL001111",
+    "STANDARD": "https://mse.co.mw/company/MWSB0001112",
+    "SUNBIRD": "https://mse.co.mw/company/MWSUN001119",
+    "TNM": "https://mse.co.mw/company/MWTNM001151"
+}
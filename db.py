@@ -0,0 +1,146 @@
+# StockMate data access: pooled SQLite connections shared by the Flask workers and the scheduler
+
+import os, queue, sqlite3, time
+from contextlib import contextmanager
+import instrumentation
+
+DB_PATH = os.environ.get('STOCKMATE_DB', 'database.db')
+BUSY_TIMEOUT = 10           # seconds a statement waits on a lock before "database is locked"
+POOL_SIZE = 8               # idle connections kept per process
+STATEMENT_CACHE_SIZE = 256  # prepared statements cached per connection
+
+# ========== TIMING ==========
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement's time (execute plus any fetches) to instrumentation.sql_seconds.
+
+    The time is recorded once the statement is finished with: on the next execute,
+    or when the cursor is dropped. Rows read by iterating the cursor aren't counted.
+    """
+    _label = None
+    _elapsed = 0.0
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._elapsed += time.perf_counter() - started
+
+    def _record(self):
+        if self._label is not None:
+            instrumentation.sql_seconds.observe(self._elapsed, self._label)
+            self._label, self._elapsed = None, 0.0
+
+    def execute(self, sql, params=()):
+        self._record()
+        self._label = instrumentation.statement_label(sql)
+        return self._timed(super().execute, sql, params)
+
+    def executemany(self, sql, params):
+        self._record()
+        self._label = instrumentation.statement_label(sql)
+        return self._timed(super().executemany, sql, params)
+
+    def fetchone(self):
+        return self._timed(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed(super().fetchmany, size or self.arraysize)
+
+    def fetchall(self):
+        return self._timed(super().fetchall)
+
+    def __del__(self):
+        try:
+            self._record()
+        except Exception:
+            pass  # interpreter shutdown
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, params):
+        return self.cursor().executemany(sql, params)
+
+# ========== CONNECTIONS ==========
+def _open():
+    # isolation_level=None: reads run in autocommit, writers open transactions explicitly
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT, isolation_level=None,
+                           cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False,
+                           factory=TimedConnection)
+    # Only takes effect on a new, empty file; retention.vacuum() converts older ones
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    # WAL lets readers keep going while the scrape writes; NORMAL is durable enough under WAL
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    return conn
+
+class ConnectionPool:
+    """Keeps open connections around so each request reuses one (and its prepared statements).
+
+    A connection is only ever used by one thread at a time. After a fork (gunicorn
+    workers) the inherited connections are dropped and the child opens its own.
+    """
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def acquire(self):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = queue.LifoQueue(maxsize=self.size)
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return _open()
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+pool = ConnectionPool()
+
+@contextmanager
+def connection():
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+@contextmanager
+def transaction():
+    """Write transaction. BEGIN IMMEDIATE takes the write lock up front so writers queue on the busy timeout."""
+    with connection() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+
+# ========== QUERIES ==========
+def query(sql, params=()):
+    with connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+def query_one(sql, params=()):
+    with connection() as conn:
+        return conn.execute(sql, params).fetchone()
@@ -0,0 +1,192 @@
+# StockMate report downloader: streamed, resumable, deduplicated company report downloads into reports/<company>/
+
+import hashlib, json, os, tempfile, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import requests
+from requests.adapters import HTTPAdapter
+from companies import COMPANY_URLS
+
+REPORTS_DIR = 'reports'
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+TIMEOUT = (5, 60)        # (connect, read) seconds
+RETRIES = 3              # extra attempts, each resuming from what is already on disk
+BACKOFF = 1.0            # seconds; doubles after every failed attempt
+CHUNK_SIZE = 64 * 1024
+WORKERS = 4              # companies downloaded at once
+MIN_SIZE = 1000          # anything smaller is an error page, not a report
+
+MANIFEST = '.manifest.json'   # per company: url, etag, last_modified, sha256, file, size
+PARTIAL = '.partial'          # bytes of an unfinished download
+PARTIAL_META = '.partial.json'
+
+class DownloadError(Exception):
+    pass
+
+def _sha256_of(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def _write_json(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+def version_name(url, when=None):
+    """'<base>-<YYYYmmddTHHMMSS-ffffff>.pdf', so sorted() puts the newest version of a report last."""
+    base = url.rstrip('/').split('/')[-1] or 'report'
+    if base.lower().endswith('.pdf'):
+        base = base[:-4]
+    return f"{base}-{(when or datetime.now(timezone.utc)).strftime('%Y%m%dT%H%M%S-%f')}.pdf"
+
+# ========== DOWNLOAD ==========
+class Downloader:
+    """Fetches company reports into reports/<company>/, keeping every distinct version.
+
+    Bodies are streamed to a .partial file in chunks. A dropped connection is
+    resumed with a Range request (guarded by If-Range) instead of starting over.
+    A report is skipped when the server answers 304 to the stored ETag or
+    Last-Modified, or when the finished file hashes the same as the last
+    version kept.
+    """
+    def __init__(self, urls=COMPANY_URLS, folder=REPORTS_DIR, workers=WORKERS):
+        self.urls = urls
+        self.folder = folder
+        self.workers = workers
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, company):
+        with self._locks_guard:
+            return self._locks.setdefault(company, threading.Lock())
+
+    def download(self, company):
+        """Fetch one company's report. Returns {"status": "downloaded"|"unchanged", "file", "bytes", "resumed", "seconds"}."""
+        company = company.upper()
+        url = self.urls.get(company)
+        if url is None:
+            raise KeyError(company)
+        with self._lock_for(company):
+            started = time.perf_counter()
+            result = self._download(company, url)
+            result["seconds"] = round(time.perf_counter() - started, 3)
+            return result
+
+    def download_all(self, companies=None):
+        """Download every company (or the given ones) on a bounded thread pool. Returns {company: result}."""
+        companies = [c.upper() for c in (companies or sorted(self.urls))]
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="report-download") as pool:
+            futures = {company: pool.submit(self.download, company) for company in companies}
+        results = {}
+        for company, future in futures.items():
+            try:
+                results[company] = future.result()
+            except Exception as e:
+                results[company] = {"status": "error", "error": str(e)}
+        return results
+
+    def _download(self, company, url):
+        folder = os.path.join(self.folder, company)
+        os.makedirs(folder, exist_ok=True)
+        manifest_path = os.path.join(folder, MANIFEST)
+        manifest = _read_json(manifest_path)
+        if manifest.get('url') != url:
+            manifest = {}
+
+        resumed = False
+        for attempt in range(RETRIES + 1):
+            try:
+                response, resumed_now = self._fetch(folder, url, manifest)
+                resumed = resumed or resumed_now
+                break
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                if attempt == RETRIES:
+                    raise
+                delay = BACKOFF * 2 ** attempt
+                print(f"Download of {company} interrupted ({e}); resuming in {delay:.0f}s")
+                time.sleep(delay)
+
+        if response is None:
+            return {"status": "unchanged", "file": manifest.get('file'), "bytes": manifest.get('size', 0), "resumed": False}
+
+        partial = os.path.join(folder, PARTIAL)
+        size = os.path.getsize(partial)
+        if size < MIN_SIZE:
+            self._discard_partial(folder)
+            raise DownloadError("Downloaded file is too small or corrupt.")
+
+        sha256 = _sha256_of(partial).hexdigest()
+        manifest.update(url=url, etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified'))
+        if sha256 == manifest.get('sha256') and os.path.exists(os.path.join(folder, manifest.get('file', ''))):
+            self._discard_partial(folder)
+            _write_json(manifest_path, manifest)
+            return {"status": "unchanged", "file": manifest['file'], "bytes": size, "resumed": resumed}
+
+        filename = version_name(url)
+        os.replace(partial, os.path.join(folder, filename))
+        self._discard_partial(folder)
+        manifest.update(sha256=sha256, file=filename, size=size)
+        _write_json(manifest_path, manifest)
+        return {"status": "downloaded", "file": filename, "bytes": size, "resumed": resumed}
+
+    def _fetch(self, folder, url, manifest):
+        """Stream the body into .partial. Returns (response, resumed), or (None, False) on 304."""
+        partial = os.path.join(folder, PARTIAL)
+        meta_path = os.path.join(folder, PARTIAL_META)
+        meta = _read_json(meta_path)
+        have = os.path.getsize(partial) if os.path.exists(partial) and meta.get('url') == url else 0
+
+        headers = {}
+        if have and meta.get('validator'):
+            # If-Range: the server sends the rest only if the file is still the one we started on
+            headers['Range'] = f'bytes={have}-'
+            headers['If-Range'] = meta['validator']
+        else:
+            have = 0
+            if manifest.get('etag'):
+                headers['If-None-Match'] = manifest['etag']
+            if manifest.get('last_modified'):
+                headers['If-Modified-Since'] = manifest['last_modified']
+
+        with self.session.get(url, headers=headers, timeout=TIMEOUT, stream=True) as response:
+            if response.status_code == 304:
+                return None, False
+            if response.status_code == 416 and have:
+                # The partial already covers the whole file on the server's side; fetch it fresh
+                self._discard_partial(folder)
+                return self._fetch(folder, url, manifest)
+            response.raise_for_status()
+            resumed = response.status_code == 206
+            validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+            if not resumed:
+                _write_json(meta_path, {"url": url, "validator": validator})
+            with open(partial, 'ab' if resumed else 'wb') as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+            return response, resumed
+
+    def _discard_partial(self, folder):
+        for name in (PARTIAL, PARTIAL_META):
+            try:
+                os.remove(os.path.join(folder, name))
+            except FileNotFoundError:
+                pass
+
+downloader = Downloader()
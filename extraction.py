@@ -0,0 +1,180 @@
+# StockMate PDF extraction: page-by-page fundamentals scan that stops as soon as every figure is found
+
+import hashlib, json, multiprocessing, os, re, tempfile, threading, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import fitz
+import instrumentation
+
+# One alternative per field; each has a single named group holding the figure, so match.lastgroup
+# says which field a hit belongs to.
+FIELD_PATTERNS = {
+    "net_profit": r'Net\s+Profit\s*[:\-]?\s*[MK]*\s?(?P<net_profit>[\d,]+\.\d+)',
+    "number_of_shares_in_issue": r'Number\s+of\s+Shares\s+in\s+Issue\s*[:\-]?\s*(?P<number_of_shares_in_issue>[\d,]+)',
+    "dividend_paid": r'Dividend\s+(?:Paid|Declared)?\s*[:\-]?\s*[MK]*\s?(?P<dividend_paid>[\d,]+\.\d+)',
+    "book_value": r'Book\s+Value\s*[:\-]?\s*[MK]*\s?(?P<book_value>[\d,]+\.\d+)',
+}
+SCANNER = re.compile('|'.join(FIELD_PATTERNS.values()), re.IGNORECASE)
+NOT_FOUND = "Not found"
+REPORTS_DIR = 'reports'
+CACHE_PATH = os.path.join(REPORTS_DIR, '.extraction_cache.json')
+
+def scan_pages(pages):
+    """First value of each field across an iterable of page texts. Stops pulling pages once all are found."""
+    found = {}
+    for text in pages:
+        for match in SCANNER.finditer(text):
+            found.setdefault(match.lastgroup, match.group(match.lastgroup))
+        if len(found) == len(FIELD_PATTERNS):
+            break
+    return found
+
+def page_texts(doc):
+    # fitz loads each page only when the loop reaches it
+    for page in doc:
+        yield page.get_text()
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# ========== RESULT CACHE ==========
+class ExtractionCache:
+    """Extracted figures keyed by the PDF's SHA-256, kept in memory and in reports/.extraction_cache.json.
+
+    Hashing is skipped too when a file's path, size and mtime are unchanged since it was last hashed.
+    """
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._results = None
+        self._hashes = {}
+
+    def _load(self):
+        if self._results is None:
+            try:
+                with open(self.path) as f:
+                    self._results = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self._results = {}
+
+    def hash_of(self, pdf_path):
+        st = os.stat(pdf_path)
+        stamp = (st.st_size, st.st_mtime_ns)
+        known = self._hashes.get(pdf_path)
+        if known and known[0] == stamp:
+            return known[1]
+        digest = file_hash(pdf_path)
+        self._hashes[pdf_path] = (stamp, digest)
+        return digest
+
+    def get(self, digest):
+        with self._lock:
+            self._load()
+            return self._results.get(digest)
+
+    def put(self, digest, found):
+        with self._lock:
+            self._load()
+            self._results[digest] = found
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or '.', suffix='.json')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._results, f)
+            os.replace(tmp_path, self.path)
+
+cache = ExtractionCache()
+
+# ========== EXTRACT ==========
+@instrumentation.timed(instrumentation.pdf_seconds, 'extract')
+def scan_file(pdf_path):
+    with fitz.open(pdf_path) as doc:
+        return scan_pages(page_texts(doc))
+
+def extract_file(pdf_path):
+    """{field: value} for the fields found in one PDF (missing fields are absent). Unchanged files come from the cache."""
+    digest = cache.hash_of(pdf_path)
+    found = cache.get(digest)
+    if found is None:
+        found = scan_file(pdf_path)
+        cache.put(digest, found)
+    return found
+
+def latest_report(company):
+    """Path of the newest PDF under reports/<company>/, or None."""
+    folder = os.path.join(REPORTS_DIR, company)
+    if not os.path.isdir(folder):
+        return None
+    files = [f for f in os.listdir(folder) if f.endswith('.pdf')]
+    return os.path.join(folder, sorted(files)[-1]) if files else None
+
+# ========== BULK ==========
+def _timed_scan(pdf_path):
+    started = time.perf_counter()
+    return scan_file(pdf_path), time.perf_counter() - started
+
+def extract_all(workers=None):
+    """Scan the newest PDF of every company under reports/ across a process pool.
+
+    Returns {company: {"file", "found", "missing", "seconds", "cached"[, "error"]}}.
+    Only the parent process touches the result cache; workers just scan.
+    """
+    results, pending = {}, {}
+    companies = sorted(d for d in os.listdir(REPORTS_DIR) if os.path.isdir(os.path.join(REPORTS_DIR, d))) \
+        if os.path.isdir(REPORTS_DIR) else []
+    for company in companies:
+        pdf_path = latest_report(company)
+        if not pdf_path:
+            continue
+        results[company] = {"file": os.path.basename(pdf_path), "cached": False, "seconds": 0.0}
+        try:
+            digest = cache.hash_of(pdf_path)
+        except OSError as e:
+            results[company]["error"] = str(e)
+            continue
+        found = cache.get(digest)
+        if found is not None:
+            results[company].update(found=found, cached=True)
+        else:
+            pending[company] = (pdf_path, digest)
+
+    if pending:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {pool.submit(_timed_scan, path): company for company, (path, _) in pending.items()}
+            for future in as_completed(futures):
+                company = futures[future]
+                try:
+                    found, seconds = future.result()
+                except Exception as e:
+                    results[company]["error"] = str(e)
+                    continue
+                instrumentation.pdf_seconds.observe(seconds, 'extract')
+                cache.put(pending[company][1], found)
+                results[company].update(found=found, seconds=round(seconds, 4))
+
+    for result in results.values():
+        found = result.get("found", {})
+        result["found"] = found
+        result["missing"] = [field for field in FIELD_PATTERNS if field not in found]
+    return results
+
+def fundamentals_record(company, found):
+    # The shape extract_fundamentals has always returned
+    record = {"company": company}
+    for field in FIELD_PATTERNS:
+        record[field] = found.get(field, NOT_FOUND)
+    return record
+
+def leading_text(pdf_path, limit):
+    """The first `limit` characters of a PDF's text, reading only as many pages as that takes."""
+    parts, size = [], 0
+    with fitz.open(pdf_path) as doc:
+        for text in page_texts(doc):
+            parts.append(text)
+            size += len(text)
+            if size >= limit:
+                break
+    return ''.join(parts)[:limit]
@@ -0,0 +1,115 @@
+# StockMate fundamentals store: fundamentals.json parsed once per process, reloaded when the file changes
+
+import json, os, tempfile, threading
+
+FUNDAMENTALS_PATH = 'fundamentals.json'
+
+def _to_float(value):
+    return float(str(value).replace(',', ''))
+
+class CompanyFundamentals:
+    """One company's figures from fundamentals.json, parsed, with the per-share values precomputed."""
+    def __init__(self, counter, raw):
+        self.counter = counter
+        self.raw = raw
+        self.error = None
+        try:
+            self.net_profit = _to_float(raw['net_profit'])
+            self.shares = _to_float(raw['number_of_shares_in_issue'])
+            self.dividend = _to_float(raw['dividend_paid'])
+            self.book_value = _to_float(raw.get('book_value', 0))
+        except Exception as e:
+            # Surfaced by the routes as "Parsing error: ..." just like before
+            self.error = str(e)
+            self.net_profit = self.shares = self.dividend = self.book_value = 0
+        shares = self.shares
+        self.eps = self.net_profit / shares if shares and self.net_profit else 0
+        self.bvps = self.book_value / shares if shares and self.book_value else 0
+        self.dvps = self.dividend / shares if shares and self.dividend else 0
+
+class FundamentalsStore:
+    """Process-wide view of fundamentals.json.
+
+    Every read does one os.stat(); the file is only re-read and re-parsed when its
+    mtime or size changed. Writes go through update(), which replaces the file
+    atomically so other workers never read a half-written file.
+    """
+    def __init__(self, path=FUNDAMENTALS_PATH):
+        self.path = path
+        self.version = None
+        self._lock = threading.RLock()
+        self._raw = {}
+        self._companies = {}
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self, raw, version):
+        self._raw = raw
+        self._companies = {k.upper(): CompanyFundamentals(k.upper(), v) for k, v in raw.items() if isinstance(v, dict)}
+        self.version = version
+
+    def refresh(self):
+        version = self._stat()
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            raw = {}
+            if version is not None:
+                try:
+                    with open(self.path) as f:
+                        raw = json.load(f)
+                except ValueError as e:
+                    # Hand-edited file that doesn't parse: keep serving the last good copy
+                    print("Fundamentals load error:", e)
+                    if self.version is not None:
+                        self.version = version
+                        return
+            self._load(raw, version)
+
+    def get(self, counter):
+        self.refresh()
+        return self._companies.get(counter.upper())
+
+    def companies(self):
+        self.refresh()
+        return self._companies
+
+    def raw(self):
+        self.refresh()
+        return self._raw
+
+    def update(self, changes, merge_fields=False):
+        """Merge {counter: fields} into the file (temp file + rename) and reload.
+
+        With merge_fields the given fields are laid over each company's existing
+        entry instead of replacing it, so figures that weren't supplied survive.
+        """
+        with self._lock:
+            self.refresh()
+            data = dict(self._raw)
+            if merge_fields:
+                changes = {counter: {"company": counter, **data.get(counter, {}), **fields}
+                           for counter, fields in changes.items()}
+            data.update(changes)
+            folder = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix='.fundamentals-', suffix='.json', dir=folder)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+            self._load(data, self._stat())
+
+store = FundamentalsStore()
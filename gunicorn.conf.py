@@ -0,0 +1,28 @@
+# gunicorn settings, picked up automatically by:  gunicorn app:app
+# gevent workers keep each /stream/prices subscriber on a greenlet instead of a thread,
+# so one worker can hold thousands of idle streams.
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+worker_class = 'gevent'
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', '5000'))
+timeout = 60
+
+# Import the app once in the master and fork the workers from it: they start without importing anything
+# and share its pages copy-on-write. Heavy modules (PDF rendering, extraction, scraping) stay out of the
+# master and load in whichever worker first needs them. STOCKMATE_PRELOAD=0 imports per worker instead.
+preload_app = os.environ.get('STOCKMATE_PRELOAD', '1') != '0'
+if preload_app and worker_class == 'gevent':
+    # The gevent worker patches after the fork, too late for locks and queues the app made at import
+    # in the master (live.hub, the db pool, the caches); patch before the app is imported.
+    from gevent import monkey
+    monkey.patch_all()
+
+# Every worker starts the scrape scheduler; the lease row in SQLite lets only one of them scrape,
+# and another worker takes over within scheduling.LEASE_TTL if that one dies. STOCKMATE_SCHEDULER=0
+# leaves it off here, for deployments that run `flask schedule` as a separate process instead.
+def post_worker_init(worker):
+    if os.environ.get('STOCKMATE_SCHEDULER', '1') != '0':
+        import app
+        app.start_scheduler()
@@ -0,0 +1,277 @@
+# StockMate indicators: SMA/EMA/RSI/VWAP/volatility per counter, stepped tick by tick in save_data and
+# backfilled for whole histories with NumPy; both paths give the same numbers
+
+import json, math, re
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import archive, localtime
+
+# The persisted set, one REAL column each in the indicators table. Adding a name needs a
+# migration (ALTER TABLE ... ADD COLUMN) and `flask indicators` to backfill it.
+#   smaN  mean of the last N prices          emaN  EMA over N, seeded with the first SMA
+#   rsiN  Wilder's RSI over N price changes  vwap  volume-weighted price of the local trading day
+#   volN  sample std dev of the last N log returns (per tick, not annualized)
+INDICATORS = ('sma20', 'sma50', 'ema12', 'ema26', 'rsi14', 'vwap', 'vol20')
+
+def _parse(name):
+    match = re.fullmatch(r'(sma|ema|rsi|vol)(\d+)|vwap', name)
+    if not match:
+        raise ValueError(f"Unknown indicator '{name}'")
+    if name == 'vwap':
+        return 'vwap', None
+    period = int(match.group(2))
+    if period < 2:
+        raise ValueError(f"'{name}': period must be at least 2")
+    return match.group(1), period
+
+SPECS = {name: _parse(name) for name in INDICATORS}
+# Prices kept in the incremental state: enough for the longest window plus the change before it
+WINDOW = max([period + 1 for _, period in SPECS.values() if period] + [2])
+
+def parse_set(value):
+    """?set=sma20,rsi14 as a list of persisted names (all of them when empty). ValueError otherwise."""
+    if not value:
+        return list(INDICATORS)
+    names = [name.strip().lower() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SPECS]
+    if unknown:
+        raise ValueError(f"Unknown indicator(s) {', '.join(unknown)}. Use {', '.join(INDICATORS)}")
+    return names
+
+def _rsi(gain, loss):
+    if loss == 0:
+        return 50.0 if gain == 0 else 100.0
+    return 100.0 - 100.0 / (1.0 + gain / loss)
+
+def _trading_day(timestamp):
+    return (timestamp + localtime.UTC_OFFSET) // 86400
+
+# ========== STORAGE ==========
+def create_table(conn):
+    columns = ''.join(f',\n            {name} REAL' for name in INDICATORS)
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS indicators (
+            id INTEGER PRIMARY KEY,  -- the stocks tick the values were computed at
+            counter TEXT NOT NULL,
+            timestamp INTEGER NOT NULL{columns}
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_indicators_counter_timestamp ON indicators (counter, timestamp, id)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS indicator_state (
+            counter TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            state TEXT NOT NULL
+        )
+    ''')
+
+def _insert_sql():
+    names = ', '.join(INDICATORS)
+    marks = ', '.join('?' * len(INDICATORS))
+    return f'INSERT OR REPLACE INTO indicators (id, counter, timestamp, {names}) VALUES (?, ?, ?, {marks})'
+
+def _save_state(conn, counter, last_id, state):
+    conn.execute('INSERT OR REPLACE INTO indicator_state (counter, last_id, state) VALUES (?, ?, ?)',
+                 (counter, last_id, json.dumps(state, separators=(',', ':'))))
+
+# ========== INCREMENTAL ==========
+def new_state():
+    return {"count": 0, "prices": [], "ema": {}, "rsi": {}, "day": None, "pv": 0.0, "volume": 0}
+
+def step(state, price, volume, timestamp):
+    """Fold one tick into state and return {name: value or None}. Constant work per tick."""
+    prices = state["prices"]
+    prices.append(price)
+    del prices[:-WINDOW]
+    state["count"] += 1
+    count = state["count"]
+
+    day = _trading_day(timestamp)
+    if day != state["day"]:
+        state["day"], state["pv"], state["volume"] = day, 0.0, 0
+    state["pv"] += price * (volume or 0)
+    state["volume"] += volume or 0
+
+    values = {}
+    for name, (kind, n) in SPECS.items():
+        value = None
+        if kind == 'sma' and count >= n:
+            value = sum(prices[-n:]) / n
+        elif kind == 'ema' and count >= n:
+            if count == n:
+                state["ema"][name] = sum(prices[-n:]) / n
+            else:
+                state["ema"][name] += 2.0 / (n + 1) * (price - state["ema"][name])
+            value = state["ema"][name]
+        elif kind == 'rsi' and count > n:
+            if count == n + 1:
+                changes = [b - a for a, b in zip(prices[-n - 1:-1], prices[-n:])]
+                state["rsi"][name] = [sum(max(c, 0.0) for c in changes) / n, sum(max(-c, 0.0) for c in changes) / n]
+            else:
+                change = price - prices[-2]
+                gain, loss = state["rsi"][name]
+                state["rsi"][name] = [gain + (max(change, 0.0) - gain) / n, loss + (max(-change, 0.0) - loss) / n]
+            value = _rsi(*state["rsi"][name])
+        elif kind == 'vol' and count > n:
+            returns = [math.log(b / a) for a, b in zip(prices[-n - 1:-1], prices[-n:])]
+            mean = sum(returns) / n
+            value = math.sqrt(sum((r - mean) ** 2 for r in returns) / (n - 1))
+        elif kind == 'vwap' and state["volume"]:
+            value = state["pv"] / state["volume"]
+        values[name] = value
+    return values
+
+def update(conn, after_id):
+    """Step every counter's state through the stocks rows with id > after_id and store the results.
+
+    Called by save_data inside the ingest transaction, right after candles.roll_up.
+    Ticks without a usable price don't move the indicators.
+    """
+    rows = conn.execute('''
+        SELECT id, counter, timestamp, last_price, volume FROM stocks
+        WHERE id > ? AND last_price > 0
+        ORDER BY +timestamp, id
+    ''', (after_id,)).fetchall()
+    if not rows:
+        return 0
+    names = sorted({row[1] for row in rows})
+    marks = ', '.join('?' * len(names))
+    states = {counter: [last_id, json.loads(state)] for counter, last_id, state in conn.execute(
+        f'SELECT counter, last_id, state FROM indicator_state WHERE counter IN ({marks})', names)}
+
+    results = []
+    for tick_id, counter, timestamp, price, volume in rows:
+        entry = states.setdefault(counter, [0, new_state()])
+        if tick_id <= entry[0]:
+            continue
+        values = step(entry[1], price, volume, timestamp)
+        entry[0] = tick_id
+        results.append((tick_id, counter, timestamp, *(values[name] for name in INDICATORS)))
+    conn.executemany(_insert_sql(), results)
+    for counter in names:
+        _save_state(conn, counter, *states[counter])
+    return len(results)
+
+# ========== BACKFILL ==========
+def _recurse(values, alpha, start):
+    """y[i] = y[i-1] + alpha * (values[i] - y[i-1]) with y[-1] = start, for a whole array at once.
+
+    Each block is a scaled cumulative sum; blocks are short enough that the
+    decay factor's negative powers stay far from overflowing.
+    """
+    decay = 1.0 - alpha
+    block = max(1, min(4096, int(200 / -math.log(decay))))
+    out = np.empty(len(values))
+    for lo in range(0, len(values), block):
+        chunk = values[lo:lo + block]
+        k = np.arange(len(chunk))
+        powers = decay ** k
+        out[lo:lo + len(chunk)] = decay * powers * start + alpha * powers * np.cumsum(chunk / powers)
+        start = out[lo + len(chunk) - 1]
+    return out
+
+def compute(prices, volumes, timestamps):
+    """Every persisted indicator for one counter's whole history, as float arrays (NaN where undefined).
+
+    Also returns the incremental state after the last tick, so update() carries on from here.
+    """
+    prices = np.asarray(prices, dtype=float)
+    volumes = np.asarray(volumes, dtype=float)
+    timestamps = np.asarray(timestamps, dtype='int64')
+    size = len(prices)
+    state = new_state()
+    state["count"] = size
+    state["prices"] = prices[-WINDOW:].tolist()
+    deltas = np.diff(prices)
+    out = {}
+
+    for name, (kind, n) in SPECS.items():
+        values = np.full(size, np.nan)
+        if kind == 'sma' and size >= n:
+            values[n - 1:] = sliding_window_view(prices, n).mean(axis=1)
+        elif kind == 'ema' and size >= n:
+            values[n - 1] = prices[:n].mean()
+            values[n:] = _recurse(prices[n:], 2.0 / (n + 1), values[n - 1])
+            state["ema"][name] = float(values[-1])
+        elif kind == 'rsi' and size > n:
+            gains, losses = np.maximum(deltas, 0.0), np.maximum(-deltas, 0.0)
+            gain = np.concatenate(([gains[:n].mean()], _recurse(gains[n:], 1.0 / n, gains[:n].mean())))
+            loss = np.concatenate(([losses[:n].mean()], _recurse(losses[n:], 1.0 / n, losses[:n].mean())))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+            rsi[loss == 0] = np.where(gain[loss == 0] == 0, 50.0, 100.0)
+            values[n:] = rsi
+            state["rsi"][name] = [float(gain[-1]), float(loss[-1])]
+        elif kind == 'vol' and size > n:
+            returns = np.log(prices[1:] / prices[:-1])
+            values[n:] = sliding_window_view(returns, n).std(axis=1, ddof=1)
+        elif kind == 'vwap' and size:
+            # Running sums restart every local day; summed per day so years of history don't lose precision
+            days = _trading_day(timestamps)
+            bounds = np.flatnonzero(np.diff(days)) + 1
+            pv = np.concatenate([np.cumsum(chunk) for chunk in np.split(prices * volumes, bounds)])
+            vol = np.concatenate([np.cumsum(chunk) for chunk in np.split(volumes, bounds)])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values = np.where(vol > 0, pv / vol, np.nan)
+            state["day"] = int(days[-1])
+            state["pv"] = float(pv[-1])
+            state["volume"] = int(vol[-1])
+        out[name] = values
+    return out, state
+
+def _history(conn, counter):
+    # (id, timestamp, last_price, volume) arrays, archived days first, then the hot table
+    floor = archive.archived_before(conn)
+    rows = [(r[0], r[1], r[2], r[4] or 0) for batch in (archive.read_batches(counter, end=floor) if floor else ())
+            for r in archive.tick_rows(batch) if r[2] is not None and r[2] > 0]
+    rows += conn.execute('''
+        SELECT id, timestamp, last_price, COALESCE(volume, 0) FROM stocks
+        WHERE counter = ? AND timestamp >= ? AND last_price > 0
+        ORDER BY timestamp, id
+    ''', (counter, floor)).fetchall()
+    ids, timestamps, prices, volumes = zip(*rows) if rows else ((), (), (), ())
+    return (np.array(ids, dtype='int64'), np.array(timestamps, dtype='int64'),
+            np.array(prices, dtype=float), np.array(volumes, dtype=float))
+
+def backfill(conn, counter):
+    """Recompute and store one counter's indicators from its full history (archive included).
+
+    Run inside a transaction so no scrape lands between the read and the write.
+    """
+    ids, timestamps, prices, volumes = _history(conn, counter)
+    conn.execute('DELETE FROM indicators WHERE counter = ?', (counter,))
+    conn.execute('DELETE FROM indicator_state WHERE counter = ?', (counter,))
+    if not len(ids):
+        return 0
+    values, state = compute(prices, volumes, timestamps)
+    columns = [np.where(np.isnan(values[name]), None, values[name]).tolist() for name in INDICATORS]
+    conn.executemany(_insert_sql(), zip(ids.tolist(), [counter] * len(ids), timestamps.tolist(), *columns))
+    _save_state(conn, counter, int(ids[-1]), state)
+    return len(ids)
+
+def counters(conn):
+    hot = {row[0] for row in conn.execute('SELECT DISTINCT counter FROM stocks')}
+    return sorted(hot | set(archive.counters()))
+
+# ========== QUERIES ==========
+def latest(conn, counter, names):
+    """(timestamp, values...) of the counter's newest indicator row, None if there is none."""
+    return conn.execute(f'''
+        SELECT timestamp, {', '.join(names)} FROM indicators
+        WHERE counter = ? ORDER BY timestamp DESC, id DESC LIMIT 1
+    ''', (counter,)).fetchone()
+
+def series_sql(counter, names, start=None, end=None, after=None):
+    """(sql, params) for one counter's stored values, oldest first; rows end in timestamp, id."""
+    sql = f"SELECT {', '.join(names)}, timestamp, id FROM indicators WHERE counter = ?"
+    params = [counter]
+    if start:
+        sql += ' AND timestamp >= ?'
+        params.append(start)
+    if end:
+        sql += ' AND timestamp < ?'
+        params.append(end)
+    if after:
+        sql += ' AND (timestamp, id) > (?, ?)'
+        params.extend(after)
+    return sql + ' ORDER BY timestamp, id', params
@@ -0,0 +1,109 @@
+# StockMate ingest: the scraped MSE table parsed into numbers and stored with everything derived from it
+
+import time
+import db, candles, indicators, instrumentation, live, localtime, response_cache, screener
+
+# ========== NUMBER PARSING ==========
+def parse_number(value):
+    """Turn a scraped figure like '1,234.50', '+0.35%' or '(2.10)' into a float, None if blank."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    cleaned = str(value).strip().replace(',', '').replace('%', '').replace('+', '')
+    negative = cleaned.startswith('(') and cleaned.endswith(')')
+    cleaned = cleaned.strip('()').strip()
+    try:
+        number = float(cleaned)
+    except ValueError:
+        return None
+    return -number if negative else number
+
+def parse_int(value):
+    number = parse_number(value)
+    return int(round(number)) if number is not None else None
+
+# ========== SCRAPE ==========
+def scrape_mse():
+    """Latest MSE market table as a list of dicts, None if the page hasn't changed, [] on failure."""
+    import scraper   # requests + lxml, loaded by the first process that actually scrapes
+    try:
+        data = scraper.mse.scrape()
+    except Exception as e:
+        instrumentation.scrapes.inc('error')
+        print("Scraping Error:", e)
+        return []
+    instrumentation.scrapes.inc('unchanged' if data is None else 'ok' if data else 'empty')
+    return data
+
+# ========== SAVE ==========
+def quote_dicts(rows):
+    # (counter, last_price, change, volume, turnover, timestamp) rows in the /latest_prices shape
+    stamps = localtime.format_many(r[5] for r in rows)
+    return [{"counter": r[0], "last_price": r[1], "change": r[2], "volume": r[3], "turnover": r[4], "timestamp": ts} for r, ts in zip(rows, stamps)]
+
+def save_data(stock_data):
+    """Store one scrape's rows; returns how many were new ticks rather than repeats."""
+    # Parse the comma-formatted strings once here so readers get plain numbers
+    now = localtime.now()
+    rows = [{
+        'counter': item['Counter'],
+        'last_price': parse_number(item['Last Price (MK)']),
+        'change': parse_number(item['% Change']),
+        'volume': parse_int(item['Volume']),
+        'turnover': parse_number(item['Turnover (MK)']),
+        'timestamp': now,
+        'since': now - 3600
+    } for item in stock_data]
+
+    stages = instrumentation.scrape_stage_seconds
+    with db.transaction() as conn:
+        with stages.time('insert'):
+            last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM stocks').fetchone()[0]
+            # Skip a tick if the same figures were already stored for this counter in the last hour.
+            # The NOT EXISTS probe walks idx_stocks_counter_timestamp rather than the whole table.
+            inserted = conn.executemany('''
+                INSERT INTO stocks (counter, last_price, change, volume, turnover, timestamp)
+                SELECT :counter, :last_price, :change, :volume, :turnover, :timestamp
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM stocks
+                    WHERE counter = :counter AND timestamp >= :since
+                    AND last_price IS :last_price AND change IS :change
+                    AND volume IS :volume AND turnover IS :turnover
+                )
+            ''', rows).rowcount
+        instrumentation.scrape_rows.inc('inserted', amount=inserted)
+        instrumentation.scrape_rows.inc('duplicate', amount=len(rows) - inserted)
+        with stages.time('derive'):
+            # Counters whose price, volume or turnover moved, for /stream/prices subscribers
+            moved = conn.execute('''
+                SELECT s.counter, s.last_price, s.change, s.volume, s.turnover, s.timestamp
+                FROM stocks s LEFT JOIN latest_quotes q ON q.counter = s.counter
+                WHERE s.id > ? AND (q.counter IS NULL OR s.last_price IS NOT q.last_price
+                                    OR s.volume IS NOT q.volume OR s.turnover IS NOT q.turnover)
+                ORDER BY s.id
+            ''', (last_id,)).fetchall()
+            # Keep latest_quotes in step with whatever was just stored; rows apply in id order
+            conn.execute('''
+                INSERT INTO latest_quotes (counter, last_price, change, volume, turnover, timestamp)
+                SELECT counter, last_price, change, volume, turnover, timestamp FROM stocks
+                WHERE id > ?
+                ORDER BY id
+                ON CONFLICT(counter) DO UPDATE SET
+                    last_price = excluded.last_price,
+                    change = excluded.change,
+                    volume = excluded.volume,
+                    turnover = excluded.turnover,
+                    timestamp = excluded.timestamp
+            ''', (last_id,))
+            candles.roll_up(conn, last_id)
+            indicators.update(conn, last_id)
+            if conn.execute('SELECT COALESCE(MAX(id), 0) FROM stocks').fetchone()[0] > last_id:
+                screener.rebuild(conn)
+                generation = response_cache.bump(conn)
+                if moved:
+                    live.record(conn, generation, quote_dicts(moved))
+        committing = time.perf_counter()
+    stages.observe(time.perf_counter() - committing, 'commit')
+    live.hub.poke()
+    return inserted
@@ -0,0 +1,254 @@
+# StockMate instrumentation: request/SQL/scrape/PDF timings in Prometheus text format, plus an on-demand sampling profiler
+
+import bisect, collections, functools, os, re, sys, threading, time, uuid
+from flask import request, g
+
+# Histogram buckets, in seconds
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+PDF_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Profiling is off unless STOCKMATE_PROFILE_TOKEN is set; a request carrying the same value in
+# X-Profile is sampled every PROFILE_INTERVAL seconds and its folded stacks land in PROFILE_DIR.
+PROFILE_TOKEN = os.environ.get('STOCKMATE_PROFILE_TOKEN')
+PROFILE_DIR = os.environ.get('STOCKMATE_PROFILE_DIR', 'profiles')
+PROFILE_INTERVAL = 0.005
+PROFILE_KEEP = 100    # newest profiles kept on disk
+
+# ========== METRICS ==========
+# Values live in this process only; with several gunicorn workers each one reports its own.
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names, values, extra=''):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = collections.defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.labelnames, labels)} {value:g}')
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus expects it."""
+    def __init__(self, name, help, labelnames=(), buckets=REQUEST_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *labels):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += seconds
+
+    def time(self, *labels):
+        """Context manager that observes the time spent inside it."""
+        return _Timer(self, labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in series:
+            running = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                running += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound:g}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {running}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {total:.6f}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {running}')
+        return lines
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram, self.labels = histogram, labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.started
+        self.histogram.observe(self.seconds, *self.labels)
+
+requests_seconds = Histogram('stockmate_http_request_duration_seconds',
+                             "Time from request start until the view returned (streamed bodies excluded)",
+                             ('route', 'method', 'status'))
+sql_seconds = Histogram('stockmate_sql_query_duration_seconds',
+                        "SQLite statement time, execute plus fetches, by verb and table",
+                        ('statement',), SQL_BUCKETS)
+scrape_stage_seconds = Histogram('stockmate_scrape_stage_duration_seconds',
+                                 "Scrape pipeline stages: fetch, parse, insert (dedup probe + tick insert), derive, commit",
+                                 ('stage',), STAGE_BUCKETS)
+scrape_rows = Counter('stockmate_scrape_rows_total', "Market rows by fate: parsed, inserted, duplicate", ('outcome',))
+scrapes = Counter('stockmate_scrapes_total', "Scrape attempts by result: ok, unchanged, empty, error", ('result',))
+pdf_seconds = Histogram('stockmate_pdf_duration_seconds', "PDF work: render (fundamentals report) and extract (text scan)",
+                        ('operation',), PDF_BUCKETS)
+profiles = Counter('stockmate_profiles_total', "Requests profiled via X-Profile")
+
+REGISTRY = [requests_seconds, sql_seconds, scrape_stage_seconds, scrape_rows, scrapes, pdf_seconds, profiles]
+
+def render():
+    """Every metric in Prometheus text exposition format (version 0.0.4)."""
+    return '\n'.join(line for metric in REGISTRY for line in metric.render()) + '\n'
+
+def timed(histogram, *labels):
+    """Decorator version of histogram.time()."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with histogram.time(*labels):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+# ========== SQL ==========
+_VERB = re.compile(r'\s*(\w+)')
+_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|TABLE(?:\s+IF\s+NOT\s+EXISTS)?|ON)\s+(\w+)', re.IGNORECASE)
+_statement_labels = {}
+
+def statement_label(sql):
+    """'SELECT stocks', 'INSERT candles', 'PRAGMA' ... -- few enough distinct values to use as a label."""
+    label = _statement_labels.get(sql)
+    if label is None:
+        verb, table = _VERB.match(sql), _TABLE.search(sql)
+        label = verb.group(1).upper() if verb else 'OTHER'
+        if table:
+            label += f' {table.group(1)}'
+        if len(_statement_labels) < 4096:
+            _statement_labels[sql] = label
+    return label
+
+# ========== FLASK ==========
+def _route_label():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+def init_app(app):
+    """Time every request and run the profiler for requests that ask for it."""
+    @app.before_request
+    def _start_timer():
+        g.instrumentation_started = time.perf_counter()
+        # /metrics/* itself is never profiled, so fetching a profile doesn't make another one
+        if PROFILE_TOKEN and request.headers.get('X-Profile') == PROFILE_TOKEN and not request.path.startswith('/metrics/'):
+            g.profiler = Profiler()
+            g.profiler.start()
+
+    @app.after_request
+    def _record(response):
+        started = g.pop('instrumentation_started', None)
+        if started is not None:
+            requests_seconds.observe(time.perf_counter() - started, _route_label(), request.method, response.status_code)
+        profiler = g.pop('profiler', None)
+        if profiler:
+            response.headers['X-Profile-Id'] = profiler.finish(f'{request.method} {request.full_path}')
+        return response
+
+# ========== PROFILER ==========
+# Under gevent the threading module is patched to greenlets, which would only ever sample
+# themselves; the sampler needs a real OS thread and the real ident of the thread to watch.
+# Resolved on the first profile, and through gevent only if something already imported it.
+_originals = None
+
+def _os_threads():
+    """(start_new_thread, get_ident, allocate_lock, sleep) as the OS provides them, unpatched."""
+    global _originals
+    if _originals is None:
+        if 'gevent' in sys.modules:
+            from gevent.monkey import get_original
+            _originals = (*get_original('_thread', ['start_new_thread', 'get_ident', 'allocate_lock']),
+                          get_original('time', 'sleep'))
+        else:
+            import _thread
+            _originals = (_thread.start_new_thread, _thread.get_ident, _thread.allocate_lock, time.sleep)
+    return _originals
+
+def _stack(frame):
+    names = []
+    while frame is not None:
+        names.append(f'{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+class Profiler:
+    """Samples one thread's Python stack from a background OS thread while a request runs.
+
+    Output is folded stacks ("a;b;c count" lines) that flamegraph.pl, speedscope
+    and friends read as is. Under gevent the watched thread is the worker's main
+    thread, so samples also catch whatever other greenlet is running at the time.
+    """
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples = collections.Counter()
+        self._target = None
+        self._running = False
+        self._lock = None
+
+    def start(self):
+        start_thread, get_ident, allocate_lock, self._sleep = _os_threads()
+        self._lock = allocate_lock()
+        self._target = get_ident()
+        self._running = True
+        self.started = time.perf_counter()
+        start_thread(self._run, ())
+
+    def _run(self):
+        while self._running:
+            frame = sys._current_frames().get(self._target)
+            if frame is not None:
+                stack = _stack(frame)
+                with self._lock:
+                    self.samples[stack] += 1
+            del frame
+            self._sleep(self.interval)
+
+    def finish(self, title):
+        """Stop sampling, write PROFILE_DIR/<id>.folded and return the id."""
+        with self._lock:
+            self._running = False
+            samples = self.samples.most_common()
+        seconds = time.perf_counter() - self.started
+        profile_id = uuid.uuid4().hex[:12]
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(os.path.join(PROFILE_DIR, f'{profile_id}.folded'), 'w') as f:
+            f.write(f'# {title} {seconds:.4f}s {sum(count for _, count in samples)} samples every {self.interval}s\n')
+            for stack, count in samples:
+                f.write(f'{stack} {count}\n')
+        profiles.inc()
+        _prune()
+        return profile_id
+
+def _prune():
+    paths = sorted((os.path.join(PROFILE_DIR, name) for name in os.listdir(PROFILE_DIR) if name.endswith('.folded')),
+                   key=os.path.getmtime)
+    for path in paths[:-PROFILE_KEEP]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def profile_path(profile_id):
+    """Path of a finished profile, None for an unknown or malformed id."""
+    if not re.fullmatch(r'[0-9a-f]{12}', profile_id or ''):
+        return None
+    path = os.path.join(PROFILE_DIR, f'{profile_id}.folded')
+    return path if os.path.exists(path) else None
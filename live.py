@@ -0,0 +1,143 @@
+# StockMate live prices: a per-process hub that fans out save_data's price diffs to /stream/prices subscribers
+
+import json, threading
+from collections import deque
+import db
+
+RING_SIZE = 288          # generations replayable after a reconnect (a trading day of 5-minute scrapes)
+POLL_INTERVAL = 1.0      # seconds between generation checks for scrapes saved by other processes
+HEARTBEAT = 15.0         # seconds between keep-alive comments on an idle stream
+
+# ========== EVENT LOG ==========
+# save_data writes each diff into price_events under the generation it bumped to, in the
+# same transaction. Only the last RING_SIZE generations are kept.
+def create_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS price_events (
+            generation INTEGER PRIMARY KEY,
+            payload TEXT NOT NULL
+        )
+    ''')
+
+def record(conn, generation, quotes):
+    """Store one diff (a list of quote dicts) for generation and drop events older than the ring."""
+    conn.execute('INSERT OR REPLACE INTO price_events (generation, payload) VALUES (?, ?)',
+                 (generation, json.dumps(quotes)))
+    conn.execute('DELETE FROM price_events WHERE generation <= ?', (generation - RING_SIZE,))
+
+def format_event(data, event=None, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event:
+        lines.append(f'event: {event}')
+    lines.append(f'data: {data}')
+    return '\n'.join(lines) + '\n\n'
+
+# ========== HUB ==========
+class PriceHub:
+    """Recent diffs in memory, plus one watcher thread that notices new generations.
+
+    Subscribers are generators that sleep on a shared Condition, so an idle stream
+    holds no thread of its own. Under gevent workers each one is just a greenlet.
+    The watcher reads the meta generation every POLL_INTERVAL seconds, or
+    immediately after poke() when the scrape happened in this process. When the
+    generation moves it loads the new events and wakes every subscriber.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._ring = deque()        # (generation, payload json), oldest first
+        self._generation = None
+        self._wake = threading.Event()
+        self._watcher = None
+        self._start_lock = threading.Lock()
+
+    def _start(self):
+        with self._start_lock:
+            if self._watcher is None:
+                self._load()
+                self._watcher = threading.Thread(target=self._watch, name="price-hub", daemon=True)
+                self._watcher.start()
+
+    def _load(self):
+        with db.connection() as conn:
+            generation = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+            generation = generation[0] if generation else 0
+            rows = conn.execute('SELECT generation, payload FROM price_events WHERE generation > ? ORDER BY generation',
+                                (self._generation if self._generation is not None else generation - RING_SIZE,)).fetchall()
+        with self._cond:
+            self._ring.extend(rows)
+            while self._ring and self._ring[0][0] <= generation - RING_SIZE:
+                self._ring.popleft()
+            changed = generation != self._generation
+            self._generation = generation
+            if changed:
+                self._cond.notify_all()
+
+    def _watch(self):
+        while True:
+            self._wake.wait(POLL_INTERVAL)
+            self._wake.clear()
+            try:
+                self._load()
+            except Exception as e:
+                print("Price hub error:", e)
+
+    def poke(self):
+        """Called after save_data commits, so local subscribers don't wait for the next poll."""
+        if self._watcher is not None:
+            self._wake.set()
+
+    def _since(self, generation):
+        # Events after generation, or None if the ring no longer reaches back that far
+        if generation is None or generation < self._generation - RING_SIZE:
+            return None
+        return [event for event in self._ring if event[0] > generation]
+
+    def stream(self, last_event_id, snapshot):
+        """SSE text for one subscriber.
+
+        snapshot() returns (generation, quotes) for every counter. A client that
+        reconnects with a Last-Event-ID still inside the ring gets only the diffs it
+        missed. Anyone else starts from a full snapshot.
+        """
+        self._start()
+        try:
+            last = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last = None
+        if last is not None and last > self._generation:
+            # Another worker may be ahead of our last poll; an id from the future means the database was reset
+            self._load()
+            if last > self._generation:
+                last = None
+        with self._cond:
+            missed = self._since(last)
+        if missed is None:
+            last, quotes = snapshot()
+            yield format_event(json.dumps(quotes), 'snapshot', last)
+            with self._cond:
+                missed = self._since(last) or []
+        yield 'retry: 5000\n\n'
+
+        while True:
+            for generation, payload in missed:
+                yield format_event(payload, 'prices', generation)
+                last = generation
+            with self._cond:
+                missed = self._since(last)
+                if missed == []:
+                    self._cond.wait(HEARTBEAT)
+                    missed = self._since(last)
+                    if missed == []:
+                        # Nothing to send; scrapes that stored ticks without moving a price still advance us
+                        last = max(last, self._generation)
+            if missed is None:
+                # Fell out of the ring (this subscriber stalled); start over from the current state
+                last, quotes = snapshot()
+                yield format_event(json.dumps(quotes), 'snapshot', last)
+                missed = []
+            elif not missed:
+                yield ': keep-alive\n\n'
+
+hub = PriceHub()
@@ -0,0 +1,40 @@
+# StockMate time handling: ticks are stored as UTC epoch seconds and shown in Malawi time (UTC+2)
+
+import calendar, time
+from datetime import datetime
+import numpy as np
+import pytz
+
+LOCAL_TZ = pytz.timezone('Africa/Blantyre')
+# Malawi has stayed on UTC+2 with no daylight saving, so one offset covers every timestamp we store
+UTC_OFFSET = int(LOCAL_TZ.utcoffset(datetime(2000, 1, 1)).total_seconds())
+FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def now():
+    return int(time.time())
+
+def to_epoch(moment):
+    """A naive UTC datetime as epoch seconds."""
+    return calendar.timegm(moment.timetuple())
+
+def format_local(epoch):
+    """One epoch as local 'YYYY-MM-DD HH:MM:SS'; None stays None."""
+    if epoch is None:
+        return None
+    return time.strftime(FORMAT, time.gmtime(epoch + UTC_OFFSET))
+
+def format_many(epochs):
+    """format_local() for a whole result set at once.
+
+    The offset is added and the strings are built by NumPy for every value in
+    one pass, which is what keeps a 20k-row /history response cheap.
+    """
+    epochs = list(epochs)
+    if not epochs:
+        return []
+    missing = None in epochs
+    values = np.array([0 if e is None else e for e in epochs] if missing else epochs, dtype='int64') + UTC_OFFSET
+    text = np.char.replace(np.datetime_as_string(values.astype('datetime64[s]')), 'T', ' ').tolist()
+    if missing:
+        text = [None if e is None else t for e, t in zip(epochs, text)]
+    return text
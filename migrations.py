@@ -0,0 +1,165 @@
+# StockMate schema: numbered migrations applied in order, tracked by PRAGMA user_version
+
+import db, indicators, live, response_cache, scheduling, screener
+from ingest import parse_number, parse_int
+
+# ========== DATABASE INIT ==========
+# Each migration runs once, in order, inside its own transaction.
+# PRAGMA user_version records how many have been applied to database.db.
+def _migrate_typed_ticks(conn):
+    """v1: numeric price/volume columns, (counter, timestamp) index, backfill legacy TEXT rows."""
+    conn.execute('''
+        CREATE TABLE stocks_typed (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            counter TEXT,
+            last_price REAL,
+            change REAL,
+            volume INTEGER,
+            turnover REAL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    legacy = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stocks'").fetchone()
+    if legacy:
+        rows = conn.execute('SELECT id, counter, last_price, change, volume, turnover, timestamp FROM stocks ORDER BY id')
+        conn.executemany('''
+            INSERT INTO stocks_typed (id, counter, last_price, change, volume, turnover, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', ((r[0], r[1], parse_number(r[2]), parse_number(r[3]), parse_int(r[4]), parse_number(r[5]), r[6]) for r in rows))
+        conn.execute('DROP TABLE stocks')
+    conn.execute('ALTER TABLE stocks_typed RENAME TO stocks')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_stocks_counter_timestamp ON stocks (counter, timestamp)')
+
+def _migrate_latest_quotes(conn):
+    """v2: one row per counter holding its most recent tick, maintained by save_data."""
+    conn.execute('''
+        CREATE TABLE latest_quotes (
+            counter TEXT PRIMARY KEY,
+            last_price REAL,
+            change REAL,
+            volume INTEGER,
+            turnover REAL,
+            timestamp DATETIME
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO latest_quotes (counter, last_price, change, volume, turnover, timestamp)
+        SELECT counter, last_price, change, volume, turnover, MAX(timestamp)
+        FROM stocks
+        GROUP BY counter
+    ''')
+
+def _migrate_timestamp_index(conn):
+    """v3: /stocks orders the whole table by timestamp; give it an index to walk."""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_stocks_timestamp ON stocks (timestamp)')
+
+# Buckets for the 'YYYY-MM-DD HH:MM:SS' UTC text timestamps stocks still has at v4; v7 makes them epochs,
+# and candles.INTERVALS only reads epochs. The buckets come out the same either way.
+_TEXT_BUCKETS = {
+    '1h': "strftime('%Y-%m-%d %H:00:00', timestamp)",
+    '1d': "date(timestamp)",
+    '1w': "date(timestamp, '-6 days', 'weekday 1')",
+}
+
+def _migrate_candles(conn):
+    """v4: 1h/1d/1w OHLC rollups, built from the history already stored."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS candles (
+            counter TEXT NOT NULL,
+            interval TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume INTEGER,
+            turnover REAL,
+            ticks INTEGER,
+            PRIMARY KEY (counter, interval, bucket)
+        ) WITHOUT ROWID
+    ''')
+    for interval, bucket in _TEXT_BUCKETS.items():
+        conn.execute(f'''
+            INSERT INTO candles (counter, interval, bucket, open, high, low, close, volume, turnover, ticks)
+            SELECT counter, ?, {bucket}, last_price, last_price, last_price, last_price,
+                   COALESCE(volume, 0), COALESCE(turnover, 0), 1
+            FROM stocks
+            WHERE last_price IS NOT NULL
+            ORDER BY timestamp, id
+            ON CONFLICT (counter, interval, bucket) DO UPDATE SET
+                high = MAX(high, excluded.high),
+                low = MIN(low, excluded.low),
+                close = excluded.close,
+                volume = volume + excluded.volume,
+                turnover = turnover + excluded.turnover,
+                ticks = ticks + 1
+        ''', (interval,))
+
+def _migrate_meta(conn):
+    """v5: meta table with the generation counter the response cache is keyed on; save_data bumps it."""
+    response_cache.create_table(conn)
+
+def _migrate_price_events(conn):
+    """v6: recent price diffs, so /stream/prices clients can resume from their Last-Event-ID in any worker."""
+    live.create_table(conn)
+
+def _migrate_epoch_timestamps(conn):
+    """v7: timestamps as INTEGER UTC epoch seconds instead of 'YYYY-MM-DD HH:MM:SS' text."""
+    conn.execute('''
+        CREATE TABLE stocks_epoch (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            counter TEXT,
+            last_price REAL,
+            change REAL,
+            volume INTEGER,
+            turnover REAL,
+            timestamp INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO stocks_epoch (id, counter, last_price, change, volume, turnover, timestamp)
+        SELECT id, counter, last_price, change, volume, turnover, CAST(strftime('%s', timestamp) AS INTEGER)
+        FROM stocks ORDER BY id
+    ''')
+    conn.execute('DROP TABLE stocks')
+    conn.execute('ALTER TABLE stocks_epoch RENAME TO stocks')
+    conn.execute('CREATE INDEX idx_stocks_counter_timestamp ON stocks (counter, timestamp)')
+    conn.execute('CREATE INDEX idx_stocks_timestamp ON stocks (timestamp)')
+    conn.execute("UPDATE latest_quotes SET timestamp = CAST(strftime('%s', timestamp) AS INTEGER) WHERE typeof(timestamp) = 'text'")
+
+def _migrate_indicators(conn):
+    """v8: persisted SMA/EMA/RSI/VWAP/volatility per tick, backfilled from the history already stored."""
+    indicators.create_table(conn)
+    for counter in indicators.counters(conn):
+        indicators.backfill(conn, counter)
+
+def _migrate_valuations(conn):
+    """v9: every counter's price ratios in one indexed table for /screen; save_data keeps it current."""
+    screener.create_table(conn)
+    screener.rebuild(conn)
+
+def _migrate_scheduler_lease(conn):
+    """v10: the lease row that picks the one process allowed to run scheduled scrapes."""
+    scheduling.create_table(conn)
+
+MIGRATIONS = [
+    _migrate_typed_ticks,
+    _migrate_latest_quotes,
+    _migrate_timestamp_index,
+    _migrate_candles,
+    _migrate_meta,
+    _migrate_price_events,
+    _migrate_epoch_timestamps,
+    _migrate_indicators,
+    _migrate_valuations,
+    _migrate_scheduler_lease,
+]
+
+def init_db():
+    with db.connection() as conn:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        with db.transaction() as conn:
+            migration(conn)
+            conn.execute(f'PRAGMA user_version = {number}')
+        print(f"Database migrated to schema v{number} ({migration.__name__})")
@@ -0,0 +1,110 @@
+# StockMate paging: keyset cursors for the history endpoints, and constant-memory JSON/NDJSON streaming
+
+import base64, itertools, json
+from urllib.parse import urlencode
+from flask import request, jsonify, Response
+import db
+
+STREAM_BATCH = 1000   # rows fetched from the cursor per round trip while streaming
+STREAM_FORMATS = {'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+
+# ========== CURSORS ==========
+def encode_cursor(key):
+    """Opaque ?cursor= value for the sort key of the last row on a page."""
+    return base64.urlsafe_b64encode(json.dumps(list(key), separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(value, size):
+    """The key tuple from ?cursor=, None if absent. ValueError if it isn't one of ours."""
+    if not value:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, list) or len(key) != size:
+        raise ValueError("Invalid cursor")
+    return tuple(key)
+
+def parse_limit(value, default, maximum):
+    if value is None:
+        return default
+    limit = int(value)
+    if not 1 <= limit <= maximum:
+        raise ValueError(f"limit must be between 1 and {maximum}")
+    return limit
+
+def stream_format():
+    """?stream=json|ndjson, None when the client wants a normal page. ValueError for anything else."""
+    fmt = request.args.get('stream')
+    if fmt is not None and fmt not in STREAM_FORMATS:
+        raise ValueError(f"stream must be one of {', '.join(STREAM_FORMATS)}")
+    return fmt
+
+# ========== RESPONSES ==========
+def page(sql, params, to_dicts, key, limit, head=()):
+    """One page of a keyset-ordered query.
+
+    sql must already end in its ORDER BY. One extra row is fetched to tell whether
+    another page follows; if so the response carries its cursor in X-Next-Cursor
+    and a Link: rel="next" header. The body stays the plain JSON array it always was.
+    head is an iterable of rows (from the archive) that sort before everything sql returns.
+    """
+    rows = list(itertools.islice(head, limit + 1))
+    if len(rows) <= limit:
+        rows += db.query(sql + ' LIMIT ?', list(params) + [limit + 1 - len(rows)])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    response = jsonify(to_dicts(rows))
+    if more:
+        cursor = encode_cursor(key(rows[-1]))
+        args = request.args.to_dict()
+        args['cursor'] = cursor
+        response.headers['X-Next-Cursor'] = cursor
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
+
+def stream(sql, params, to_dicts, fmt, limit=None, head=()):
+    """The whole result of sql as a streamed JSON array or NDJSON, read STREAM_BATCH rows at a time.
+
+    The connection is held only while the generator runs, so memory stays flat
+    however many years of ticks the query covers. head is an iterable of row
+    batches (from the archive) sent before the rows of sql.
+    """
+    def batches(conn):
+        remaining = limit
+        for rows in head:
+            if remaining is not None:
+                rows = rows[:remaining]
+                remaining -= len(rows)
+            yield rows
+            if remaining == 0:
+                return
+        query, args = sql, list(params)
+        if remaining is not None:
+            query += ' LIMIT ?'
+            args.append(remaining)
+        cursor = conn.execute(query, args)
+        while True:
+            rows = cursor.fetchmany(STREAM_BATCH)
+            if not rows:
+                return
+            yield rows
+
+    def generate():
+        with db.connection() as conn:
+            first = True
+            if fmt == 'json':
+                yield '['
+            for rows in batches(conn):
+                if not rows:
+                    continue
+                items = [json.dumps(item, separators=(',', ':')) for item in to_dicts(rows)]
+                if fmt == 'ndjson':
+                    yield '\n'.join(items) + '\n'
+                else:
+                    yield ('' if first else ',') + ','.join(items)
+                first = False
+            if fmt == 'json':
+                yield ']'
+
+    return Response(generate(), mimetype=STREAM_FORMATS[fmt], headers={'X-Accel-Buffering': 'no'})
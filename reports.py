@@ -0,0 +1,311 @@
+# StockMate fundamentals reports: in-memory PDF rendering with shared fonts/images, plus a cache of finished reports
+
+import copy, io, multiprocessing, os, threading, time, zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import fpdf, qrcode
+from fontTools import ttLib
+from fpdf import FPDF
+try:
+    from fpdf.fonts import SubsetMap
+    from fpdf.image_datastructures import ImageCache
+except ImportError:   # internals moved in this fpdf2; every PDF loads its own fonts and images
+    SubsetMap = ImageCache = None
+import instrumentation
+from companies import COMPANY_URLS
+
+FONTS = {
+    "": "fonts/DejaVuSans.ttf",
+    "B": "fonts/DejaVuSans-Bold.ttf",
+    "I": "fonts/DejaVuSans-Oblique.ttf",
+    "BI": "fonts/DejaVuSans-BoldOblique.ttf",
+}
+SITE_LOGO = "StockMate-logo.png"
+
+# ========== SHARED ASSETS ==========
+class _Assets:
+    """Fonts, logos and QR codes decoded once per process and handed to every PDF.
+
+    fpdf2 subsets each font in place when a document is written, so documents can't
+    share a font object outright. Each PDF gets a shallow copy of the parsed font
+    (metrics, cmap, widths) with its own lazily-opened fontTools face and glyph subset.
+    Images are pre-processed into an ImageCache whose entries are copied per document.
+    That reaches into fpdf2 internals (requirements.txt pins the release it was written
+    against), so a probe render checks it on load and falls back to per-document
+    add_font()/image() if this fpdf2 doesn't take the copies.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loader = None
+        self._fonts = None
+        self._shared = False
+        self._qr = {}
+
+    def _load(self):
+        with self._lock:
+            if self._fonts is not None:
+                return
+            loader = FPDF()
+            fonts = {}
+            for style, path in FONTS.items():
+                loader.add_font("DejaVu", style, path)
+                with open(path, 'rb') as f:
+                    data = f.read()
+                fonts["dejavu" + style] = (loader.fonts["dejavu" + style], data)
+            loader.add_page()
+            self._loader = loader
+            self._fonts = fonts
+            self.ensure_image(SITE_LOGO)
+            self._shared = self._probe()
+
+    def _probe(self):
+        # One tiny document through the shared path; any error means this fpdf2's internals differ
+        if SubsetMap is None or ImageCache is None:
+            return False
+        try:
+            pdf = FPDF()
+            self._install_shared(pdf)
+            pdf.add_page()
+            pdf.set_font("DejaVu", "B", 10)
+            pdf.cell(0, 5, "StockMate")
+            pdf.image(SITE_LOGO, w=10)
+            pdf.output()
+            return True
+        except Exception as e:
+            print(f"Shared report fonts/images off with fpdf2 {fpdf.__version__}: {e!r}")
+            return False
+
+    def ensure_image(self, path):
+        """Decode and compress an image file into the shared cache (once) before a PDF copies it."""
+        self._load()
+        with self._lock:
+            if path not in self._loader.image_cache.images:
+                self._loader.image(path, w=10)
+
+    def install(self, pdf):
+        self._load()
+        if self._shared:
+            self._install_shared(pdf)
+        else:
+            for style, path in FONTS.items():
+                pdf.add_font("DejaVu", style, path)
+
+    def _install_shared(self, pdf):
+        for fontkey, (template, data) in self._fonts.items():
+            font = copy.copy(template)
+            font.i = len(pdf.fonts) + 1
+            font.ttfont = ttLib.TTFont(io.BytesIO(data), recalcTimestamp=False, lazy=True)
+            font.subset = SubsetMap(font)
+            font.missing_glyphs = []
+            font.biggest_size_pt = 0
+            font._hbfont = None
+            pdf.fonts[fontkey] = font
+        shared = self._loader.image_cache
+        with self._lock:
+            images = {}
+            for name, info in shared.images.items():
+                info = copy.copy(info)
+                info["usages"] = 0
+                images[name] = info
+            pdf.image_cache = ImageCache(images=images, icc_profiles=dict(shared.icc_profiles),
+                                         image_filter=shared.image_filter)
+
+    def qr(self, counter):
+        image = self._qr.get(counter)
+        if image is None:
+            image = qrcode.make(COMPANY_URLS.get(counter, "https://mse.co.mw")).get_image()
+            self._qr[counter] = image
+        return image
+
+assets = _Assets()
+
+# ========== RENDER ==========
+# 📄 PDF class: Header and Footer using DejaVu font
+class PDF(FPDF):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        assets.install(self)
+
+    def header(self):
+        self.image(SITE_LOGO, 10, 8, 30)  # (x, y, width)
+        self.set_xy(50, 10)
+        self.set_fill_color(0, 102, 204)  # Blue
+        self.set_text_color(255, 255, 255)
+        self.set_font("DejaVu", "B", 20)
+        self.cell(140, 10, "StockMate Fundamentals Report", ln=True, align='C', fill=True)
+        self.ln(15)
+        # Motto
+        self.set_text_color(75, 0, 130)
+        self.set_font("DejaVu", "I", 10)
+        self.set_xy(50, 20)
+        self.cell(140, 8, "Smart Insights. Wise Investments.", ln=True, align='C')
+        self.ln(10)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font("DejaVu", "", 10)
+        self.set_text_color(0, 0, 238)
+        self.cell(0, 6, "Call/WhatsApp: +265888695513", ln=True, align='C', link='https://wa.me/265888695513')
+        self.cell(0, 6, "Email: juanphiri7@gmail.com", ln=True, align='C', link='mailto:juanphiri7@gmail.com')
+
+@instrumentation.timed(instrumentation.pdf_seconds, 'render')
+def render_report(counter, company, price):
+    """PDF bytes for one counter. company is a CompanyFundamentals, price the latest last_price."""
+    counter = counter.upper()
+    net_profit, shares, dividend, book_value = company.net_profit, company.shares, company.dividend, company.book_value
+    eps, bvps, dvps = company.eps, company.bvps, company.dvps
+
+    pe_ratio = price / eps if eps else None
+    pb_ratio = price / bvps if bvps else None
+    div_yield = (dvps / price) * 100 if price else None
+
+    logo_path = f"company_logos/{counter}.png"
+    if os.path.exists(logo_path):
+        assets.ensure_image(logo_path)
+
+    pdf = PDF()
+    pdf.add_page()
+    pdf.ln(10)
+    # ========== Company Logo + Name ==========
+    logo_width = 25
+
+    if os.path.exists(logo_path):
+        y_start = pdf.get_y()
+        pdf.image(logo_path, x=10, y=y_start, w=logo_width)
+        pdf.set_xy(10 + logo_width + 10, y_start + 5)
+        pdf.set_font("DejaVu", "B", 16)
+        pdf.cell(0, 10, f"{counter} Snapshot", ln=True)
+        # Push cursor down so logo and text above don't overlap with content
+        pdf.set_y(y_start + logo_width + 5)
+    else:
+        pdf.set_font("DejaVu", "B", 16)
+        pdf.set_text_color(0)
+        pdf.cell(0, 10, f"{counter} Snapshot", ln=True)
+        pdf.ln(10)
+
+    # ==== Financial Info ====
+    pdf.set_text_color(0)
+    pdf.set_font("DejaVu", "", 12)
+    pdf.cell(0, 10, f"Latest Price: MK {price:,.2f}" if price else "N/A", ln=True)
+    pdf.cell(0, 10, f"Net Profit: MK {net_profit:,.2f}" if net_profit else "N/A", ln=True)
+    pdf.cell(0, 10, f"Dividend Paid: MK {dividend:,.2f}" if dividend else "N/A", ln=True)
+    pdf.cell(0, 10, f"Number of Shares in Issue: {shares:,.0f}" if shares else "N/A", ln=True)
+    pdf.cell(0, 10, f"Book Value: MK {book_value:,.2f}" if book_value else "N/A", ln=True)
+    # Metrics
+    pdf.ln(5)
+    pdf.set_font("DejaVu", "B", 16)
+    pdf.cell(0, 10, "Key Financial Metrics", ln=True)
+    pdf.set_font("DejaVu", "", 12)
+    pdf.cell(0, 10, f"Earnings Per Share (EPS): {eps:.2f}" if eps else "N/A", ln=True)
+    pdf.cell(0, 10, f"P/E Ratio: {pe_ratio:.2f}" if pe_ratio else "N/A", ln=True)
+    pdf.cell(0, 10, f"Dividend Yield: {div_yield:.2f}%" if div_yield else "N/A", ln=True)
+    pdf.cell(0, 10, f"P/B Ratio: {pb_ratio:.2f}" if pb_ratio else "N/A", ln=True)
+    pdf.cell(0, 10, f"Book Value Per Share (BVPS): {bvps:.2f}" if bvps else "N/A", ln=True)
+    #Disclaimer
+    pdf.ln(12)
+    pdf.set_font("DejaVu", "I", 10)
+    pdf.set_text_color(90)
+    pdf.multi_cell(0, 10, f"Disclaimer: This report is auto-generated based on public financial data from the Malawi Stock Exchange.\nAccuracy is NOT guaranteed. Scan the QR Code to verify {counter} official data. Invest wisely.")
+    pdf.ln(7)
+    pdf.set_font("DejaVu", "B", 10)
+    pdf.set_text_color(0)
+    pdf.cell(0, 10, f"For more information about {counter}, Scan the QR Code.")
+
+    # === QR Code for the MSE company page, embedded straight from memory ===
+    pdf.image(assets.qr(counter), x=160, y=240, w=40, h=40)
+
+    return bytes(pdf.output())
+
+def report_filename(counter):
+    return f"{counter.upper()}-Fundamentals-Report.pdf"
+
+# ========== BATCH ==========
+def _warm_worker():
+    # Runs once per pool process: every report that worker renders reuses these fonts and logos
+    assets._load()
+
+def _timed_render(counter, company, price):
+    started = time.perf_counter()
+    return render_report(counter, company, price), time.perf_counter() - started
+
+def render_many(jobs, workers=None):
+    """Render (counter, company, price) jobs across a process pool, yielding (counter, pdf) as each finishes.
+
+    Workers are spawned rather than forked, so a pool started from a threaded
+    server never inherits a lock held by another thread.
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_warm_worker) as pool:
+        futures = {pool.submit(_timed_render, counter, company, price): counter for counter, company, price in jobs}
+        for future in as_completed(futures):
+            # Timings recorded inside a worker stay in that process, so the parent records them
+            pdf, seconds = future.result()
+            instrumentation.pdf_seconds.observe(seconds, 'render')
+            yield futures[future], pdf
+
+class _ChunkBuffer:
+    # Write-only file object for zipfile; the generator below drains it after each entry
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def zip_stream(reports):
+    """ZIP archive of (counter, pdf) pairs, yielded in pieces as each report is added."""
+    buffer = _ChunkBuffer()
+    # PDFs are already compressed, so entries are stored as-is
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for counter, pdf in reports:
+            archive.writestr(report_filename(counter), pdf)
+            yield buffer.take()
+    yield buffer.take()
+
+# ========== CACHE ==========
+class ReportCache:
+    """Finished PDFs keyed by (counter, latest price timestamp, fundamentals version).
+
+    A request whose key matches is answered from memory. After a scrape,
+    regenerate() re-renders changed reports on a single background thread so the
+    next download is already warm.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reports = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-render")
+
+    def get(self, key):
+        entry = self._reports.get(key[0])
+        return entry[1] if entry and entry[0] == key else None
+
+    def get_or_render(self, key, render):
+        report = self.get(key)
+        if report is None:
+            with self._lock:
+                report = self.get(key)
+                if report is None:
+                    report = render()
+                    self._reports[key[0]] = (key, report)
+        return report
+
+    def regenerate(self, jobs):
+        """jobs: iterable of (key, render) pairs; stale ones are rendered in the background."""
+        for key, render in jobs:
+            if self.get(key) is None:
+                self._executor.submit(self._render_quietly, key, render)
+
+    def _render_quietly(self, key, render):
+        try:
+            self.get_or_render(key, render)
+        except Exception as e:
+            print(f"Report regeneration failed for {key[0]}:", e)
+
+cache = ReportCache()
@@ -0,0 +1,104 @@
+# StockMate response cache: read endpoints answered from memory (or with a 304) until the next save_data
+
+import functools, hashlib, threading, time
+from collections import OrderedDict
+from flask import request, Response
+import db, scheduling
+
+MAX_ENTRIES = 512   # distinct route + query-string combinations kept per process
+PASSED_HEADERS = ('Link', 'X-Next-Cursor')   # view headers replayed with a cached body
+
+# ========== GENERATION ==========
+# One counter in the meta table, bumped by save_data whenever a scrape stores new ticks.
+# Every process reads it from the database, so a bump in one gunicorn worker (or the
+# scheduler) invalidates the caches of all of them.
+def create_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0), ('generation_at', 0)")
+
+def bump(conn):
+    """Advance the generation inside the caller's transaction and return the new value."""
+    conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+    conn.execute("UPDATE meta SET value = ? WHERE key = 'generation_at'", (int(time.time()),))
+    return conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+
+def current():
+    """(generation, unix time of the scrape leader's next scrape, 0 if none is scheduled)."""
+    rows = dict(db.query("SELECT key, value FROM meta WHERE key IN ('generation', 'next_scrape')"))
+    return rows.get('generation', 0), rows.get('next_scrape', 0)
+
+# ========== CACHE ==========
+def _etag_matches(header, etag):
+    if not header:
+        return False
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+class ResponseCache:
+    """Bodies of successful GET responses keyed by path and query string, valid for one generation.
+
+    Responses carry a strong ETag (a hash of the body), so a client that sends it
+    back in If-None-Match gets an empty 304, even across a generation change if its
+    route's output didn't change. Cache-Control max-age runs until the stored
+    figures can next change: the scheduler's next scrape in trading hours, the
+    next open while the market is closed (scheduling.fresh_for).
+    """
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (generation, etag, body, mimetype, headers)
+
+    def _get(self, key, generation):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != generation:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _finish(self, response, etag, next_scrape):
+        max_age = scheduling.fresh_for(next_scrape)
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = f'public, max-age={max_age}, must-revalidate'
+        return response
+
+    def cached(self, view):
+        """Decorator for GET views that only depend on the request URL and the stored ticks."""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            generation, next_scrape = current()
+            key = request.full_path
+            entry = self._get(key, generation)
+            if entry is None:
+                response = view(*args, **kwargs)
+                if not isinstance(response, Response) or response.status_code != 200 or response.is_streamed:
+                    # Errors (a tuple with a status, or any non-200) and streams are never cached
+                    return response
+                body = response.get_data()
+                etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+                headers = [(k, v) for k, v in response.headers if k in PASSED_HEADERS]
+                entry = (generation, etag, body, response.mimetype, headers)
+                self._put(key, entry)
+            _, etag, body, mimetype, headers = entry
+            if _etag_matches(request.headers.get('If-None-Match'), etag):
+                return self._finish(Response(status=304, headers=headers), etag, next_scrape)
+            return self._finish(Response(body, mimetype=mimetype, headers=headers), etag, next_scrape)
+        return wrapper
+
+# Shared by every blueprint
+cache = ResponseCache()
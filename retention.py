@@ -0,0 +1,173 @@
+# StockMate retention: raw ticks for RAW_DAYS, hourly candles for HOURLY_DAYS, daily and weekly candles forever
+
+import os, time
+import archive, candles, db, localtime, response_cache
+
+RAW_DAYS = int(os.environ.get('STOCKMATE_RAW_DAYS', archive.KEEP_DAYS))
+HOURLY_DAYS = int(os.environ.get('STOCKMATE_HOURLY_DAYS', '365'))
+# Ticks leaving the stocks table go to the Parquet archive first, unless this is 0
+ARCHIVE_TICKS = os.environ.get('STOCKMATE_ARCHIVE_TICKS', '1') != '0'
+DELETE_BATCH = archive.DELETE_BATCH   # rows deleted per transaction, so a scrape never waits long for the lock
+VACUUM_STEP = 2000                    # free pages handed back to the OS per incremental_vacuum call
+BUCKET_SECONDS = {'1h': 3600, '1d': 86400}
+
+# ========== FLOORS ==========
+# meta.raw_before: stocks holds every tick from here on and none before.
+# meta.hourly_before: 1h candles exist from here on; older spans only have 1d/1w candles.
+# Both are advanced before anything is deleted, so readers switch tiers first and never see a gap.
+def floors(conn=None):
+    """(raw_before, hourly_before) epochs, 0 while nothing has been pruned."""
+    sql = "SELECT key, value FROM meta WHERE key IN ('raw_before', 'hourly_before')"
+    values = dict(conn.execute(sql).fetchall() if conn is not None else db.query(sql))
+    return values.get('raw_before', 0), values.get('hourly_before', 0)
+
+def tick_source(counter, floor=0):
+    """(sql, params) selecting one counter's (timestamp, last_price, id) points at or after floor.
+
+    Each span is read from the tier that holds it: raw ticks from raw_before on,
+    hourly closes from hourly_before, daily closes before that. Candle points are
+    stamped with the start of their bucket and carry id 0. Callers wrap it as a
+    subquery and add their own filters, ordering and keyset.
+    """
+    raw_before, hourly_before = floors()
+    hourly_before = min(hourly_before, raw_before)
+    sql = 'SELECT timestamp, last_price, id FROM stocks WHERE counter = ? AND timestamp >= ?'
+    params = [counter, max(floor, raw_before)]
+    for interval, low, high in (('1h', max(floor, hourly_before), raw_before), ('1d', floor, hourly_before)):
+        if high > low:
+            # Only whole buckets inside [low, high), so a candle never overlaps the finer tier after it
+            sql += f'''
+                UNION ALL
+                SELECT start, close, 0 FROM (
+                    SELECT CAST(strftime('%s', bucket) AS INTEGER) AS start, close FROM candles
+                    WHERE counter = ? AND interval = ?
+                ) WHERE start >= ? AND start + {BUCKET_SECONDS[interval]} <= ?'''
+            params += [counter, interval, low, high]
+    return sql, params
+
+def candles_sql(counter, interval, start=None, end=None, after=None):
+    """candles.query_sql(), with daily candles standing in for the 1h ones pruned before hourly_before."""
+    _, hourly_before = floors()
+    if interval != '1h' or not hourly_before or (start and start >= hourly_before):
+        return candles.query_sql(counter, interval, start, end, after)
+    daily, daily_params = candles.query_sql(counter, '1d', start, min(end, hourly_before) if end else hourly_before, after)
+    hourly, hourly_params = candles.query_sql(counter, '1h', max(start or 0, hourly_before), end, after)
+    # Daily buckets ('YYYY-MM-DD') sort before the hourly ones of later days, so one ORDER BY bucket still works
+    return f'SELECT * FROM ({daily}) UNION ALL SELECT * FROM ({hourly}) ORDER BY bucket', daily_params + hourly_params
+
+# ========== PRUNE ==========
+def _delete_batched(sql, params):
+    # sql deletes at most DELETE_BATCH rows (its last parameter); repeat until a short batch
+    deleted = 0
+    while True:
+        with db.transaction() as conn:
+            count = conn.execute(sql, list(params) + [DELETE_BATCH]).rowcount
+        deleted += count
+        if count < DELETE_BATCH:
+            return deleted
+
+def _fill_candles(conn, counter, before):
+    """Build any missing 1h/1d/1w candles from ticks older than before; existing candles are left alone.
+
+    save_data rolls every tick up as it lands, so normally nothing is missing;
+    this covers rows bulk-loaded around it before those rows are deleted.
+    """
+    filled = 0
+    for interval, bucket in candles.INTERVALS.items():
+        filled += conn.execute(f'''
+            INSERT INTO candles (counter, interval, bucket, open, high, low, close, volume, turnover, ticks)
+            SELECT DISTINCT counter, ?, bucket,
+                   FIRST_VALUE(last_price) OVER w, MAX(last_price) OVER w, MIN(last_price) OVER w,
+                   LAST_VALUE(last_price) OVER w, SUM(COALESCE(volume, 0)) OVER w,
+                   SUM(COALESCE(turnover, 0)) OVER w, COUNT(*) OVER w
+            FROM (SELECT counter, {bucket.format(ts='timestamp')} AS bucket, last_price, volume, turnover, timestamp, id
+                  FROM stocks WHERE counter = ? AND timestamp < ? AND last_price IS NOT NULL)
+            WHERE true
+            WINDOW w AS (PARTITION BY bucket ORDER BY timestamp, id ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+            ON CONFLICT (counter, interval, bucket) DO NOTHING
+        ''', (interval, counter, before)).rowcount
+    return filled
+
+def _file_bytes():
+    return sum(os.path.getsize(path) for path in (db.DB_PATH, db.DB_PATH + '-wal') if os.path.exists(path))
+
+def vacuum():
+    """Hand free pages back to the filesystem a step at a time; returns pages freed.
+
+    A database created before auto_vacuum was INCREMENTAL needs one full VACUUM to
+    switch modes; that one run holds the write lock for as long as it takes.
+    """
+    with db.connection() as conn:
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            print("Switching database.db to incremental auto_vacuum (one full VACUUM)...")
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+        freed = 0
+        while True:
+            free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if not free:
+                break
+            conn.execute(f'PRAGMA incremental_vacuum({VACUUM_STEP})').fetchall()
+            freed += free - conn.execute('PRAGMA freelist_count').fetchone()[0]
+        # The file only shrinks once the WAL has been written back into it
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+    return freed
+
+def run(raw_days=RAW_DAYS, hourly_days=HOURLY_DAYS, archive_ticks=ARCHIVE_TICKS, now=None):
+    """Move every tier along, then vacuum. Returns a report with the bytes reclaimed.
+
+    1. Missing candles are built for ticks leaving the raw tier.
+    2. Those ticks go to the Parquet archive (archive.compact) or, with archive_ticks off, are deleted.
+    3. Indicator rows for ticks no longer in stocks are deleted; indicator_state is kept.
+    4. 1h candles older than hourly_days are deleted; 1d and 1w candles are kept forever.
+    Every delete runs in DELETE_BATCH-row transactions, and WAL keeps readers going throughout.
+    """
+    if hourly_days < raw_days:
+        raise ValueError("hourly_days must be at least raw_days")
+    started = time.perf_counter()
+    bytes_before = _file_bytes()
+    now = now or localtime.now()
+    # Raw cutoff at local midnight, as archive.compact cuts; hourly cutoff at UTC midnight, where daily buckets start
+    raw_cutoff = (now + localtime.UTC_OFFSET) // 86400 * 86400 - localtime.UTC_OFFSET - raw_days * 86400
+    hourly_cutoff = now // 86400 * 86400 - hourly_days * 86400
+    raw_before, hourly_before = floors()
+    report = {"candles_filled": 0, "ticks_archived": 0, "ticks_deleted": 0, "indicators_deleted": 0,
+              "hourly_candles_deleted": 0}
+
+    if raw_cutoff > raw_before:
+        with db.connection() as conn:
+            counters = [r[0] for r in conn.execute('SELECT DISTINCT counter FROM stocks WHERE timestamp < ?', (raw_cutoff,))]
+        for counter in counters:
+            with db.transaction() as conn:
+                report["candles_filled"] += _fill_candles(conn, counter, raw_cutoff)
+        with db.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('raw_before', ?)", (raw_cutoff,))
+            response_cache.bump(conn)
+        if archive_ticks:
+            compacted = archive.compact(raw_days, now)
+            report["ticks_archived"], report["ticks_deleted"] = compacted["rows"], compacted["deleted"]
+        report["ticks_deleted"] += _delete_batched(
+            'DELETE FROM stocks WHERE id IN (SELECT id FROM stocks WHERE timestamp < ? LIMIT ?)', [raw_cutoff])
+        for counter in counters:
+            report["indicators_deleted"] += _delete_batched('''
+                DELETE FROM indicators WHERE id IN (
+                    SELECT id FROM indicators WHERE counter = ? AND timestamp < ? LIMIT ?)
+            ''', [counter, raw_cutoff])
+
+    if hourly_cutoff > hourly_before:
+        with db.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('hourly_before', ?)", (hourly_cutoff,))
+            response_cache.bump(conn)
+        for (counter,) in db.query("SELECT DISTINCT counter FROM candles WHERE interval = '1d'"):
+            report["hourly_candles_deleted"] += _delete_batched('''
+                DELETE FROM candles WHERE (counter, interval, bucket) IN (
+                    SELECT counter, interval, bucket FROM candles
+                    WHERE counter = ? AND interval = '1h' AND bucket < strftime('%Y-%m-%d %H:00:00', ?, 'unixepoch') LIMIT ?)
+            ''', [counter, hourly_cutoff])
+
+    report["pages_freed"] = vacuum()
+    bytes_after = _file_bytes()
+    return {"raw_before": localtime.format_local(max(raw_cutoff, raw_before)),
+            "hourly_before": localtime.format_local(max(hourly_cutoff, hourly_before)), **report,
+            "bytes_before": bytes_before, "bytes_after": bytes_after, "bytes_reclaimed": bytes_before - bytes_after,
+            "seconds": round(time.perf_counter() - started, 3)}
@@ -0,0 +1 @@
+# StockMate HTTP routes: one blueprint per area, registered by app.create_app()
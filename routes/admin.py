@@ -0,0 +1,87 @@
+# StockMate admin blueprint: the fundamentals editor, plus the Prometheus and profiler endpoints
+
+import os
+from flask import Blueprint, request, jsonify, render_template_string, redirect, url_for, session, send_file, Response
+import instrumentation
+from fundamentals_store import store as fundamentals
+
+bp = Blueprint('admin', __name__, cli_group=None)
+
+# =============== ❌ ADMIN PANEL ❌ ===============
+
+
+@bp.route('/admin', methods=['GET', 'POST'])
+def admin_login():
+    if request.method == 'POST':
+        if request.form['password'] == "StockMateAdmin@47":
+            session['logged_in'] = True
+            return redirect(url_for('.admin_dashboard'))
+        return r"Oops!! That Key Doesn't Fit the Lock!", 403
+
+    return render_template_string("""
+        <h2>StockMate Admin Login</h2>
+        <form method="POST">
+            <input type="password" name="password" placeholder="Insert Your Key Here"/>
+            <button type="submit">Unlock the Vault</button>
+        </form>
+    """)
+
+@bp.route('/admin/dashboard')
+def admin_dashboard():
+    if not session.get('logged_in'):
+        return redirect(url_for('.admin_login'))
+
+    data = fundamentals.raw()
+
+    html = "<h2>Company Fundamentals</h2><ul>"
+    for k in sorted(data.keys()):
+        html += f"<li><strong>{k}</strong> — <a href='/admin/edit/{k}'>Edit</a></li>"
+    html += "</ul>"
+    return html
+
+@bp.route('/admin/edit/<company>', methods=['GET', 'POST'])
+def edit_company(company):
+    if not session.get('logged_in'):
+        return redirect(url_for('.admin_login'))
+
+    company = company.upper()
+
+    if request.method == 'POST':
+        fundamentals.update({company: {
+            "net_profit": request.form['net_profit'],
+            "number_of_shares_in_issue": request.form['number_of_shares_in_issue'],
+            "dividend_paid": request.form['dividend_paid'],
+            "book_value": request.form['book_value']
+        }})
+        return redirect(url_for('.admin_dashboard'))
+
+    values = fundamentals.raw().get(company, {"net_profit":"", "number_of_shares_in_issue":"", "dividend_paid":"", "book_value":""})
+
+    return render_template_string(f"""
+        <h2>Edit Fundamentals for {company}</h2>
+        <form method="POST">
+            Net Profit: <input name="net_profit" value="{values['net_profit']}"/><br>            
+            Number of Shares Issued: <input name="number_of_shares_in_issue" value="{values['number_of_shares_in_issue']}"/><br>
+            Dividend Paid: <input name="dividend_paid" value="{values['dividend_paid']}"/><br>
+            Book Value: <input name="book_value" value="{values['book_value']}"/><br>
+            <button type="submit">Save</button>
+        </form>
+        <a href="/admin/dashboard">← Back to dashboard</a>
+    """)
+    
+
+# ========== INSTRUMENTATION ==========
+@bp.route('/metrics/prom', methods=['GET'])
+def prometheus_metrics():
+    # Request, SQL, scrape-stage and PDF timings for this worker process, in Prometheus text format
+    return Response(instrumentation.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@bp.route('/metrics/profile/<profile_id>', methods=['GET'])
+def profile(profile_id):
+    # Folded stacks of a request sent with X-Profile: <STOCKMATE_PROFILE_TOKEN>; its id came back in X-Profile-Id
+    if not instrumentation.PROFILE_TOKEN or request.headers.get('X-Profile') != instrumentation.PROFILE_TOKEN:
+        return jsonify({"error": "Profiling is not enabled"}), 404
+    path = instrumentation.profile_path(profile_id)
+    if not path:
+        return jsonify({"error": "Profile not found"}), 404
+    return send_file(os.path.abspath(path), mimetype='text/plain')
@@ -0,0 +1,107 @@
+# StockMate extraction blueprint: company report downloads and fundamentals pulled out of the PDFs
+# requests (downloader) and PyMuPDF (extraction) are imported inside the views, on first use.
+
+import os, time, click
+from flask import Blueprint, request, jsonify
+from fundamentals_store import store as fundamentals
+
+bp = Blueprint('extraction', __name__, cli_group=None)
+
+# ========== FINANCIAL REPORTS PDF DOWNLOAD ==========
+@bp.route('/download_sample_reports/<company>', methods=['GET'])
+def download_sample_reports(company):
+    from downloader import downloader
+    company = company.upper()
+    if company not in downloader.urls:
+        return jsonify({"error": f"No sample report found for {company}"}), 404
+
+    try:
+        result = downloader.download(company)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    message = "Downloaded" if result["status"] == "downloaded" else "Unchanged"
+    return jsonify({"message": message, "company": company, **result})
+
+@bp.route('/download_sample_reports', methods=['GET'])
+def download_all_sample_reports():
+    from downloader import downloader
+    results = downloader.download_all(request.args.getlist('company') or None)
+    return jsonify(results)
+
+@bp.cli.command('download')
+@click.argument('companies', nargs=-1)
+def download_command(companies):
+    """Download the latest report for every company (or the ones named) into reports/<company>/."""
+    from downloader import downloader
+    for company, result in downloader.download_all(list(companies) or None).items():
+        status = result.get("error") or f"{result['status']} {result['file']} ({result['bytes']:,} bytes, {result['seconds']}s)"
+        print(f"{company:<10} {status}")
+
+# ========== FUNDAMENTAL EXTRACT ==========
+@bp.route('/extract_fundamentals/<company>', methods=['GET'])
+def extract_fundamentals(company):
+    company = company.upper()
+    folder = f'reports/{company}'
+    if not os.path.exists(folder):
+        return jsonify({"error": "No reports found for this company"}), 404
+
+    import extraction
+    pdf_path = extraction.latest_report(company)
+    if not pdf_path:
+        return jsonify({"error": "No PDF files found"}), 404
+
+    try:
+        found = extraction.extract_file(pdf_path)
+    except Exception as e:
+        return jsonify({"error": f"Failed to open PDF: {str(e)}"}), 500
+
+    # Merge what was found into the live fundamentals; other companies and missed fields are left alone
+    if found:
+        fundamentals.update({company: found}, merge_fields=True)
+
+    return jsonify(extraction.fundamentals_record(company, found))
+
+def extract_all_fundamentals(workers=None):
+    """Bulk extraction for every company folder under reports/, merged into fundamentals.json in one atomic write."""
+    import extraction
+    started = time.perf_counter()
+    results = extraction.extract_all(workers)
+    changes = {company: result["found"] for company, result in results.items() if result["found"]}
+    if changes:
+        fundamentals.update(changes, merge_fields=True)
+    return {"companies": results, "updated": sorted(changes), "seconds": round(time.perf_counter() - started, 3)}
+
+@bp.route('/extract_fundamentals', methods=['GET'])
+def extract_fundamentals_all():
+    try:
+        return jsonify(extract_all_fundamentals(request.args.get('workers', type=int)))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.cli.command('extract')
+@click.option('--workers', type=int, default=None, help="scan processes (default: one per core)")
+def extract_command(workers):
+    """Extract fundamentals from every company's latest report and merge them into fundamentals.json."""
+    summary = extract_all_fundamentals(workers)
+    for company, result in summary["companies"].items():
+        status = result.get("error") or f"found {len(result['found'])}/4, missing {', '.join(result['missing']) or 'none'}"
+        print(f"{company:<10} {result['seconds']:>8.3f}s {'(cached) ' if result['cached'] else ''}{status}")
+    print(f"Updated {len(summary['updated'])} companies in {summary['seconds']}s")
+
+# ========== DEBUG TEXT ROUTE ==========
+@bp.route('/debug_pdf_text/<company>', methods=['GET'])
+def debug_pdf_text(company):
+    company = company.upper()
+    folder = f'reports/{company}'
+
+    files = [f for f in os.listdir(folder) if f.endswith('.pdf')]
+    if not files:
+        return jsonify({"error": "No PDF found"}), 404
+
+    path = os.path.join(folder, files[0])
+    import extraction
+    try:
+        return extraction.leading_text(path, 10000)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
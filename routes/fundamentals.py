@@ -0,0 +1,109 @@
+# StockMate fundamentals blueprint: per-counter ratios, the bulk /metrics valuation and the /screen screener
+
+from flask import Blueprint, request, jsonify
+import db, localtime, paging, screener
+from fundamentals_store import store as fundamentals
+from valuation import value_quotes
+
+bp = Blueprint('fundamentals', __name__, cli_group=None)
+
+# ========== FUNDAMENTALS ==========
+@bp.route('/fundamentals/<counter>', methods=['GET'])
+def get_fundamentals(counter):
+    try:
+        company = fundamentals.get(counter)
+        if not company:
+            return jsonify({"error": "Data not available for this company"}), 404
+        if company.error:
+            return jsonify({"error": f"Parsing error: {company.error}"}), 500
+
+        eps, bvps, dvps = company.eps, company.bvps, company.dvps
+
+        # Fetch latest price
+        result = db.query_one('SELECT last_price FROM latest_quotes WHERE counter = ?', (counter,))
+
+        if result and result[0] is not None:
+            price = result[0]
+        else:
+            return jsonify({"error": "Price data not available"}), 404
+
+        pe_ratio = price / eps if eps else None
+        pb_ratio = price / bvps if bvps else None
+        div_yield = (dvps / price) * 100 if price else None
+        
+        return jsonify({
+            "eps": f"{eps:.2f}",
+            "pe_ratio": f"{pe_ratio:.2f}" if pe_ratio else "N/A",
+            "pb_ratio": f"{pb_ratio:.2f}" if pb_ratio else "N/A",
+            "div_yield": f"{div_yield:.2f}%" if div_yield else "N/A"
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/metrics', methods=['GET'])
+def all_metrics():
+    # Every counter in one call: latest_quotes x fundamentals store, valued as arrays
+    try:
+        quotes = db.query('SELECT counter, last_price, change, volume, turnover, timestamp FROM latest_quotes ORDER BY counter')
+        metrics = value_quotes(quotes, fundamentals.companies())
+        for row, ts in zip(metrics, localtime.format_many(row["timestamp"] for row in metrics)):
+            row["timestamp"] = ts
+        return jsonify(metrics)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/screen', methods=['GET'])
+def screen():
+    # e.g. /screen?filter=pe<8,dy>5&sort=pb&limit=10 -- "P/E under 8 and dividend yield over 5%, cheapest P/B first".
+    # ?filter= may repeat; conditions are ANDed. ?sort= is a comma list, '-' for descending. Ratios shown as
+    # "N/A" by /metrics are null here and never match a filter. Not cached: fundamentals edits apply at once.
+    try:
+        limit = paging.parse_limit(request.args.get('limit'), screener.MAX_LIMIT, screener.MAX_LIMIT)
+        rows = screener.screen(request.args.getlist('filter'), request.args.get('sort'), limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    keys = ('counter',) + screener.COLUMNS
+    return jsonify([{**dict(zip(keys, row)), "timestamp": ts} for row, ts in zip(rows, localtime.format_many(r[-1] for r in rows))])
+
+@bp.route('/metrics/<counter>', methods=['GET'])
+def stock_metrics(counter):
+    try:
+        company = fundamentals.get(counter)
+        if not company:
+            return jsonify({"error": "Fundamentals not found"}), 404
+        if company.error:
+            return jsonify({"error": f"Parsing error: {company.error}"}), 500
+
+        eps, bvps, dvps = company.eps, company.bvps, company.dvps
+        
+        # Fetch latest stock data
+        result = db.query_one('''
+            SELECT last_price, change, volume, turnover, timestamp
+            FROM latest_quotes
+            WHERE counter = ?
+        ''', (counter,))
+
+        if not result:
+            return jsonify({"error": "Latest Price data not found"}), 404
+
+        price = result[0] or 0
+
+        pe_ratio = price / eps if eps else None
+        pb_ratio = price / bvps if bvps else None
+        div_yield = (dvps / price) * 100 if price else None
+
+        return jsonify({
+            "counter": counter.upper(),
+            "last_price": f"{price:.2f}",
+            "change": result[1],
+            "volume": result[2],
+            "turnover": result[3],
+            "timestamp": localtime.format_local(result[4]),
+            "eps": f"{eps:.2f}",
+            "pe_ratio": f"{pe_ratio:.2f}" if pe_ratio else "N/A",
+            "pb_ratio": f"{pb_ratio:.2f}" if pb_ratio else "N/A",
+            "div_yield": f"{div_yield:.2f}%" if div_yield else "N/A"
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
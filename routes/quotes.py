@@ -0,0 +1,281 @@
+# StockMate quotes blueprint: scraping, ticks, latest prices, live stream, history, indicators and export
+
+import itertools, json, os, time, click
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify, Response
+import db, candles, live, localtime, paging, archive, indicators, response_cache, retention
+from ingest import scrape_mse, save_data, quote_dicts
+from response_cache import cache
+from routes import reports
+
+bp = Blueprint('quotes', __name__, cli_group=None)
+
+# ========== API ROUTES ==========
+@bp.route('/')
+def home():
+    return "Hello There! StockMate API is Running!"
+
+@bp.route('/scrape', methods=['GET'])
+def scrape_and_save():
+    data = scrape_mse()
+    if data is None:
+        return jsonify({"message": "No changes since the last scrape", "count": 0})
+    if data:
+        save_data(data)
+        reports.regenerate_reports()
+        return jsonify({"message": "Success!! Data Scraped and Saved", "count": len(data)})
+    else:
+        return jsonify({"error": "Failed to scrape data"}), 500
+
+def _tick_key(row):
+    # Keyset position of a row whose last two columns are timestamp, id
+    return row[-2], row[-1]
+
+@bp.route('/stocks', methods=['GET'])
+@cache.cached
+def get_stocks():
+    # Newest ticks first, ?limit= (default 20) per page; follow X-Next-Cursor / Link via ?cursor=.
+    # ?stream=json|ndjson streams every tick from the cursor on (or just ?limit= of them).
+    try:
+        limit = paging.parse_limit(request.args.get('limit'), 20, 1000)
+        after = paging.decode_cursor(request.args.get('cursor'), 2)
+        fmt = paging.stream_format()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    sql = 'SELECT counter, last_price, change, volume, turnover, timestamp, id FROM stocks'
+    params = []
+    if after:
+        sql += ' WHERE (timestamp, id) < (?, ?)'
+        params.extend(after)
+    sql += ' ORDER BY timestamp DESC, id DESC'
+    if fmt:
+        return paging.stream(sql, params, quote_dicts, fmt, request.args.get('limit') and limit)
+    return paging.page(sql, params, quote_dicts, _tick_key, limit)
+
+def latest_quote_rows():
+    return db.query('''
+        SELECT counter, last_price, change, volume, turnover, timestamp
+        FROM latest_quotes
+        ORDER BY counter
+    ''')
+
+@bp.route('/latest_prices', methods=['GET'])
+@cache.cached
+def latest_prices():
+    return jsonify(quote_dicts(latest_quote_rows()))
+
+def _price_snapshot():
+    # Generation first: if a scrape lands in between, its diff is sent again on top of a newer snapshot, which is harmless
+    generation, _ = response_cache.current()
+    return generation, quote_dicts(latest_quote_rows())
+
+@bp.route('/stream/prices', methods=['GET'])
+def stream_prices():
+    # Server-Sent Events: a "snapshot" of every counter, then a "prices" event per scrape with only the counters that moved.
+    # EventSource reconnects send Last-Event-ID; ?last_event_id= does the same for clients that can't set headers.
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    return Response(live.hub.stream(last_event_id, _price_snapshot), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def _price_points(rows):
+    return [{"timestamp": ts, "price": row[1]} for row, ts in zip(rows, localtime.format_many(row[0] for row in rows))]
+
+@bp.route('/price_history/<counter>', methods=['GET'])
+@cache.cached
+def price_history(counter):
+    # The latest ?limit= (default 10) ticks, oldest first; the next cursor pages further back in time.
+    # Streams (?stream=json|ndjson) run newest first, since they can't be reversed without buffering.
+    # Past the raw retention tier the points are hourly, then daily, closes.
+    try:
+        limit = paging.parse_limit(request.args.get('limit'), 10, 1000)
+        before = paging.decode_cursor(request.args.get('cursor'), 2)
+        fmt = paging.stream_format()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    source, params = retention.tick_source(counter)
+    sql = f'SELECT timestamp, last_price, id FROM ({source}) WHERE 1'
+    if before:
+        sql += ' AND (timestamp, id) < (?, ?)'
+        params.extend(before)
+    sql += ' ORDER BY timestamp DESC, id DESC'
+    if fmt:
+        return paging.stream(sql, params, _price_points, fmt, request.args.get('limit') and limit)
+    return paging.page(sql, params, lambda rows: _price_points(rows[::-1]), lambda row: (row[0], row[2]), limit)
+
+def parse_range_arg(value, is_end=False):
+    """?start= / ?end= (UTC 'YYYY-MM-DD[ HH:MM:SS]') as epoch seconds. A bare date means the whole day; end is returned exclusive."""
+    if not value:
+        return None
+    value = value.replace('T', ' ')
+    if len(value) == 10:
+        moment = datetime.strptime(value, '%Y-%m-%d')
+        step = timedelta(days=1)
+    else:
+        moment = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+        step = timedelta(seconds=1)
+    if is_end:
+        moment += step
+    return localtime.to_epoch(moment)
+
+def _candle_dicts(rows):
+    return [{
+        "date": r[0], "open": r[1], "high": r[2], "low": r[3], "close": r[4],
+        "volume": r[5], "turnover": r[6], "price": r[4]
+    } for r in rows]
+
+def _history_points(rows):
+    return [{"date": row[0], "price": row[1]} for row in rows]
+
+@bp.route('/history/<counter>', methods=['GET'])
+@cache.cached
+def get_price_history(counter):
+    # ?interval=raw (every tick, default) | 1h | 1d | 1w, optional ?start= and ?end= (inclusive dates).
+    # Spans past a retention tier come from the next coarser one (raw -> 1h -> 1d) in the same row shape.
+    # Oldest first, ?limit= (default 5000) per page with X-Next-Cursor / Link for the next one;
+    # ?stream=json|ndjson returns the whole range (or ?limit= rows) in constant memory.
+    # Raw ticks with neither ?limit= nor ?cursor= stream the whole range too, as /history always returned it.
+    interval = request.args.get('interval', 'raw')
+    if interval != 'raw' and interval not in candles.INTERVALS:
+        return jsonify({"error": f"Unknown interval '{interval}'. Use raw, {', '.join(candles.INTERVALS)}"}), 400
+    try:
+        start = parse_range_arg(request.args.get('start'))
+        end = parse_range_arg(request.args.get('end'), is_end=True)
+    except ValueError:
+        return jsonify({"error": "start/end must be YYYY-MM-DD or YYYY-MM-DD HH:MM:SS"}), 400
+    try:
+        limit = paging.parse_limit(request.args.get('limit'), 5000, 50000)
+        after = paging.decode_cursor(request.args.get('cursor'), 1 if interval != 'raw' else 2)
+        fmt = paging.stream_format()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    stream_limit = request.args.get('limit') and limit
+
+    try:
+        if interval != 'raw':
+            sql, params = retention.candles_sql(counter, interval, start, end, after[0] if after else None)
+            if fmt:
+                return paging.stream(sql, params, _candle_dicts, fmt, stream_limit)
+            return paging.page(sql, params, _candle_dicts, lambda r: (r[0],), limit)
+
+        if not (fmt or request.args.get('limit') or after):
+            fmt = 'json'
+        # Days compacted into the archive come first, then the database tiers from archived_before on
+        source, params = retention.tick_source(counter, archive.archived_before())
+        sql = f'''
+            SELECT date(timestamp, 'unixepoch'), last_price, timestamp, id
+            FROM ({source})
+            WHERE last_price IS NOT NULL
+        '''
+        if start:
+            sql += ' AND timestamp >= ?'
+            params.append(start)
+        if end:
+            sql += ' AND timestamp < ?'
+            params.append(end)
+        if after:
+            sql += ' AND (timestamp, id) > (?, ?)'
+            params.extend(after)
+        sql += ' ORDER BY timestamp, id'
+        archived = archive.history_batches(counter, start, end, after)
+        if fmt:
+            return paging.stream(sql, params, _history_points, fmt, stream_limit, head=archived)
+        return paging.page(sql, params, _history_points, _tick_key, limit, head=itertools.chain.from_iterable(archived))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# ========== INDICATORS ==========
+@bp.route('/indicators/<counter>', methods=['GET'])
+@cache.cached
+def get_indicators(counter):
+    # ?set=sma20,rsi14,vwap (default: every persisted indicator) as of the counter's latest tick.
+    # With ?start= / ?end= / ?cursor= it pages through the stored series instead, oldest first, like /history.
+    counter = counter.upper()
+    try:
+        names = indicators.parse_set(request.args.get('set'))
+        limit = paging.parse_limit(request.args.get('limit'), 5000, 50000)
+        after = paging.decode_cursor(request.args.get('cursor'), 2)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        start = parse_range_arg(request.args.get('start'))
+        end = parse_range_arg(request.args.get('end'), is_end=True)
+    except ValueError:
+        return jsonify({"error": "start/end must be YYYY-MM-DD or YYYY-MM-DD HH:MM:SS"}), 400
+
+    if not (start or end or after):
+        with db.connection() as conn:
+            row = indicators.latest(conn, counter, names)
+        if not row:
+            return jsonify({"error": "No indicators for this counter"}), 404
+        return jsonify({"counter": counter, "timestamp": localtime.format_local(row[0]), **dict(zip(names, row[1:]))})
+
+    def to_dicts(rows):
+        return [{"timestamp": ts, **dict(zip(names, row))} for row, ts in zip(rows, localtime.format_many(r[-2] for r in rows))]
+    sql, params = indicators.series_sql(counter, names, start, end, after)
+    return paging.page(sql, params, to_dicts, _tick_key, limit)
+
+@bp.cli.command('indicators')
+@click.option('--counter', 'counters', multiple=True, help="repeat for several; default every counter")
+def indicators_command(counters):
+    """Recompute stored indicators from each counter's full history (archive included)."""
+    with db.connection() as conn:
+        names = [c.upper() for c in counters] or indicators.counters(conn)
+    for counter in names:
+        started = time.perf_counter()
+        with db.transaction() as conn:
+            rows = indicators.backfill(conn, counter)
+        print(f"{counter}: {rows:,} ticks in {time.perf_counter() - started:.2f}s")
+
+# ========== ARCHIVE / EXPORT ==========
+EXPORT_FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+@bp.route('/export', methods=['GET'])
+def export_ticks():
+    # Typed tick history (archive + hot table) as one Parquet file or an Arrow IPC stream, written batch by batch.
+    # ?format=parquet (default) | arrow, optional ?counter=, ?start=, ?end= as for /history.
+    fmt = request.args.get('format', 'parquet')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        start = parse_range_arg(request.args.get('start'))
+        end = parse_range_arg(request.args.get('end'), is_end=True)
+    except ValueError:
+        return jsonify({"error": "start/end must be YYYY-MM-DD or YYYY-MM-DD HH:MM:SS"}), 400
+    counter = request.args.get('counter')
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    filename = f"StockMate-ticks-{counter.upper() if counter else 'all'}.{extension}"
+    return Response(archive.export_stream(fmt, counter, start, end), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@bp.cli.command('archive')
+@click.option('--keep-days', type=int, default=archive.KEEP_DAYS, help="days of ticks left in the stocks table")
+def archive_command(keep_days):
+    """Compact closed days of ticks from the stocks table into Parquet under archive/."""
+    print(json.dumps(archive.compact(keep_days)))
+
+@bp.cli.command('retention')
+@click.option('--raw-days', type=int, default=retention.RAW_DAYS, help="days of raw ticks kept in the stocks table")
+@click.option('--hourly-days', type=int, default=retention.HOURLY_DAYS, help="days of 1h candles kept; 1d/1w are kept forever")
+@click.option('--archive/--no-archive', 'archive_ticks', default=retention.ARCHIVE_TICKS,
+              help="compact ticks leaving the stocks table into Parquet first (default) or just delete them")
+def retention_command(raw_days, hourly_days, archive_ticks):
+    """Move ticks and candles down the retention tiers, vacuum database.db and report the bytes reclaimed."""
+    print(json.dumps(retention.run(raw_days, hourly_days, archive_ticks)))
+
+@bp.cli.command('export')
+@click.argument('out')
+@click.option('--counter', default=None)
+@click.option('--start', default=None, help="YYYY-MM-DD[ HH:MM:SS], UTC")
+@click.option('--end', default=None, help="YYYY-MM-DD[ HH:MM:SS], UTC, inclusive")
+def export_command(out, counter, start, end):
+    """Write tick history to OUT; .arrow/.arrows gives an Arrow IPC stream, anything else Parquet."""
+    fmt = 'arrow' if out.endswith(('.arrow', '.arrows')) else 'parquet'
+    with open(out, 'wb') as f:
+        for chunk in archive.export_stream(fmt, counter, parse_range_arg(start), parse_range_arg(end, is_end=True)):
+            f.write(chunk)
+    print(f"Wrote {os.path.getsize(out):,} bytes to {out}")
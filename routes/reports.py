@@ -0,0 +1,81 @@
+# StockMate reports blueprint: fundamentals report PDFs, one at a time or every counter as a ZIP
+
+import io, click
+from datetime import datetime, timezone
+from flask import Blueprint, request, jsonify, send_file, Response
+import db
+from fundamentals_store import store as fundamentals
+from migrations import init_db
+
+bp = Blueprint('reports', __name__, cli_group=None)
+
+def _reports():
+    # fpdf, qrcode, Pillow and fontTools come in with the reports module, so only processes that render load them
+    import reports
+    return reports
+
+# ========== FUNDAMENTALS REPORT ==========
+def _report_job(counter, company, quote):
+    # Cache key and renderer for one counter; quote is (last_price, timestamp) from latest_quotes
+    key = (counter.upper(), quote[1], fundamentals.version)
+    return key, lambda: _reports().render_report(counter, company, quote[0])
+
+def _reportable():
+    """(counter, company, (last_price, timestamp)) for every counter with both a price and usable fundamentals."""
+    companies = fundamentals.companies()
+    quotes = db.query('SELECT counter, last_price, timestamp FROM latest_quotes WHERE last_price IS NOT NULL ORDER BY counter')
+    return [(q[0], companies[q[0].upper()], q[1:]) for q in quotes
+            if q[0].upper() in companies and not companies[q[0].upper()].error]
+
+def regenerate_reports():
+    """Re-render, in the background, every report whose price or fundamentals changed."""
+    _reports().cache.regenerate(_report_job(counter, company, quote) for counter, company, quote in _reportable())
+
+@bp.route('/fundamentals_report', methods=['GET'])
+def all_fundamentals_reports():
+    # Every counter's report as one ZIP, rendered across a process pool and streamed as each finishes
+    jobs = [(counter, company, quote[0]) for counter, company, quote in _reportable()]
+    if not jobs:
+        return jsonify({"error": "No reports available"}), 404
+    workers = request.args.get('workers', type=int)
+    filename = f"StockMate-Fundamentals-Reports-{datetime.now(timezone.utc):%Y-%m-%d}.zip"
+    reports = _reports()
+    return Response(reports.zip_stream(reports.render_many(jobs, workers)), mimetype='application/zip',
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+@bp.cli.command('reports')
+@click.option('--out', default=None, help="ZIP path (default: StockMate-Fundamentals-Reports-<date>.zip)")
+@click.option('--workers', type=int, default=None, help="render processes (default: one per core)")
+def reports_command(out, workers):
+    """Render every counter's fundamentals report into one ZIP."""
+    init_db()
+    jobs = [(counter, company, quote[0]) for counter, company, quote in _reportable()]
+    out = out or f"StockMate-Fundamentals-Reports-{datetime.now(timezone.utc):%Y-%m-%d}.zip"
+    reports = _reports()
+    with open(out, 'wb') as f:
+        for chunk in reports.zip_stream(reports.render_many(jobs, workers)):
+            f.write(chunk)
+    print(f"Wrote {len(jobs)} reports to {out}")
+
+@bp.route('/fundamentals_report/<counter>', methods=['GET'])
+def fundamentals_report(counter):
+    try:
+        company = fundamentals.get(counter)
+        if not company:
+            return jsonify({"error": "Data not available for this company"}), 404
+        if company.error:
+            return jsonify({"error": company.error}), 500
+
+        # Get latest stock price
+        result = db.query_one('SELECT last_price, timestamp FROM latest_quotes WHERE counter = ?', (counter,))
+        if not result or result[0] is None:
+            return jsonify({"error": "Price data not available"}), 404
+
+        key, render = _report_job(counter, company, result)
+        reports = _reports()
+        pdf = reports.cache.get_or_render(key, render)
+        return send_file(io.BytesIO(pdf), as_attachment=True, mimetype='application/pdf',
+                         download_name=reports.report_filename(counter))
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
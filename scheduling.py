@@ -0,0 +1,213 @@
+# StockMate scrape scheduling: the MSE trading calendar, a leader lease in SQLite, and an adaptive poll interval
+
+import functools, os, socket, threading, time, uuid
+from datetime import date, datetime, timedelta, time as clock
+import db
+from localtime import LOCAL_TZ
+
+# ========== TRADING CALENDAR ==========
+# MSE trades Monday to Friday, 09:00-15:00 Malawi time, except on public holidays.
+OPEN = clock(9, 0)
+CLOSE = clock(15, 0)
+CLOSE_GRACE = timedelta(minutes=15)   # keep polling a little after the close so the closing figures land
+FIXED_HOLIDAYS = [(1, 1), (1, 15), (3, 3), (5, 1), (5, 14), (7, 6), (10, 15), (12, 25), (12, 26)]
+# One-off closures (YYYY-MM-DD, comma separated) for days the fixed rules don't know about
+EXTRA_CLOSURES = {date.fromisoformat(d.strip()) for d in os.environ.get('STOCKMATE_MARKET_CLOSED', '').split(',') if d.strip()}
+
+def easter(year):
+    """Easter Sunday, Gregorian calendar (anonymous algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+@functools.lru_cache(maxsize=8)
+def holidays(year):
+    """Malawi public holidays in year. One falling on a weekend moves to the next free weekday."""
+    days = set()
+    for month, day in FIXED_HOLIDAYS:
+        observed = date(year, month, day)
+        while observed.weekday() >= 5 or observed in days:
+            observed += timedelta(days=1)
+        days.add(observed)
+    sunday = easter(year)
+    days.update((sunday - timedelta(days=2), sunday + timedelta(days=1)))
+    return frozenset(days)
+
+def is_trading_day(day):
+    return day.weekday() < 5 and day not in holidays(day.year) and day not in EXTRA_CLOSURES
+
+def local_now():
+    return datetime.now(LOCAL_TZ)
+
+def is_open(moment=None):
+    """True from OPEN until CLOSE + CLOSE_GRACE on a trading day; moment is an aware datetime."""
+    moment = (moment or local_now()).astimezone(LOCAL_TZ)
+    if not is_trading_day(moment.date()):
+        return False
+    opens = LOCAL_TZ.localize(datetime.combine(moment.date(), OPEN))
+    return opens <= moment < LOCAL_TZ.localize(datetime.combine(moment.date(), CLOSE)) + CLOSE_GRACE
+
+def next_open(moment=None):
+    """The next session open at or after moment."""
+    moment = (moment or local_now()).astimezone(LOCAL_TZ)
+    day = moment.date()
+    while True:
+        opens = LOCAL_TZ.localize(datetime.combine(day, OPEN))
+        if is_trading_day(day) and opens >= moment:
+            return opens
+        day += timedelta(days=1)
+
+# ========== LEASE ==========
+# Every process may run a scheduler (each gunicorn worker, the Flask reloader's two processes),
+# but only the holder of the lease row scrapes. The holder renews it every RENEW_INTERVAL;
+# if it dies, the lease runs out after LEASE_TTL and another process takes over.
+LEASE_TTL = 180          # seconds; longer than the worst scrape (timeouts plus retry backoff)
+RENEW_INTERVAL = 30      # seconds between renewals, and between followers' attempts to take over
+
+def create_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS scheduler_lease (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires INTEGER NOT NULL
+        )
+    ''')
+
+class Lease:
+    def __init__(self, name, ttl=LEASE_TTL):
+        self.name, self.ttl = name, ttl
+        self.holder = None
+
+    def acquire(self):
+        """Take the lease if it is free or expired, renew it if already ours. True while we hold it."""
+        if self.holder is None:
+            # Decided on first use rather than at import, so workers forked from a preloaded app differ
+            self.holder = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        now = int(time.time())
+        with db.transaction() as conn:
+            conn.execute('''
+                INSERT INTO scheduler_lease (name, holder, expires) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires = excluded.expires
+                WHERE scheduler_lease.holder = excluded.holder OR scheduler_lease.expires <= ?
+            ''', (self.name, self.holder, now + self.ttl, now))
+            holder = conn.execute('SELECT holder FROM scheduler_lease WHERE name = ?', (self.name,)).fetchone()[0]
+        return holder == self.holder
+
+    def release(self):
+        if self.holder is not None:
+            with db.transaction() as conn:
+                conn.execute('DELETE FROM scheduler_lease WHERE name = ? AND holder = ?', (self.name, self.holder))
+
+# ========== SCHEDULER ==========
+MIN_INTERVAL = 60        # seconds between scrapes in trading hours while figures keep changing
+MAX_INTERVAL = 5 * 60    # longest gap in trading hours; unchanged scrapes double the interval up to here
+IDLE_CHECK = 60 * 60     # longest sleep outside trading hours, so a clock change can't oversleep the open
+
+# ========== FRESHNESS ==========
+# The leader records when it will scrape next, so every process can tell clients how long
+# the figures they were just sent stay current (response_cache's Cache-Control max-age).
+def publish_next_scrape(when):
+    with db.transaction() as conn:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_scrape', ?)", (int(when),))
+
+def fresh_for(next_scrape, now=None):
+    """Seconds until stored prices can next change: the next scrape in trading hours, the next open otherwise."""
+    now = now if now is not None else time.time()
+    moment = datetime.fromtimestamp(now, LOCAL_TZ)
+    if not is_open(moment):
+        return max(0, int((next_open(moment) - moment).total_seconds()))
+    # A scrape that is due (or no leader running) means the next one could land at any moment
+    return max(0, int(next_scrape - now))
+
+class ScrapeScheduler:
+    """Runs job() on the trading calendar, in the one process that holds the lease.
+
+    job() returns True when the scrape stored something new. A change resets the
+    interval to MIN_INTERVAL; each unchanged or failed scrape doubles it, up to
+    MAX_INTERVAL. Outside trading hours nothing is fetched and the scheduler
+    sleeps until the next open; the leader runs after_close() once on the way.
+    One APScheduler date job reschedules itself after every wake-up, so the
+    timing lives in one place: wake().
+    """
+    def __init__(self, job, after_close=None, lease_name='scrape'):
+        self.job, self.after_close = job, after_close
+        self.lease = Lease(lease_name)
+        self.interval = MIN_INTERVAL
+        self.next_scrape = 0
+        self.leader = False
+        self._scheduler = None
+        self._lock = threading.Lock()
+
+    def wake(self):
+        """Contest or renew the lease, scrape if one is due, and return seconds until the next wake-up."""
+        if not is_open():
+            if self.leader:
+                print(f"Market closed; scraping resumes at {next_open():%Y-%m-%d %H:%M}")
+                if self.after_close:
+                    try:
+                        self.after_close()
+                    except Exception as e:
+                        print("After-close job error:", e)
+            self.leader, self.interval, self.next_scrape = False, MIN_INTERVAL, 0
+            return min(IDLE_CHECK, max(1, (next_open() - local_now()).total_seconds()))
+        try:
+            leader = self.lease.acquire()
+        except Exception as e:
+            print("Scheduler lease error:", e)
+            leader = False
+        if leader != self.leader:
+            print(f"Scheduler {'took' if leader else 'lost'} the scrape lease ({self.lease.holder})")
+            self.leader, self.interval, self.next_scrape = leader, MIN_INTERVAL, 0
+        if not leader:
+            return RENEW_INTERVAL
+        if time.time() >= self.next_scrape:
+            try:
+                changed = self.job()
+            except Exception as e:
+                print("Scheduled scrape error:", e)
+                changed = False
+            self.interval = MIN_INTERVAL if changed else min(self.interval * 2, MAX_INTERVAL)
+            self.next_scrape = time.time() + self.interval
+            try:
+                publish_next_scrape(self.next_scrape)
+            except Exception as e:
+                print("Scheduler publish error:", e)
+        return max(1, min(RENEW_INTERVAL, self.next_scrape - time.time()))
+
+    def _run(self):
+        delay = RENEW_INTERVAL
+        try:
+            delay = self.wake()
+        finally:
+            self._schedule(delay)
+
+    def _schedule(self, delay):
+        with self._lock:
+            if self._scheduler is not None:
+                self._scheduler.add_job(self._run, trigger='date', run_date=local_now() + timedelta(seconds=delay),
+                                        id='scrape', replace_existing=True, misfire_grace_time=None)
+
+    def start(self):
+        from apscheduler.schedulers.background import BackgroundScheduler   # only processes that schedule load it
+        with self._lock:
+            if self._scheduler is not None:
+                return
+            self._scheduler = BackgroundScheduler(timezone=LOCAL_TZ)
+            self._scheduler.start()
+        self._schedule(0)
+
+    def shutdown(self):
+        with self._lock:
+            scheduler, self._scheduler = self._scheduler, None
+        if scheduler is not None:
+            scheduler.shutdown(wait=False)
+            try:
+                self.lease.release()
+            except Exception as e:
+                print("Scheduler lease error:", e)
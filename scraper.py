@@ -0,0 +1,103 @@
+# StockMate scraper: one pooled HTTP session, conditional GETs, retries and a first-table-only parse of mse.co.mw
+
+import hashlib, os, threading, time
+import requests
+from requests.adapters import HTTPAdapter
+from lxml import etree
+import instrumentation
+
+MSE_URL = os.environ.get('MSE_URL', 'https://www.mse.co.mw/')
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+TIMEOUT = (5, 20)        # (connect, read) seconds, so a hung MSE response can't stall the scheduler
+RETRIES = 3              # extra attempts after the first one
+BACKOFF = 1.0            # seconds; doubles after every failed attempt
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CHUNK_SIZE = 16 * 1024   # bytes fed to the parser at a time
+
+MARKET_COLUMNS = ('Counter', 'Last Price (MK)', '% Change', 'Volume', 'Turnover (MK)')
+
+# ========== PARSE ==========
+def parse_market_table(content):
+    """Rows of the first <table> on the page, in scrape_mse()'s dict shape.
+
+    The page is fed to lxml's pull parser in chunks and parsing stops as soon as
+    the first table closes, so the rest of the page is never tokenised.
+    """
+    parser = etree.HTMLPullParser(events=('start', 'end'), tag='table')
+    first = None
+    for offset in range(0, len(content), CHUNK_SIZE):
+        parser.feed(content[offset:offset + CHUNK_SIZE])
+        for event, element in parser.read_events():
+            if event == 'start' and first is None:
+                first = element
+            elif event == 'end' and element is first:
+                return _table_rows(first)
+    return _table_rows(first) if first is not None else []
+
+def _table_rows(table):
+    data = []
+    for row in list(table.iter('tr'))[1:]:
+        cols = [''.join(td.itertext()).strip() for td in row.iter('td')]
+        if len(cols) >= 5:
+            data.append(dict(zip(MARKET_COLUMNS, cols)))
+    return data
+
+# ========== FETCH ==========
+class MSEScraper:
+    """Fetches and parses the MSE market table, remembering enough to skip unchanged pages.
+
+    scrape() returns the parsed rows, or None when the server answered 304 or the
+    body hashes the same as last time. Network failures raise once retries run out.
+    """
+    def __init__(self, url=MSE_URL):
+        self.url = url
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.etag = None
+        self.last_modified = None
+        self.content_hash = None
+        self._lock = threading.Lock()  # /scrape and the scheduler can overlap
+
+    def _get(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        for attempt in range(RETRIES + 1):
+            try:
+                response = self.session.get(self.url, headers=headers, timeout=TIMEOUT)
+                if response.status_code in RETRY_STATUSES:
+                    raise requests.HTTPError(f"{response.status_code} from {self.url}", response=response)
+                response.raise_for_status()
+                return response
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                retryable = not isinstance(e, requests.HTTPError) or e.response.status_code in RETRY_STATUSES
+                if attempt == RETRIES or not retryable:
+                    raise
+                delay = BACKOFF * 2 ** attempt
+                print(f"Scrape attempt {attempt + 1} failed ({e}); retrying in {delay:.0f}s")
+                time.sleep(delay)
+
+    def scrape(self):
+        with self._lock:
+            with instrumentation.scrape_stage_seconds.time('fetch'):
+                response = self._get()
+            if response.status_code == 304:
+                return None
+            content_hash = hashlib.sha256(response.content).hexdigest()
+            if content_hash == self.content_hash:
+                return None
+            with instrumentation.scrape_stage_seconds.time('parse'):
+                rows = parse_market_table(response.content)
+            instrumentation.scrape_rows.inc('parsed', amount=len(rows))
+            # Only remember the page once it parsed, so a broken page is fetched and parsed in full next time
+            if rows:
+                self.content_hash = content_hash
+                self.etag = response.headers.get('ETag')
+                self.last_modified = response.headers.get('Last-Modified')
+            return rows
+
+mse = MSEScraper()
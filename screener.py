@@ -0,0 +1,104 @@
+# StockMate screener: every counter's valuation kept in one indexed table, filtered and sorted in SQL
+
+import re
+import db
+from fundamentals_store import store as fundamentals
+from valuation import valuation_rows
+
+# Columns a screen can filter and sort on; pe/pb/dy are accepted as short names
+COLUMNS = ('last_price', 'change', 'volume', 'turnover', 'eps', 'bvps', 'dvps', 'pe_ratio', 'pb_ratio', 'div_yield')
+ALIASES = {'pe': 'pe_ratio', 'pb': 'pb_ratio', 'dy': 'div_yield', 'price': 'last_price'}
+OPERATORS = ('<=', '>=', '!=', '<', '>', '=')
+MAX_LIMIT = 500
+
+_CONDITION = re.compile(r'\s*([a-z_]+)\s*(<=|>=|!=|<|>|=)\s*(-?\d+(?:\.\d+)?)\s*%?\s*', re.IGNORECASE)
+
+# ========== TABLE ==========
+def create_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS valuations (
+            counter TEXT PRIMARY KEY,
+            last_price REAL,
+            change REAL,
+            volume INTEGER,
+            turnover REAL,
+            timestamp INTEGER,
+            eps REAL,
+            bvps REAL,
+            dvps REAL,
+            pe_ratio REAL,
+            pb_ratio REAL,
+            div_yield REAL
+        )
+    ''')
+    for column in ('pe_ratio', 'pb_ratio', 'div_yield'):
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_valuations_{column} ON valuations ({column})')
+
+def _source():
+    # fundamentals.json's mtime, recorded with the table so any worker can tell it went stale
+    fundamentals.refresh()
+    return fundamentals.version[0] if fundamentals.version else 0
+
+def rebuild(conn):
+    """Recompute the whole table from latest_quotes and the fundamentals store, in the caller's transaction.
+
+    save_data calls it after every scrape that stores ticks; screen() calls it when fundamentals.json changed.
+    """
+    source = _source()
+    quotes = conn.execute('SELECT counter, last_price, change, volume, turnover, timestamp FROM latest_quotes').fetchall()
+    rows = valuation_rows(quotes, fundamentals.companies())
+    conn.execute('DELETE FROM valuations')
+    conn.executemany(f"INSERT INTO valuations (counter, {', '.join(COLUMNS[:4])}, timestamp, {', '.join(COLUMNS[4:])}) "
+                     f"VALUES ({', '.join('?' * 12)})", rows)
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('valuations_source', ?)", (source,))
+    return len(rows)
+
+def ensure_fresh():
+    """Rebuild when fundamentals.json changed since the table was last built (one stat and one lookup otherwise)."""
+    source = _source()
+    row = db.query_one("SELECT value FROM meta WHERE key = 'valuations_source'")
+    if row and row[0] == source:
+        return False
+    with db.transaction() as conn:
+        rebuild(conn)
+    return True
+
+# ========== EXPRESSIONS ==========
+def _column(name):
+    name = ALIASES.get(name.strip().lower(), name.strip().lower())
+    if name not in COLUMNS:
+        raise ValueError(f"Unknown column '{name}'. Use {', '.join(COLUMNS)}")
+    return name
+
+def parse_filters(values):
+    """['pe<8,dy>5', ...] as (sql, params) ANDed together. A trailing % is allowed and ignored."""
+    clauses, params = [], []
+    for value in values:
+        for condition in filter(str.strip, value.split(',')):
+            match = _CONDITION.fullmatch(condition)
+            if not match:
+                raise ValueError(f"Bad filter '{condition}'. Use <column><op><number> with one of {' '.join(OPERATORS)}")
+            clauses.append(f"{_column(match.group(1))} {'<>' if match.group(2) == '!=' else match.group(2)} ?")
+            params.append(float(match.group(3)))
+    return ' AND '.join(clauses), params
+
+def parse_sort(value):
+    """'pb' or '-div_yield,pe' as an ORDER BY list; '-' sorts descending. Counters without the value go last."""
+    terms = []
+    for term in filter(str.strip, (value or '').split(',')):
+        term = term.strip()
+        direction = 'DESC' if term.startswith('-') else 'ASC'
+        column = _column(term.lstrip('+-'))
+        terms.append(f'{column} IS NULL, {column} {direction}')
+    return ', '.join(terms + ['counter'])
+
+# ========== QUERY ==========
+def screen(filters=(), sort=None, limit=MAX_LIMIT):
+    """Valuation rows matching every filter, in sort order, at most limit of them."""
+    where, params = parse_filters(filters)
+    order = parse_sort(sort)
+    ensure_fresh()
+    sql = f"SELECT counter, {', '.join(COLUMNS)}, timestamp FROM valuations"
+    if where:
+        sql += f' WHERE {where}'
+    return db.query(f'{sql} ORDER BY {order} LIMIT ?', params + [limit])
@@ -0,0 +1 @@
+# StockMate tests: run from the repo root with  python -m pytest -q
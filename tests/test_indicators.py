@@ -0,0 +1,100 @@
+# Indicator parity: the incremental (save_data) and NumPy (backfill) paths against a textbook reference.
+# Run from the repo root:  python -m pytest -q
+import math, random, statistics
+
+import indicators
+
+TOLERANCE = 1e-9   # relative; the paths only differ in summation order
+
+def reference(prices, volumes, timestamps):
+    """Every indicator straight from its definition, recomputed from the raw series at each tick."""
+    out = {name: [None] * len(prices) for name in indicators.INDICATORS}
+    for name, (kind, n) in indicators.SPECS.items():
+        values = out[name]
+        if kind == 'sma':
+            for i in range(n - 1, len(prices)):
+                values[i] = statistics.fmean(prices[i - n + 1:i + 1])
+        elif kind == 'ema' and len(prices) >= n:
+            ema = statistics.fmean(prices[:n])
+            values[n - 1] = ema
+            for i in range(n, len(prices)):
+                ema = prices[i] * 2 / (n + 1) + ema * (1 - 2 / (n + 1))
+                values[i] = ema
+        elif kind == 'rsi' and len(prices) > n:
+            changes = [b - a for a, b in zip(prices, prices[1:])]
+            gain = statistics.fmean(max(c, 0) for c in changes[:n])
+            loss = statistics.fmean(max(-c, 0) for c in changes[:n])
+            for i in range(n, len(prices)):
+                if i > n:
+                    gain = (gain * (n - 1) + max(changes[i - 1], 0)) / n
+                    loss = (loss * (n - 1) + max(-changes[i - 1], 0)) / n
+                values[i] = (50.0 if gain == 0 else 100.0) if loss == 0 else 100 - 100 / (1 + gain / loss)
+        elif kind == 'vol':
+            returns = [math.log(b / a) for a, b in zip(prices, prices[1:])]
+            for i in range(n, len(prices)):
+                values[i] = statistics.stdev(returns[i - n:i])
+        elif kind == 'vwap':
+            day_start = 0
+            for i in range(len(prices)):
+                if i and indicators._trading_day(timestamps[i]) != indicators._trading_day(timestamps[i - 1]):
+                    day_start = i
+                volume = sum(volumes[day_start:i + 1])
+                if volume:
+                    values[i] = sum(p * v for p, v in zip(prices[day_start:i + 1], volumes[day_start:i + 1])) / volume
+    return out
+
+def worst_error(expected, actual):
+    """Largest relative difference between two {name: values} results; inf if one is defined where the other isn't."""
+    worst = 0.0
+    for name in indicators.INDICATORS:
+        for a, b in zip(expected[name], actual[name]):
+            a = None if a is None or (isinstance(a, float) and math.isnan(a)) else a
+            b = None if b is None or (isinstance(b, float) and math.isnan(b)) else b
+            if (a is None) != (b is None):
+                return math.inf
+            if a is not None:
+                worst = max(worst, abs(a - b) / max(1.0, abs(a)))
+    return worst
+
+def series(days=4, ticks_per_day=72, seed=19):
+    """(prices, volumes, timestamps): 5-minute ticks from 09:00 Malawi time on consecutive days.
+
+    Opens flat (RSI with no gains or losses) and starts every day on a zero-volume
+    tick (VWAP undefined until something trades).
+    """
+    rng = random.Random(seed)
+    prices, volumes, timestamps = [], [], []
+    price = 1200.0
+    for day in range(days):
+        opens = 1709535600 + day * 86400   # 2024-03-04 07:00 UTC
+        for i in range(ticks_per_day):
+            if len(prices) >= 20:
+                price = round(price * math.exp(rng.gauss(0, 0.004)), 2)
+            prices.append(price)
+            volumes.append(0 if i == 0 else rng.randrange(0, 5000))
+            timestamps.append(opens + i * 300)
+    return prices, volumes, timestamps
+
+def stepped(state, prices, volumes, timestamps):
+    out = {name: [] for name in indicators.INDICATORS}
+    for price, volume, ts in zip(prices, volumes, timestamps):
+        for name, value in indicators.step(state, price, volume, ts).items():
+            out[name].append(value)
+    return out
+
+def test_incremental_matches_reference():
+    data = series()
+    assert worst_error(reference(*data), stepped(indicators.new_state(), *data)) <= TOLERANCE
+
+def test_numpy_matches_reference():
+    data = series()
+    assert worst_error(reference(*data), indicators.compute(*data)[0]) <= TOLERANCE
+
+def test_incremental_continues_from_backfill_state():
+    # backfill() computes with NumPy and hands its state to the ticks save_data adds afterwards
+    prices, volumes, timestamps = series()
+    split = len(prices) // 2 + 7
+    backfilled, state = indicators.compute(prices[:split], volumes[:split], timestamps[:split])
+    rest = stepped(state, prices[split:], volumes[split:], timestamps[split:])
+    combined = {name: list(backfilled[name]) + rest[name] for name in indicators.INDICATORS}
+    assert worst_error(reference(prices, volumes, timestamps), combined) <= TOLERANCE
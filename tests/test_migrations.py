@@ -0,0 +1,66 @@
+# Schema upgrades: a database.db from before the migrations (v0, TEXT columns) must reach the current version.
+# Run from the repo root:  python -m pytest -q
+import sqlite3
+
+import pytest
+
+import candles, db, migrations
+
+V0_ROWS = [
+    ('NBM', '1,234.50', '+0.35%', '1,000', '1,234,500.00', '2024-03-04 08:00:00'),
+    ('NBM', '1,240.00', '0.45', '200', '248,000', '2024-03-04 09:30:00'),
+    ('NBM', '1,238.00', '-0.16', '50', '61,900', '2024-03-11 07:15:00'),
+    ('AIRTEL', '(2.10)', '', '', '', '2024-03-05 10:00:00'),
+]
+
+@pytest.fixture
+def v0_database(tmp_path, monkeypatch):
+    path = str(tmp_path / 'database.db')
+    conn = sqlite3.connect(path)
+    # The stocks table as the original app.py created it, before any migration
+    conn.execute('''
+        CREATE TABLE stocks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            counter TEXT,
+            last_price TEXT,
+            change TEXT,
+            volume TEXT,
+            turnover TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.executemany('INSERT INTO stocks (counter, last_price, change, volume, turnover, timestamp) VALUES (?, ?, ?, ?, ?, ?)',
+                     V0_ROWS)
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(db, 'DB_PATH', path)
+    db.pool.close_all()
+    yield path
+    db.pool.close_all()
+
+def test_upgrade_from_v0(v0_database):
+    migrations.init_db()
+    with db.connection() as conn:
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == len(migrations.MIGRATIONS)
+        ticks = conn.execute('SELECT counter, last_price, volume, timestamp FROM stocks ORDER BY id').fetchall()
+        assert ticks[0] == ('NBM', 1234.5, 1000, 1709539200)
+        assert [row[3] for row in ticks] == [1709539200, 1709544600, 1710141300, 1709632800]
+        # Candles built by v4 from the TEXT timestamps match a roll-up of the migrated epochs
+        migrated = conn.execute('SELECT * FROM candles ORDER BY counter, interval, bucket').fetchall()
+        # Pooled connections run in autocommit, so the rebuild gets its own transaction to roll back
+        conn.execute('BEGIN')
+        try:
+            conn.execute('DELETE FROM candles')
+            candles.roll_up(conn, 0)
+            rebuilt = conn.execute('SELECT * FROM candles ORDER BY counter, interval, bucket').fetchall()
+        finally:
+            conn.execute('ROLLBACK')
+        assert conn.execute('SELECT * FROM candles ORDER BY counter, interval, bucket').fetchall() == migrated
+    assert migrated and migrated == rebuilt
+    assert ('NBM', '1w', '2024-03-04', 1234.5, 1240.0, 1234.5, 1240.0, 1200, 1482500.0, 2) in migrated
+
+def test_init_db_is_idempotent(v0_database):
+    migrations.init_db()
+    migrations.init_db()
+    with db.connection() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM stocks').fetchone()[0] == len(V0_ROWS)
@@ -0,0 +1,32 @@
+# Fundamentals report rendering: one PDF through the shared font/image path and through the per-document fallback.
+# Run from the repo root:  python -m pytest -q
+import os
+
+import pytest
+
+import reports
+from fundamentals_store import CompanyFundamentals
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPANY = {'net_profit': '12,500,000,000', 'number_of_shares_in_issue': '4,690,000,000',
+           'dividend_paid': '3,200,000,000', 'book_value': '98,000,000,000'}
+
+@pytest.fixture
+def repo_cwd(monkeypatch):
+    # Fonts, logos and company_logos/ are opened by relative path
+    monkeypatch.chdir(ROOT)
+
+def render():
+    return reports.render_report('NBM', CompanyFundamentals('NBM', COMPANY), 1234.5)
+
+def test_render_report_with_shared_assets(repo_cwd):
+    pdf = render()
+    assert pdf.startswith(b'%PDF-') and pdf.rstrip().endswith(b'%%EOF')
+    # The pinned fpdf2 takes the shared copies; if this fails the fallback is what every render uses
+    assert reports.assets._shared
+
+def test_render_report_per_document_fallback(repo_cwd, monkeypatch):
+    reports.assets._load()
+    monkeypatch.setattr(reports.assets, '_shared', False)
+    pdf = render()
+    assert pdf.startswith(b'%PDF-') and pdf.rstrip().endswith(b'%%EOF')
@@ -0,0 +1,26 @@
+# Trading calendar and cache freshness: how long served prices stay current.
+# Run from the repo root:  python -m pytest -q
+from datetime import datetime
+
+import scheduling
+from localtime import LOCAL_TZ
+
+def local(*args):
+    return LOCAL_TZ.localize(datetime(*args)).timestamp()
+
+def test_fresh_for_open_market_counts_down_to_next_scrape():
+    now = local(2024, 3, 6, 11, 0)   # Wednesday, mid-session
+    assert scheduling.fresh_for(now + 45, now) == 45
+    assert scheduling.fresh_for(now + scheduling.MIN_INTERVAL, now) == scheduling.MIN_INTERVAL
+
+def test_fresh_for_open_market_with_scrape_due():
+    now = local(2024, 3, 6, 11, 0)
+    assert scheduling.fresh_for(now - 10, now) == 0
+    assert scheduling.fresh_for(0, now) == 0
+
+def test_fresh_for_closed_market_lasts_until_next_open():
+    friday_evening = local(2024, 3, 8, 16, 0)
+    assert scheduling.fresh_for(friday_evening - 3600, friday_evening) == local(2024, 3, 11, 9, 0) - friday_evening
+    # Monday 4 March 2024 is the observed Martyrs' Day holiday (3 March fell on a Sunday)
+    sunday = local(2024, 3, 3, 12, 0)
+    assert scheduling.fresh_for(0, sunday) == local(2024, 3, 5, 9, 0) - sunday
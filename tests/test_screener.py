@@ -0,0 +1,25 @@
+# Screener filter and sort parsing: query-string conditions into SQL for the valuations table.
+# Run from the repo root:  python -m pytest -q
+import pytest
+
+import screener
+
+def test_parse_filters_aliases_and_percent():
+    assert screener.parse_filters(['pe<8,dy>5%']) == ('pe_ratio < ? AND div_yield > ?', [8.0, 5.0])
+    assert screener.parse_filters(['last_price!=-1.5']) == ('last_price <> ?', [-1.5])
+
+def test_parse_filters_ignores_column_case():
+    assert screener.parse_filters(['PE<8']) == ('pe_ratio < ?', [8.0])
+    assert screener.parse_filters(['Div_Yield >= 4', 'pB<1']) == ('div_yield >= ? AND pb_ratio < ?', [4.0, 1.0])
+
+@pytest.mark.parametrize('condition', ['pe', 'pe<<8', 'pe<eight', '8<pe'])
+def test_parse_filters_rejects_malformed(condition):
+    with pytest.raises(ValueError, match='Bad filter'):
+        screener.parse_filters([condition])
+
+def test_parse_filters_rejects_unknown_column():
+    with pytest.raises(ValueError, match='Unknown column'):
+        screener.parse_filters(['PEG<1'])
+
+def test_parse_sort():
+    assert screener.parse_sort('-DY,pe') == 'div_yield IS NULL, div_yield DESC, pe_ratio IS NULL, pe_ratio ASC, counter'
@@ -0,0 +1,75 @@
+# StockMate valuation engine: EPS, BVPS, DVPS, P/E, P/B and dividend yield for many counters in one pass
+
+import numpy as np
+
+def _ratio_strings(values, suffix=''):
+    # Same rule as the single-counter routes: a missing or zero ratio reads "N/A"
+    shown = np.isfinite(values) & (values != 0)
+    text = np.char.add(np.char.mod('%.2f', np.where(shown, values, 0)), suffix)
+    return np.where(shown, text, 'N/A').tolist()
+
+def _valued(quotes, companies):
+    # (quote, company) pairs with usable fundamentals, and the price/per-share/ratio arrays for them
+    matched = []
+    for quote in quotes:
+        company = companies.get(quote[0].upper())
+        if company and not company.error:
+            matched.append((quote, company))
+    if not matched:
+        return [], None
+
+    price = np.array([q[1] or 0 for q, _ in matched], dtype=float)
+    per_share = np.array([(c.eps, c.bvps, c.dvps) for _, c in matched], dtype=float)
+    eps, bvps, dvps = per_share.T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pe_ratio = np.where(eps != 0, price / eps, np.nan)
+        pb_ratio = np.where(bvps != 0, price / bvps, np.nan)
+        div_yield = np.where(price != 0, dvps / price * 100, np.nan)
+    return matched, (price, eps, bvps, dvps, pe_ratio, pb_ratio, div_yield)
+
+def value_quotes(quotes, companies):
+    """Valuation rows for every quote whose counter has usable fundamentals.
+
+    quotes:    (counter, last_price, change, volume, turnover, timestamp) rows from latest_quotes
+    companies: {COUNTER: CompanyFundamentals} from the fundamentals store
+    Returns dicts shaped like /metrics/<counter>; timestamps are left as stored.
+    """
+    matched, arrays = _valued(quotes, companies)
+    if not matched:
+        return []
+    price, eps, bvps, dvps, pe_ratio, pb_ratio, div_yield = arrays
+
+    last_price = np.char.mod('%.2f', price).tolist()
+    eps_text = np.char.mod('%.2f', eps).tolist()
+    pe_text = _ratio_strings(pe_ratio)
+    pb_text = _ratio_strings(pb_ratio)
+    dy_text = _ratio_strings(div_yield, '%')
+
+    return [{
+        "counter": quote[0].upper(),
+        "last_price": last_price[i],
+        "change": quote[2],
+        "volume": quote[3],
+        "turnover": quote[4],
+        "timestamp": quote[5],
+        "eps": eps_text[i],
+        "pe_ratio": pe_text[i],
+        "pb_ratio": pb_text[i],
+        "div_yield": dy_text[i]
+    } for i, (quote, _) in enumerate(matched)]
+
+def valuation_rows(quotes, companies):
+    """The same valuations as numbers, for the screener's table.
+
+    (counter, last_price, change, volume, turnover, timestamp, eps, bvps, dvps, pe_ratio, pb_ratio, div_yield)
+    tuples; a ratio that /metrics would show as "N/A" is None.
+    """
+    matched, arrays = _valued(quotes, companies)
+    if not matched:
+        return []
+    price, eps, bvps, dvps = (a.tolist() for a in arrays[:4])
+    ratios = [[v if shown else None for v, shown in zip(r.tolist(), (np.isfinite(r) & (r != 0)).tolist())]
+              for r in arrays[4:]]
+    return [(quote[0].upper(), price[i], quote[2], quote[3], quote[4], quote[5], eps[i], bvps[i], dvps[i],
+             ratios[0][i], ratios[1][i], ratios[2][i]) for i, (quote, _) in enumerate(matched)]